@@ -0,0 +1,128 @@
+"""Move call transcripts into compressed call_artifacts side table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+import os
+import zlib
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Snapshots of the tables as of this revision (the app's models and transcript store may change later)
+calls = sa.table("calls", sa.column("id", sa.Integer), sa.column("transcript", sa.Text))
+call_artifacts = sa.table(
+    "call_artifacts",
+    sa.column("call_id", sa.Integer),
+    sa.column("codec", sa.String),
+    sa.column("backend", sa.String),
+    sa.column("transcript_blob", sa.LargeBinary),
+    sa.column("transcript_ref", sa.String),
+    sa.column("transcript_size", sa.Integer),
+)
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard  # rows written by the app with zstandard installed
+
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+def _stored_transcript(backend: str, codec: str, blob, ref) -> str | None:
+    """Transcript of a call_artifacts row, inline (database backend) or by sha256 ref (filesystem backend)."""
+    if blob is not None:
+        return _decompress(blob, codec).decode("utf-8")
+    if backend == "filesystem" and ref:
+        root = Path(os.environ.get("TRANSCRIPT_STORE_DIR") or Path(__file__).resolve().parents[2] / "transcript_data")
+        return _decompress((root / ref[:2] / ref[2:4] / f"{ref}.{codec}").read_bytes(), codec).decode("utf-8")
+    return None
+
+
+
+
+def upgrade() -> None:
+    op.create_table(
+        "call_artifacts",
+        sa.Column("call_id", sa.Integer(), nullable=False),
+        sa.Column("codec", sa.String(16), nullable=False),
+        sa.Column("backend", sa.String(16), nullable=False),
+        sa.Column("transcript_blob", sa.LargeBinary(), nullable=True),
+        sa.Column("transcript_ref", sa.String(64), nullable=True),
+        sa.Column("transcript_size", sa.Integer(), nullable=True),
+        sa.Column("artifact_blob", sa.LargeBinary(), nullable=True),
+        sa.Column("artifact_ref", sa.String(64), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["call_id"], ["calls.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("call_id"),
+    )
+
+    # Copy existing transcripts in batches (zlib-compressed inline, readable by every transcript
+    # store backend), then drop the column
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(calls.c.id, calls.c.transcript)
+            .where(calls.c.transcript.isnot(None), calls.c.id > last_id)
+            .order_by(calls.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        values = []
+        for call_id, transcript in rows:
+            if transcript:
+                data = transcript.encode("utf-8")
+                values.append({
+                    "call_id": call_id,
+                    "codec": "zlib",
+                    "backend": "database",
+                    "transcript_blob": zlib.compress(data, 9),
+                    "transcript_size": len(data),
+                })
+        if values:
+            bind.execute(call_artifacts.insert(), values)
+        last_id = rows[-1][0]
+
+    op.drop_column("calls", "transcript")
+
+
+def downgrade() -> None:
+    op.add_column("calls", sa.Column("transcript", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(
+                call_artifacts.c.call_id,
+                call_artifacts.c.backend,
+                call_artifacts.c.codec,
+                call_artifacts.c.transcript_blob,
+                call_artifacts.c.transcript_ref,
+            )
+            .where(call_artifacts.c.call_id > last_id)
+            .order_by(call_artifacts.c.call_id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for call_id, backend, codec, blob, ref in rows:
+            transcript = _stored_transcript(backend, codec, blob, ref)
+            if transcript:
+                bind.execute(calls.update().where(calls.c.id == call_id).values(transcript=transcript))
+        last_id = rows[-1][0]
+    op.drop_table("call_artifacts")
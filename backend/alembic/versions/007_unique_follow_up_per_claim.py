@@ -0,0 +1,34 @@
+"""One pending follow-up per claim: dedupe scheduled_calls and make claim_id unique
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the earliest follow-up per claim (ties: lowest id); the rest were duplicates
+    op.execute(
+        sa.text(
+            "DELETE FROM scheduled_calls a USING scheduled_calls b "
+            "WHERE a.claim_id = b.claim_id "
+            "AND (a.call_after > b.call_after OR (a.call_after = b.call_after AND a.id > b.id))"
+        )
+    )
+    op.drop_index(op.f("ix_scheduled_calls_claim_id"), table_name="scheduled_calls")
+    op.create_index(op.f("ix_scheduled_calls_claim_id"), "scheduled_calls", ["claim_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_scheduled_calls_claim_id"), table_name="scheduled_calls")
+    op.create_index(op.f("ix_scheduled_calls_claim_id"), "scheduled_calls", ["claim_id"], unique=False)
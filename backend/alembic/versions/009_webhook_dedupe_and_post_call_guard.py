@@ -0,0 +1,32 @@
+"""Webhook dedupe key and once-per-call post-call processing marker
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("webhook_events", sa.Column("dedupe_key", sa.String(64), nullable=True))
+    op.create_index(op.f("ix_webhook_events_dedupe_key"), "webhook_events", ["dedupe_key"], unique=True)
+    op.add_column("calls", sa.Column("post_call_processed_at", sa.DateTime(timezone=True), nullable=True))
+    # Calls that already have an extraction went through the workflow before this column existed
+    op.execute(
+        sa.text("UPDATE calls SET post_call_processed_at = updated_at WHERE extracted_data IS NOT NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("calls", "post_call_processed_at")
+    op.drop_index(op.f("ix_webhook_events_dedupe_key"), table_name="webhook_events")
+    op.drop_column("webhook_events", "dedupe_key")
@@ -0,0 +1,46 @@
+"""Workflow run history: per-node timings
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_node_runs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("workflow", sa.String(64), nullable=False),
+        sa.Column("thread_id", sa.String(100), nullable=False),
+        sa.Column("run_id", sa.String(36), nullable=False),
+        sa.Column("call_id", sa.Integer(), nullable=True),
+        sa.Column("node", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["call_id"], ["calls.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_workflow_node_runs_thread_id"), "workflow_node_runs", ["thread_id"], unique=False)
+    op.create_index(op.f("ix_workflow_node_runs_run_id"), "workflow_node_runs", ["run_id"], unique=False)
+    op.create_index(op.f("ix_workflow_node_runs_call_id"), "workflow_node_runs", ["call_id"], unique=False)
+    op.create_index(op.f("ix_workflow_node_runs_started_at"), "workflow_node_runs", ["started_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_workflow_node_runs_started_at"), table_name="workflow_node_runs")
+    op.drop_index(op.f("ix_workflow_node_runs_call_id"), table_name="workflow_node_runs")
+    op.drop_index(op.f("ix_workflow_node_runs_run_id"), table_name="workflow_node_runs")
+    op.drop_index(op.f("ix_workflow_node_runs_thread_id"), table_name="workflow_node_runs")
+    op.drop_table("workflow_node_runs")
@@ -0,0 +1,59 @@
+"""RAG ingestion jobs for file uploads
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rag_ingest_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("practice_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("kind", sa.String(32), nullable=False),
+        sa.Column("file_format", sa.String(16), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=True),
+        sa.Column("file_path", sa.String(500), nullable=False),
+        sa.Column("payer_id", sa.Integer(), nullable=True),
+        sa.Column("payer_name", sa.String(255), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("bytes_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bytes_read", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("records", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("documents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("written", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unchanged", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["practice_id"], ["practices.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["payer_id"], ["payers.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_rag_ingest_jobs_practice_id"), "rag_ingest_jobs", ["practice_id"], unique=False)
+    op.create_index(op.f("ix_rag_ingest_jobs_user_id"), "rag_ingest_jobs", ["user_id"], unique=False)
+    op.create_index(op.f("ix_rag_ingest_jobs_status"), "rag_ingest_jobs", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_rag_ingest_jobs_status"), table_name="rag_ingest_jobs")
+    op.drop_index(op.f("ix_rag_ingest_jobs_user_id"), table_name="rag_ingest_jobs")
+    op.drop_index(op.f("ix_rag_ingest_jobs_practice_id"), table_name="rag_ingest_jobs")
+    op.drop_table("rag_ingest_jobs")
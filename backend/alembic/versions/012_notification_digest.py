@@ -0,0 +1,59 @@
+"""Notification digest: practice digest settings and call_notifications
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("practices", sa.Column("notification_mode", sa.String(16), nullable=False, server_default="immediate"))
+    op.add_column("practices", sa.Column("digest_interval_minutes", sa.Integer(), nullable=False, server_default="60"))
+    op.add_column("practices", sa.Column("digest_max_items", sa.Integer(), nullable=False, server_default="100"))
+    op.create_table(
+        "call_notifications",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("practice_id", sa.Integer(), nullable=False),
+        sa.Column("claim_id", sa.Integer(), nullable=False),
+        sa.Column("call_id", sa.Integer(), nullable=True),
+        sa.Column("claim_number", sa.String(100), nullable=True),
+        sa.Column("patient_name", sa.String(255), nullable=True),
+        sa.Column("payer_name", sa.String(255), nullable=True),
+        sa.Column("claim_status", sa.String(50), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("next_steps", sa.Text(), nullable=True),
+        sa.Column("denial", sa.String(500), nullable=True),
+        sa.Column("call_duration_seconds", sa.Integer(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["practice_id"], ["practices.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["claim_id"], ["claims.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["call_id"], ["calls.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_call_notifications_practice_sent_id", "call_notifications", ["practice_id", "sent_at", "id"], unique=False
+    )
+    op.create_index(op.f("ix_call_notifications_claim_id"), "call_notifications", ["claim_id"], unique=False)
+    op.create_index(op.f("ix_call_notifications_call_id"), "call_notifications", ["call_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_call_notifications_call_id"), table_name="call_notifications")
+    op.drop_index(op.f("ix_call_notifications_claim_id"), table_name="call_notifications")
+    op.drop_index("ix_call_notifications_practice_sent_id", table_name="call_notifications")
+    op.drop_table("call_notifications")
+    op.drop_column("practices", "digest_max_items")
+    op.drop_column("practices", "digest_interval_minutes")
+    op.drop_column("practices", "notification_mode")
@@ -0,0 +1,55 @@
+"""
+Content-addressed cache of LLM extraction results.
+Key = sha256(prompt version, model, RAG context, transcript), so a replayed or retried call with the
+same inputs returns the stored ExtractedOutcome without an LLM request, and any change to the prompt,
+model or reference context misses. Entries live in Redis with a TTL (EXTRACTION_CACHE_TTL); Redis
+errors count as misses.
+"""
+
+import hashlib
+import json
+from typing import Optional
+
+from ..core.config import get_settings
+from ..core.metrics import incr_counter, read_counters
+from ..core.redis_client import get_redis
+
+CACHE_METRIC = "extraction_cache"
+_KEY_PREFIX = "extraction_cache:"
+
+
+def cache_key(transcript: str, prompt_version: str, model: str, rag_context: str) -> str:
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, rag_context, transcript):
+        data = (part or "").encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))  # length-prefixed: parts can't bleed into each other
+        digest.update(data)
+    return _KEY_PREFIX + digest.hexdigest()
+
+
+def get_cached(key: str) -> Optional[dict]:
+    if get_settings().EXTRACTION_CACHE_TTL <= 0:
+        return None
+    try:
+        raw = get_redis().get(key)
+    except Exception:
+        raw = None
+    incr_counter(CACHE_METRIC, "hit" if raw else "miss")
+    return json.loads(raw) if raw else None
+
+
+def put_cached(key: str, extracted: dict) -> None:
+    ttl = get_settings().EXTRACTION_CACHE_TTL
+    if ttl <= 0:
+        return
+    try:
+        get_redis().set(key, json.dumps(extracted, separators=(",", ":")), ex=ttl)
+    except Exception:
+        pass
+
+
+def cache_stats() -> dict:
+    counts = read_counters(CACHE_METRIC)
+    hits, misses = counts.get("hit", 0), counts.get("miss", 0)
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
@@ -0,0 +1,311 @@
+"""
+Local fast-path classifier run before the LLM extractor.
+Rules catch calls whose outcome is unambiguous (no answer, voicemail, the rep saying "the claim
+was paid, check number X"); a small multinomial Naive Bayes model trained on past LLM extractions
+(Call.extracted_data) covers the rest. Each result carries a confidence; the extractor only skips
+the LLM when it clears FAST_PATH_MIN_CONFIDENCE. Naive Bayes posteriors are far too confident, so
+the model's are temperature-scaled, with the temperature fitted on calls held out from training.
+
+Train with scripts/train_fast_path.py; measure agreement with the LLM with scripts/eval_fast_path.py.
+"""
+
+import json
+import math
+import random
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+from ..core.config import get_settings
+from .outcome_extractor import ExtractedOutcome
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parent.parent.parent / "fast_path_model.json"
+MODEL_VERSION = 2  # 2: calibrated (temperature); older models aren't used
+MIN_CALIBRATION_SAMPLES = 20
+
+# The model only predicts claim_status; outcomes that need a narrative (denial reason, appeal steps)
+# go to the LLM whatever the model's confidence.
+MODEL_FAST_CLASSES = {"paid", "pending", "unknown"}
+
+_WORD_RE = re.compile(r"[a-z0-9$]+")
+_SPEAKER_RE = re.compile(r"^\s*(?:ai|bot|assistant|user|customer|agent|rep|representative)\s*:", re.I | re.M)
+# The payer's side of the call; our assistant is AI / bot / assistant
+_REP_SPEAKER_RE = re.compile(r"^\s*(user|customer|agent|rep|representative)\s*:\s*", re.I)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_NO_ANSWER_REASONS = ("no-answer", "no_answer", "did-not-answer", "busy", "voicemail")
+_VOICEMAIL_RE = re.compile(
+    r"leave (?:a|your) message|after the (?:tone|beep)|voice\s*mail|mailbox (?:is )?full|"
+    r"not available to take your call|record your message",
+    re.I,
+)
+_PAID_RE = re.compile(
+    r"\b(?:claim|it)\s+(?:has been|was|is)\s+(?:already\s+)?(?:paid|processed for payment)\b|"
+    r"\bpaid\s+(?:on|in full|in the amount of)\b",
+    re.I,
+)
+_CHECK_RE = re.compile(r"\b(?:check|eft|trace)\s*(?:number|no\.?|#)?\s*(?:is\s+)?[:#]?\s*([A-Z0-9-]{4,})\b", re.I)
+_NOT_PAID_RE = re.compile(
+    r"\bnot\s+(?:been\s+)?paid\b|\bden(?:ied|ial)\b|\breprocess|\bappeal|\bpartial(?:ly)?\s+paid\b|\brecoup|"
+    r"\bpending\b|\bin process\b|\bunder review\b",
+    re.I,
+)
+_AMOUNT_RE = re.compile(r"\$\s?(\d[\d,]*(?:\.\d{2})?)")
+_DENIAL_CODE_RE = re.compile(r"\b(CO|PR|OA|PI|CR)[\s-]?(\d{1,3})\b")
+
+
+def _outcome(claim_status: str, summary: str, confidence: float, rule: str, **fields) -> ExtractedOutcome:
+    return ExtractedOutcome(
+        claim_status=claim_status,
+        summary=summary,
+        confidence=round(confidence, 3),
+        source=f"fast_path:{rule}",
+        **fields,
+    )
+
+
+def _denial_code(transcript: str) -> Optional[str]:
+    match = _DENIAL_CODE_RE.search(transcript)
+    return f"{match.group(1)}-{match.group(2)}" if match else None
+
+
+def _amount(transcript: str) -> Optional[str]:
+    match = _AMOUNT_RE.search(transcript)
+    return f"${match.group(1)}" if match else None
+
+
+def _rep_statements(transcript: str) -> str:
+    """What the rep said, without questions ("has the claim been paid?"). Empty for unlabelled transcripts."""
+    turns: list[str] = []
+    rep = False
+    for line in transcript.splitlines():
+        match = _REP_SPEAKER_RE.match(line)
+        if match or _SPEAKER_RE.match(line):
+            rep = bool(match)
+            line = line[match.end():] if match else ""
+        if rep:
+            turns.append(line)
+    sentences = _SENTENCE_END_RE.split(" ".join(turns).strip())
+    return " ".join(s for s in sentences if not s.endswith("?"))
+
+
+def _classify_rules(transcript: str, ended_reason: str) -> Optional[ExtractedOutcome]:
+    reason = (ended_reason or "").lower()
+    text = transcript.strip()
+    if any(r in reason for r in _NO_ANSWER_REASONS):
+        return _outcome(
+            "unknown", f"Call not answered ({ended_reason}).", 0.98, "ended_reason",
+            action_taken="none", next_steps="Call again",
+        )
+    if len(text) < 40 or len(_WORD_RE.findall(text.lower())) < 8:
+        return _outcome(
+            "unknown", "No conversation took place on the call.", 0.95, "empty",
+            action_taken="none", next_steps="Call again",
+        )
+    turns = len(_SPEAKER_RE.findall(text))
+    if _VOICEMAIL_RE.search(text) and turns <= 3:
+        return _outcome(
+            "unknown", "Reached voicemail; no representative on the line.", 0.93, "voicemail",
+            action_taken="none", next_steps="Call again",
+        )
+    rep_text = _rep_statements(text)
+    if _PAID_RE.search(rep_text) and not _NOT_PAID_RE.search(text):
+        check = _CHECK_RE.search(rep_text)
+        # Without a check / EFT number the LLM confirms: stay under the threshold
+        confidence = 0.95 if check else min(0.85, get_settings().FAST_PATH_MIN_CONFIDENCE - 0.05)
+        summary = "Representative confirmed the claim was paid"
+        summary += f" (check/EFT {check.group(1)})." if check else "."
+        return _outcome(
+            "paid", summary, confidence, "paid",
+            action_taken="info_gathered", amount_paid=_amount(rep_text),
+        )
+    return None
+
+
+def tokenize(text: str) -> list[str]:
+    """Unigrams + bigrams over lowercased words."""
+    words = _WORD_RE.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def train_model(samples: Iterable[tuple[str, str]], min_count: int = 2, max_features: int = 20000) -> dict:
+    """Fit a multinomial Naive Bayes model on (transcript, claim_status) pairs."""
+    class_docs: Counter = Counter()
+    class_tokens: dict[str, Counter] = {}
+    totals: Counter = Counter()
+    for transcript, label in samples:
+        label = (label or "unknown").lower()
+        tokens = tokenize(transcript)
+        class_docs[label] += 1
+        class_tokens.setdefault(label, Counter()).update(tokens)
+        totals.update(tokens)
+    vocab = [t for t, c in totals.most_common(max_features) if c >= min_count]
+    vocab_set = set(vocab)
+    n_docs = sum(class_docs.values()) or 1
+    return {
+        "version": MODEL_VERSION,
+        "vocab_size": len(vocab),
+        "classes": {
+            label: {
+                "log_prior": math.log(class_docs[label] / n_docs),
+                "token_counts": {t: c for t, c in class_tokens[label].items() if t in vocab_set},
+            }
+            for label in class_docs
+        },
+    }
+
+
+def save_model(model: dict, path: Optional[Path] = None) -> Path:
+    path = Path(path or _model_path())
+    path.write_text(json.dumps(model, separators=(",", ":")), encoding="utf-8")
+    _loaded.clear()
+    return path
+
+
+def _model_path() -> Path:
+    configured = get_settings().FAST_PATH_MODEL_PATH
+    return Path(configured) if configured else DEFAULT_MODEL_PATH
+
+
+def _prepare(raw: dict) -> dict:
+    vocab_size = max(1, raw.get("vocab_size", 0))
+    prepared = {}
+    for label, info in raw["classes"].items():
+        counts = info["token_counts"]
+        denom = sum(counts.values()) + vocab_size  # Laplace smoothing
+        prepared[label] = {
+            "log_prior": info["log_prior"],
+            "log_probs": {t: math.log((c + 1) / denom) for t, c in counts.items()},
+            "log_unseen": math.log(1 / denom),
+        }
+    vocab = set()
+    for params in prepared.values():
+        vocab.update(params["log_probs"])
+    return {"classes": prepared, "vocab": vocab, "temperature": raw.get("temperature") or 1.0}
+
+
+# path -> (mtime, prepared model)
+_loaded: dict[str, tuple[float, dict]] = {}
+
+
+def _load_model() -> Optional[dict]:
+    """Load and prepare the model file (re-read when it changes). None if not trained (and calibrated) yet."""
+    path = _model_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    cached = _loaded.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    if raw.get("version") != MODEL_VERSION or not raw.get("temperature"):
+        return None
+    model = _prepare(raw)
+    _loaded[str(path)] = (mtime, model)
+    return model
+
+
+def _log_scores(transcript: str, model: dict) -> dict[str, float]:
+    """Unnormalized log posterior per class."""
+    tokens = [t for t in tokenize(transcript) if t in model["vocab"]]
+    scores = {}
+    for label, params in model["classes"].items():
+        log_probs = params["log_probs"]
+        unseen = params["log_unseen"]
+        scores[label] = params["log_prior"] + sum(log_probs.get(t, unseen) for t in tokens)
+    return scores
+
+
+def _softmax(scores: dict[str, float], temperature: float) -> dict[str, float]:
+    top = max(scores.values())
+    weights = {label: math.exp((s - top) / temperature) for label, s in scores.items()}
+    norm = sum(weights.values())
+    return {label: w / norm for label, w in weights.items()}
+
+
+def fit_temperature(model: dict, samples: Iterable[tuple[str, str]]) -> float:
+    """
+    Temperature that minimizes the log loss of the model's posteriors on held-out
+    (transcript, claim_status) pairs. Log loss is convex in 1/temperature, so a ternary search
+    over it finds the optimum.
+    """
+    prepared = _prepare(model)
+    scored = []
+    for transcript, label in samples:
+        label = (label or "unknown").lower()
+        if label in prepared["classes"]:
+            scored.append((_log_scores(transcript, prepared), label))
+    if not scored:
+        return 1.0
+
+    def log_loss(inverse: float) -> float:
+        temperature = 1.0 / max(inverse, 1e-9)
+        return -sum(math.log(max(_softmax(scores, temperature)[label], 1e-12)) for scores, label in scored)
+
+    lo, hi = 0.0, 2.0
+    for _ in range(100):
+        a, b = lo + (hi - lo) / 3, hi - (hi - lo) / 3
+        if log_loss(a) <= log_loss(b):
+            hi = b
+        else:
+            lo = a
+    return round(1.0 / max((lo + hi) / 2, 1e-9), 4)
+
+
+def fit_model(
+    samples: list[tuple[str, str]],
+    calibration: float = 0.2,
+    min_count: int = 2,
+    seed: int = 7,
+) -> dict:
+    """
+    Train on (1 - calibration) of the samples and fit the temperature on the rest.
+    Raises ValueError if fewer than MIN_CALIBRATION_SAMPLES would be held out.
+    """
+    samples = list(samples)
+    random.Random(seed).shuffle(samples)
+    held_out = int(len(samples) * calibration)
+    if held_out < MIN_CALIBRATION_SAMPLES:
+        raise ValueError(
+            f"{len(samples)} calls leave {held_out} for calibration; need at least {MIN_CALIBRATION_SAMPLES}"
+        )
+    model = train_model(samples[held_out:], min_count=min_count)
+    model["temperature"] = fit_temperature(model, samples[:held_out])
+    model["calibration_samples"] = held_out
+    return model
+
+
+def predict_status(transcript: str, model: Optional[dict] = None) -> Optional[tuple[str, float]]:
+    """(claim_status, calibrated posterior probability) from the trained model, or None without a model."""
+    model = model or _load_model()
+    if not model or not model["classes"]:
+        return None
+    probabilities = _softmax(_log_scores(transcript, model), model["temperature"])
+    best = max(probabilities, key=probabilities.get)
+    return best, probabilities[best]
+
+
+def classify_fast_path(transcript: str, ended_reason: str = "") -> Optional[ExtractedOutcome]:
+    """
+    Best local guess at the call outcome, with confidence and source set.
+    None when neither the rules nor the model have an opinion.
+    """
+    transcript = transcript or ""
+    outcome = _classify_rules(transcript, ended_reason)
+    if outcome is not None:
+        return outcome
+    prediction = predict_status(transcript)
+    if prediction is None:
+        return None
+    status, probability = prediction
+    if status not in MODEL_FAST_CLASSES:
+        probability = 0.0  # never skip the LLM for these
+    return _outcome(
+        status,
+        f"Classified locally as {status}.",
+        probability,
+        "model",
+        denial_code=_denial_code(transcript),
+        amount_paid=_amount(transcript) if status == "paid" else None,
+    )
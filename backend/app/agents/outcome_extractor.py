@@ -1,9 +1,11 @@
 """
 LLM-based extraction of structured claim outcome from call transcript.
 Uses RAG (denial codes + payer policies) when available to improve extraction.
+A local fast-path classifier (fast_path_classifier) answers first; the LLM only sees calls it isn't sure about.
 """
 
-from typing import Optional
+import asyncio
+from typing import Any, Optional
 from pydantic import BaseModel, Field
 
 from langchain_openai import ChatOpenAI
@@ -11,11 +13,27 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.output_parsers import PydanticOutputParser
 
 from ..core.config import get_settings
-from ..services.rag_service import query_denial_codes, query_payer_policies
+from ..core.metrics import incr_counter
+from .extraction_cache import cache_key, get_cached, put_cached
+from .transcript_prep import prepare_transcript
+from ..services.denial_code_index import lookup_denial_codes
+from ..services.rag_service import (
+    aquery_denial_codes,
+    aquery_payer_policies,
+    query_denial_codes,
+    query_payer_policies,
+)
 
+ROUTING_METRIC = "extraction_routes"
+DENIAL_LOOKUP_METRIC = "rag_denial_lookups"
+TOKENS_METRIC = "extraction_tokens"
 
-class ExtractedOutcome(BaseModel):
-    """Structured outcome extracted from call transcript."""
+# Bump when EXTRACTION_PROMPT, the system message or the output schema changes (invalidates the extraction cache)
+PROMPT_VERSION = "2"
+
+
+class _LLMOutcome(BaseModel):
+    """Fields the LLM is asked to fill (the output parser's schema)."""
 
     claim_status: str = Field(
         description="Current status of the claim: pending, paid, denied, reprocessing, appeal_required, or unknown"
@@ -45,6 +63,13 @@ class ExtractedOutcome(BaseModel):
     )
 
 
+class ExtractedOutcome(_LLMOutcome):
+    """Structured outcome extracted from call transcript."""
+
+    confidence: Optional[float] = None  # 0-1; set by the fast path, None for LLM results
+    source: Optional[str] = None  # "fast_path:<rule|model>" or "llm"
+
+
 EXTRACTION_PROMPT = """You are an expert medical billing analyst. Extract structured information from this insurance claim status call transcript.
 
 The call was made to check on a medical billing claim. Extract the key outcomes and update the claim accordingly.
@@ -60,83 +85,218 @@ If the transcript is empty, very short, or indicates the call was not answered,
 Extract the following in JSON format:"""
 
 
-def _build_rag_context(
+def _rag_queries(
     transcript: str,
     denial_code: Optional[str] = None,
     payer_name: Optional[str] = None,
-) -> str:
-    """Query RAG for denial codes and payer policies; return a string to inject into the prompt."""
-    parts = []
+) -> tuple[str, str]:
+    """(denial code query, payer policy query); either may be empty."""
     query_denial = (denial_code or "").strip() or transcript[:500].strip()
-    if query_denial:
-        denial_snippets = query_denial_codes(query_denial, k=3)
-        if denial_snippets:
-            parts.append(
-                "## Relevant denial code / remedy reference\n"
-                + "\n".join(f"- {s}" for s in denial_snippets)
-            )
     query_payer = transcript[:500].strip() or (payer_name or "").strip()
-    if query_payer:
-        policy_snippets = query_payer_policies(query_payer, payer_name=payer_name, k=3)
-        if policy_snippets:
-            parts.append(
-                "## Relevant payer policy\n"
-                + "\n".join(f"- {s}" for s in policy_snippets)
-            )
+    return query_denial, query_payer
+
+
+def _exact_denial_snippets(denial_code: Optional[str], payer_name: Optional[str]) -> list[str]:
+    """Dictionary hits for the claim's denial code; [] means fall back to vector search."""
+    if not (denial_code or "").strip():
+        return []
+    snippets = lookup_denial_codes(denial_code, payer_name=payer_name, limit=3)
+    incr_counter(DENIAL_LOOKUP_METRIC, "exact" if snippets else "vector")
+    return snippets
+
+
+def _format_rag_context(denial_snippets: list[str], policy_snippets: list[str]) -> str:
+    """Reference context to inject into the prompt ("" when there is none)."""
+    parts = []
+    if denial_snippets:
+        parts.append(
+            "## Relevant denial code / remedy reference\n"
+            + "\n".join(f"- {s}" for s in denial_snippets)
+        )
+    if policy_snippets:
+        parts.append(
+            "## Relevant payer policy\n"
+            + "\n".join(f"- {s}" for s in policy_snippets)
+        )
     if not parts:
         return ""
-    return "\n\n".join(parts) + "\n\n"
+    return (
+        "Use the following reference context to interpret codes and policies mentioned in the call.\n\n"
+        + "\n\n".join(parts)
+        + "\n\n"
+    )
+
+
+def _build_rag_context(
+    transcript: str,
+    denial_code: Optional[str] = None,
+    payer_name: Optional[str] = None,
+    payer_id: Optional[int] = None,
+) -> str:
+    """Query RAG for denial codes and payer policies; return a string to inject into the prompt."""
+    query_denial, query_payer = _rag_queries(transcript, denial_code, payer_name)
+    denial_snippets = _exact_denial_snippets(denial_code, payer_name)
+    if not denial_snippets and query_denial:
+        denial_snippets = query_denial_codes(query_denial, k=3)
+    policy_snippets = query_payer_policies(query_payer, payer_name=payer_name, k=3, payer_id=payer_id) if query_payer else []
+    return _format_rag_context(denial_snippets, policy_snippets)
+
+
+async def _abuild_rag_context(
+    transcript: str,
+    denial_code: Optional[str] = None,
+    payer_name: Optional[str] = None,
+    payer_id: Optional[int] = None,
+) -> str:
+    """Async _build_rag_context: both lookups run concurrently."""
+    query_denial, query_payer = _rag_queries(transcript, denial_code, payer_name)
+
+    async def _resolved(snippets: list[str]) -> list[str]:
+        return snippets
+
+    exact = _exact_denial_snippets(denial_code, payer_name)
+    if exact:
+        denial_lookup = _resolved(exact)
+    else:
+        denial_lookup = aquery_denial_codes(query_denial, k=3) if query_denial else _resolved([])
+    denial_snippets, policy_snippets = await asyncio.gather(
+        denial_lookup,
+        aquery_payer_policies(query_payer, payer_name=payer_name, k=3, payer_id=payer_id) if query_payer else _resolved([]),
+    )
+    return _format_rag_context(denial_snippets, policy_snippets)
+
+
+def _get_llm() -> Any:
+    settings = get_settings()
+    return ChatOpenAI(
+        model=settings.OPENAI_MODEL,
+        api_key=settings.OPENAI_API_KEY,
+        temperature=0,
+    )
+
+
+def _fast_path_or_none(transcript: str, ended_reason: Optional[str]) -> Optional[ExtractedOutcome]:
+    """The fast-path outcome when it is confident enough to skip the LLM; records the routing decision."""
+    settings = get_settings()
+    if not settings.FAST_PATH_ENABLED:
+        return None
+    from .fast_path_classifier import classify_fast_path
+
+    fast = classify_fast_path(transcript or "", ended_reason or "")
+    if fast is not None and (fast.confidence or 0) >= settings.FAST_PATH_MIN_CONFIDENCE:
+        incr_counter(ROUTING_METRIC, fast.source or "fast_path")
+        return fast
+    incr_counter(ROUTING_METRIC, "llm_low_confidence" if fast is not None else "llm_no_opinion")
+    return None
+
+
+def _build_messages(prompt_transcript: str, rag_context: str) -> tuple[list, PydanticOutputParser]:
+    parser = PydanticOutputParser(pydantic_object=_LLMOutcome)
+    messages = [
+        SystemMessage(
+            content="You extract structured data from medical billing call transcripts. "
+            "Respond only with valid JSON matching the schema. "
+            "Be concise and accurate."
+        ),
+        HumanMessage(
+            content=EXTRACTION_PROMPT.format(transcript=prompt_transcript, rag_context=rag_context)
+            + "\n\n"
+            + parser.get_format_instructions()
+        ),
+    ]
+    return messages, parser
+
+
+def _cache_lookup(prompt_transcript: str, rag_context: str) -> tuple[str, Optional[ExtractedOutcome]]:
+    key = cache_key(prompt_transcript, PROMPT_VERSION, get_settings().OPENAI_MODEL, rag_context)
+    cached = get_cached(key)
+    if cached:
+        incr_counter(ROUTING_METRIC, "llm_cached")
+        return key, ExtractedOutcome.model_validate(cached)
+    return key, None
+
+
+def _parse_response(parser: PydanticOutputParser, content: str, key: str) -> ExtractedOutcome:
+    parsed = parser.parse(content)
+    extracted = ExtractedOutcome(**parsed.model_dump(), source="llm")
+    put_cached(key, extracted.model_dump())
+    return extracted
+
+
+def _no_transcript() -> ExtractedOutcome:
+    return ExtractedOutcome(claim_status="unknown", summary="No transcript available", source="llm")
 
 
 def extract_outcome_from_transcript(
     transcript: str,
     denial_code: Optional[str] = None,
     payer_name: Optional[str] = None,
+    ended_reason: Optional[str] = None,
+    payer_id: Optional[int] = None,
 ) -> Optional[ExtractedOutcome]:
     """
-    Use LLM to extract structured outcome from call transcript.
-    Optionally uses RAG (denial_code, payer_name) to inject reference context.
-    Returns None if OPENAI_API_KEY is not configured or extraction fails.
+    Extract structured outcome from call transcript: local fast path first, LLM when it isn't confident.
+    Optionally uses RAG (denial_code, payer_name / payer_id) to inject reference context.
+    Returns None if OPENAI_API_KEY is not configured (and the fast path isn't confident) or extraction fails.
     """
-    settings = get_settings()
-    if not settings.OPENAI_API_KEY:
+    fast = _fast_path_or_none(transcript, ended_reason)
+    if fast is not None:
+        return fast
+    if not get_settings().OPENAI_API_KEY:
         return None
+    if not transcript or not transcript.strip():
+        return _no_transcript()
+
+    # IVR/hold noise stripped, repeats removed, fitted to EXTRACTION_TOKEN_BUDGET with the end of the call kept
+    prepared = prepare_transcript(transcript)
+    incr_counter(TOKENS_METRIC, "raw", prepared.raw_tokens)
+    rag_context = _build_rag_context(
+        prepared.text, denial_code=denial_code, payer_name=payer_name, payer_id=payer_id
+    )
+    key, cached = _cache_lookup(prepared.text, rag_context)
+    if cached is not None:
+        return cached
+
+    try:
+        messages, parser = _build_messages(prepared.text, rag_context)
+        incr_counter(TOKENS_METRIC, "sent", prepared.tokens)
+        response = _get_llm().invoke(messages)
+        return _parse_response(parser, response.content, key)
+    except Exception:
+        incr_counter(ROUTING_METRIC, "llm_failed")
+        return None
+
 
+async def aextract_outcome_from_transcript(
+    transcript: str,
+    denial_code: Optional[str] = None,
+    payer_name: Optional[str] = None,
+    ended_reason: Optional[str] = None,
+    payer_id: Optional[int] = None,
+) -> Optional[ExtractedOutcome]:
+    """Async extract_outcome_from_transcript: RAG lookups run concurrently and the LLM call is awaited."""
+    fast = _fast_path_or_none(transcript, ended_reason)
+    if fast is not None:
+        return fast
+    if not get_settings().OPENAI_API_KEY:
+        return None
     if not transcript or not transcript.strip():
-        return ExtractedOutcome(
-            claim_status="unknown",
-            summary="No transcript available",
-        )
+        return _no_transcript()
 
-    rag_context = _build_rag_context(transcript, denial_code=denial_code, payer_name=payer_name)
-    if rag_context:
-        rag_context = "Use the following reference context to interpret codes and policies mentioned in the call.\n\n" + rag_context
-    else:
-        rag_context = ""
+    prepared = prepare_transcript(transcript)
+    incr_counter(TOKENS_METRIC, "raw", prepared.raw_tokens)
+    rag_context = await _abuild_rag_context(
+        prepared.text, denial_code=denial_code, payer_name=payer_name, payer_id=payer_id
+    )
+    key, cached = _cache_lookup(prepared.text, rag_context)
+    if cached is not None:
+        return cached
 
     try:
-        llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL,
-            api_key=settings.OPENAI_API_KEY,
-            temperature=0,
-        )
-        parser = PydanticOutputParser(pydantic_object=ExtractedOutcome)
-        format_instructions = parser.get_format_instructions()
-
-        messages = [
-            SystemMessage(
-                content="You extract structured data from medical billing call transcripts. "
-                "Respond only with valid JSON matching the schema. "
-                "Be concise and accurate."
-            ),
-            HumanMessage(
-                content=EXTRACTION_PROMPT.format(transcript=transcript[:8000], rag_context=rag_context)
-                + "\n\n"
-                + format_instructions
-            ),
-        ]
-
-        response = llm.invoke(messages)
-        return parser.parse(response.content)
+        messages, parser = _build_messages(prepared.text, rag_context)
+        incr_counter(TOKENS_METRIC, "sent", prepared.tokens)
+        response = await _get_llm().ainvoke(messages)
+        return _parse_response(parser, response.content, key)
     except Exception:
+        incr_counter(ROUTING_METRIC, "llm_failed")
         return None
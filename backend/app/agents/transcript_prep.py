@@ -0,0 +1,164 @@
+"""
+Transcript preparation for outcome extraction.
+Drops IVR prompts and hold loops, removes repeated utterances, and fits the rest into a token budget,
+keeping the end of the call first (where the rep states the outcome), then the opening and any
+middle turns that mention claim details. Omitted stretches are marked so the LLM knows text is missing.
+"""
+
+import re
+from typing import Callable, NamedTuple, Optional
+
+from ..core.config import get_settings
+
+# Share of the budget reserved for the end of the call
+TAIL_SHARE = 0.6
+# Turns kept from the start of the call (rep greeting, name, reference number) when they fit
+HEAD_TURNS = 4
+
+_TURN_RE = re.compile(r"^\s*([A-Za-z][A-Za-z ]{0,20}):\s*(.*)$")
+_IVR_RE = re.compile(
+    r"\bpress\s+(?:\d|one|two|three|four|five|six|seven|eight|nine|zero|star|pound)\b|"
+    r"\bpara\s+espa[nñ]ol\b|\bsay or (?:enter|press)\b|\bmain menu\b|\bmenu options have changed\b|"
+    r"\byour call is (?:very )?important\b|\bplease (?:continue to )?hold\b|\bplease stay on the line\b|"
+    r"\bcalls? (?:may|will) be (?:monitored|recorded)\b|\bestimated (?:hold|wait) time\b|"
+    r"\ball (?:of our )?(?:representatives|agents) are (?:currently )?(?:busy|assisting)\b|"
+    r"\bhold music\b|\bthank you for (?:calling|holding|your patience)\b",
+    re.I,
+)
+# Mentions worth keeping from the middle of a long call (and IVR lines that carry a claim status)
+_SIGNAL_RE = re.compile(
+    r"\bclaim\b|\bpaid\b|\bden(?:ied|ial)\b|\breprocess|\bappeal|\breference\b|\bref(?:erence)?\s*(?:number|#)|"
+    r"\bcheck\b|\beft\b|\$\s?\d|\b(?:CO|PR|OA|PI|CR)[\s-]?\d{1,3}\b|\bcall (?:back|again)\b|\bdays?\b|"
+    r"\bauthori[sz]ation\b|\bresubmit|\bcorrected\b",
+    re.I,
+)
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+
+class Turn(NamedTuple):
+    index: int
+    speaker: str
+    text: str
+
+
+class PreparedTranscript(NamedTuple):
+    text: str
+    raw_tokens: int
+    tokens: int
+
+
+def _token_counter() -> Callable[[str], int]:
+    """tiktoken when available (installed with langchain-openai), else ~4 characters per token."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda s: len(encoding.encode(s))
+    except Exception:
+        return lambda s: (len(s) + 3) // 4
+
+
+_count_tokens: Optional[Callable[[str], int]] = None
+
+
+def count_tokens(text: str) -> int:
+    global _count_tokens
+    if _count_tokens is None:
+        _count_tokens = _token_counter()
+    return _count_tokens(text)
+
+
+def split_turns(transcript: str) -> list[Turn]:
+    """Split "Speaker: text" lines into turns; unlabelled lines continue the previous turn."""
+    turns: list[Turn] = []
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        match = _TURN_RE.match(line)
+        if match:
+            turns.append(Turn(len(turns), match.group(1).strip(), match.group(2).strip()))
+        elif turns:
+            last = turns[-1]
+            turns[-1] = last._replace(text=f"{last.text} {line.strip()}")
+        else:
+            turns.append(Turn(0, "", line.strip()))
+    return turns
+
+
+def _is_ivr_noise(turn: Turn) -> bool:
+    return bool(_IVR_RE.search(turn.text)) and not _SIGNAL_RE.search(_IVR_RE.sub("", turn.text))
+
+
+def clean_turns(turns: list[Turn]) -> list[Turn]:
+    """Drop IVR/hold prompts and repeated utterances (hold loops, repeated menus, echoed questions)."""
+    seen: set[str] = set()
+    kept: list[Turn] = []
+    for turn in turns:
+        if not turn.text or _is_ivr_noise(turn):
+            continue
+        key = _NORMALIZE_RE.sub(" ", turn.text.lower()).strip()
+        # Short acknowledgements ("okay", "thank you") repeat naturally; only dedupe substantive lines
+        if len(key) > 20:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(turn._replace(index=len(kept)))
+    return kept
+
+
+def _render(turn: Turn) -> str:
+    return f"{turn.speaker}: {turn.text}" if turn.speaker else turn.text
+
+
+def _fit(turns: list[Turn], token_budget: int) -> list[Turn]:
+    """Choose turns within the budget: tail first, then head, then signal-bearing middle turns."""
+    cost = {t.index: count_tokens(_render(t)) + 1 for t in turns}
+    if sum(cost.values()) <= token_budget:
+        return turns
+    chosen: set[int] = set()
+    used = 0
+
+    tail_budget = int(token_budget * TAIL_SHARE)
+    last = turns[-1]
+    if cost[last.index] > tail_budget:
+        # One huge final turn (e.g. an unlabelled transcript): keep its end
+        turns = turns[:-1] + [last._replace(text="…" + last.text[-tail_budget * 3:])]
+        cost[last.index] = count_tokens(_render(turns[-1])) + 1
+    for turn in reversed(turns):
+        if used + cost[turn.index] > tail_budget:
+            break
+        chosen.add(turn.index)
+        used += cost[turn.index]
+
+    for turn in turns[:HEAD_TURNS]:
+        if turn.index not in chosen and used + cost[turn.index] <= token_budget:
+            chosen.add(turn.index)
+            used += cost[turn.index]
+
+    # Middle turns that mention claim details, latest first
+    for turn in reversed(turns):
+        if turn.index in chosen or not _SIGNAL_RE.search(turn.text):
+            continue
+        if used + cost[turn.index] <= token_budget:
+            chosen.add(turn.index)
+            used += cost[turn.index]
+
+    return [t for t in turns if t.index in chosen]
+
+
+def prepare_transcript(transcript: str, token_budget: Optional[int] = None) -> PreparedTranscript:
+    """Clean and budget a transcript for the extraction prompt."""
+    transcript = transcript or ""
+    token_budget = token_budget or get_settings().EXTRACTION_TOKEN_BUDGET
+    raw_tokens = count_tokens(transcript)
+    turns = clean_turns(split_turns(transcript))
+    kept = _fit(turns, token_budget)
+
+    lines: list[str] = []
+    previous = -1
+    for turn in kept:
+        if turn.index > previous + 1:
+            lines.append("[… earlier conversation omitted …]" if previous < 0 else "[… omitted …]")
+        lines.append(_render(turn))
+        previous = turn.index
+    text = "\n".join(lines)
+    return PreparedTranscript(text=text, raw_tokens=raw_tokens, tokens=count_tokens(text))
@@ -4,12 +4,14 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..core.dependencies import get_current_user
 from ..models import User, Claim, Payer, Call
-from ..schemas import CallInitiateRequest, CallInitiateResponse, CallResponse
-from ..schemas.queue import QueueBulkRequest, QueueResponse
-from ..services.vapi_service import create_outbound_call
+from ..schemas import CallInitiateRequest, CallInitiateResponse, CallResponse, CallDetailResponse
+from ..schemas.queue import QueueBulkRequest, QueueResponse, QueueEntry, QueueInspectResponse
+from ..services.vapi_service import create_outbound_call, is_provider_error
+from ..services.circuit_breaker import CircuitOpenError, telephony_breaker
 from ..agents.call_context import build_call_system_prompt, build_first_message
-from ..tasks.call_tasks import initiate_call_for_claim
+from ..services.call_priority import enqueue_claims, peek_for_practice, queue_size
 from ..services.audit_service import log as audit_log
+from ..services.transcript_store import load_call_artifacts
 
 router = APIRouter(prefix="/calls", tags=["calls"])
 
@@ -52,6 +54,16 @@ async def initiate_call(
         "first_message": build_first_message(claim, payer),
     }
 
+    try:
+        probe = telephony_breaker.before_call()
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Telephony provider is degraded; try again later or queue the call",
+            headers={"Retry-After": str(round(e.retry_after))},
+        )
+
+    recorded = False
     try:
         result = await create_outbound_call(
             customer_phone=payer.phone,
@@ -62,13 +74,21 @@ async def initiate_call(
                 "practice_id": str(practice_id),
             },
         )
+        telephony_breaker.record_success(probe)
+        recorded = True
     except ValueError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        if is_provider_error(e):
+            telephony_breaker.record_failure(type(e).__name__)
+            recorded = True
         raise HTTPException(
             status_code=502,
             detail=f"Failed to initiate call: {str(e)}",
         )
+    finally:
+        if not recorded:
+            telephony_breaker.release_probe(probe)  # no verdict on the provider; let the next dial probe
 
     external_id = result.get("id") or result.get("callId") or str(result)
     if isinstance(external_id, dict):
@@ -98,7 +118,7 @@ def queue_call(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Queue a claim for background call. Returns immediately."""
+    """Queue a claim for background call. Returns immediately; claims are dialed highest priority first."""
     practice_id = require_practice(current_user)
     claim = (
         db.query(Claim)
@@ -112,8 +132,8 @@ def queue_call(
     payer = db.get(Payer, claim.payer_id)
     if not payer or not payer.phone:
         raise HTTPException(status_code=400, detail="Payer has no phone number")
-    task = initiate_call_for_claim.delay(claim.id)
-    return QueueResponse(queued=1, task_ids=[task.id], message="Claim queued for call")
+    claim_ids = enqueue_claims(db, [claim])
+    return QueueResponse(queued=1, claim_ids=claim_ids, message="Claim queued for call")
 
 
 @router.post("/queue/bulk", response_model=QueueResponse)
@@ -129,19 +149,53 @@ def queue_calls_bulk(
         .filter(Claim.id.in_(data.claim_ids), Claim.practice_id == practice_id)
         .all()
     )
-    task_ids = []
+    callable_claims = []
     for claim in claims:
         if claim.status == "in_progress":
             continue
         payer = db.get(Payer, claim.payer_id)
         if not payer or not payer.phone:
             continue
-        task = initiate_call_for_claim.delay(claim.id)
-        task_ids.append(task.id)
+        callable_claims.append(claim)
+    claim_ids = enqueue_claims(db, callable_claims)
     return QueueResponse(
-        queued=len(task_ids),
-        task_ids=task_ids,
-        message=f"Queued {len(task_ids)} claims for calls",
+        queued=len(claim_ids),
+        claim_ids=claim_ids,
+        message=f"Queued {len(claim_ids)} claims for calls",
+    )
+
+
+@router.get("/queue", response_model=QueueInspectResponse)
+def inspect_queue(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """What will be dialed next for this practice, and why (score and per-factor breakdown)."""
+    practice_id = require_practice(current_user)
+    try:
+        entries = peek_for_practice(practice_id, limit=limit)
+        total = queue_size()
+    except Exception:
+        raise HTTPException(status_code=503, detail="Call queue unavailable")
+    claims = {
+        c.id: c
+        for c in db.query(Claim).filter(
+            Claim.id.in_([e["claim_id"] for e in entries]),
+            Claim.practice_id == practice_id,
+        )
+    } if entries else {}
+    return QueueInspectResponse(
+        total_queued=total,
+        entries=[
+            QueueEntry(
+                **e,
+                claim_number=claims[e["claim_id"]].claim_number,
+                patient_name=claims[e["claim_id"]].patient_name,
+            )
+            for e in entries
+            if e["claim_id"] in claims
+        ],
     )
 
 
@@ -167,7 +221,7 @@ def list_calls(
     return calls
 
 
-@router.get("/{call_id}", response_model=CallResponse)
+@router.get("/{call_id}", response_model=CallDetailResponse)
 def get_call(
     call_id: int,
     current_user: User = Depends(get_current_user),
@@ -182,4 +236,9 @@ def get_call(
     )
     if not call:
         raise HTTPException(status_code=404, detail="Call not found")
-    return call
+    stored = load_call_artifacts(db, call.id)
+    return CallDetailResponse(
+        **CallResponse.model_validate(call).model_dump(),
+        transcript=stored.transcript,
+        artifact=stored.artifact,
+    )
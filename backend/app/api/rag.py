@@ -1,11 +1,19 @@
-"""API for RAG ingestion: denial codes and payer policies."""
+"""API for RAG ingestion: denial codes and payer policies (JSON bodies, or file uploads ingested in the background)."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, UploadFile, status
 from pydantic import BaseModel, Field
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
 
 from ..core.dependencies import get_current_user
-from ..models import User
-from ..services.rag_service import add_denial_codes, add_payer_policies
+from ..database import get_db
+from ..models import Payer, RagIngestJob, RagIngestJobStatus, User
+from ..services.rag_ingest import detect_format, new_upload_path, payer_ids_by_key, run_ingest_job
+from ..services import rag_service
 
 router = APIRouter(prefix="/rag", tags=["rag"])
 
@@ -23,6 +31,7 @@ class DenialCodesIngestRequest(BaseModel):
 
 class PayerPolicyEntry(BaseModel):
     payer_name: str | None = None
+    payer_id: int | None = None  # one of the practice's payers; its id picks the partition
     text: str = ""
 
 
@@ -31,7 +40,36 @@ class PayerPoliciesIngestRequest(BaseModel):
 
 
 class IngestResponse(BaseModel):
-    added: int
+    added: int  # new or changed documents
+    unchanged: int = 0  # already stored with the same text; not re-embedded
+
+
+class IngestJobResponse(BaseModel):
+    id: int
+    kind: str
+    file_format: str
+    filename: str | None = None
+    payer_id: int | None = None
+    payer_name: str | None = None
+    status: str
+    bytes_total: int = 0
+    bytes_read: int = 0
+    records: int = 0
+    documents: int = 0
+    written: int = 0
+    unchanged: int = 0
+    error_count: int = 0
+    errors: list[str] | None = None
+    error: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+UPLOAD_READ_SIZE = 1 << 20  # uploads are copied to disk 1 MiB at a time
 
 
 @router.post("/denial-codes", response_model=IngestResponse)
@@ -39,18 +77,180 @@ def ingest_denial_codes(
     data: DenialCodesIngestRequest,
     current_user: User = Depends(get_current_user),
 ):
-    """Ingest denial code entries into the RAG vector store. Requires OPENAI_API_KEY."""
+    """
+    Upsert denial code entries into the exact-match code index and the RAG vector store
+    (one per code + payer). The code index and BM25 index need no API key; OpenAI vectors need OPENAI_API_KEY.
+    """
     dicts = [e.model_dump() for e in data.entries]
-    added = add_denial_codes(dicts)
-    return IngestResponse(added=added)
+    stats = rag_service.ingest_denial_codes(dicts)
+    return IngestResponse(added=stats.written, unchanged=stats.unchanged)
 
 
 @router.post("/payer-policies", response_model=IngestResponse)
 def ingest_payer_policies(
     data: PayerPoliciesIngestRequest,
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Upsert payer policy text into the payer's partition of the RAG indexes (BM25 always; OpenAI
+    vectors need OPENAI_API_KEY). Entries without a payer apply to every payer. A payer_name that
+    matches one of the practice's payers is filed under that payer's id.
+    """
+    payer_ids = {e.payer_id for e in data.entries if e.payer_id}
+    if payer_ids and not current_user.practice_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Create a practice first")
+    payer_names = {}
+    if current_user.practice_id:
+        payer_names = dict(db.query(Payer.id, Payer.name).filter(Payer.practice_id == current_user.practice_id).all())
+    missing = sorted(payer_ids - set(payer_names))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Payer not found: {missing[0]}")
+    ids_by_key = payer_ids_by_key(payer_names)
+    dicts = []
+    for e in data.entries:
+        payer_id = e.payer_id or ids_by_key.get(rag_service.payer_key(e.payer_name))
+        dicts.append({"payer_name": payer_names.get(payer_id) or e.payer_name, "payer_id": payer_id, "text": e.text})
+    stats = rag_service.ingest_payer_policies(dicts)
+    return IngestResponse(added=stats.written, unchanged=stats.unchanged)
+
+
+async def _create_ingest_job(
+    kind: str,
+    file: UploadFile,
+    current_user: User,
+    db: Session,
+    background_tasks: BackgroundTasks,
+    payer_id: Optional[int] = None,
+    payer_name: Optional[str] = None,
+) -> RagIngestJob:
+    file_format = detect_format(file.filename)
+    if not file_format or (kind == "denial_codes" and file_format == "text"):
+        allowed = "CSV or JSONL" if kind == "denial_codes" else "CSV, JSONL or text (.txt, .md)"
+        raise HTTPException(status_code=400, detail=f"File must be {allowed}")
+    if payer_id:
+        payer = db.query(Payer).filter(Payer.id == payer_id, Payer.practice_id == current_user.practice_id).first()
+        if not payer:
+            raise HTTPException(status_code=404, detail="Payer not found")
+        payer_name = payer.name
+    elif payer_name and current_user.practice_id:
+        payer_names = dict(db.query(Payer.id, Payer.name).filter(Payer.practice_id == current_user.practice_id).all())
+        payer_id = payer_ids_by_key(payer_names).get(rag_service.payer_key(payer_name))
+
+    path = new_upload_path(file_format)
+    size = 0
+    with open(path, "wb") as out:
+        while chunk := await file.read(UPLOAD_READ_SIZE):
+            out.write(chunk)
+            size += len(chunk)
+    job = RagIngestJob(
+        practice_id=current_user.practice_id,
+        user_id=current_user.id,
+        kind=kind,
+        file_format=file_format,
+        filename=(file.filename or "")[:255] or None,
+        file_path=str(path),
+        payer_id=payer_id or None,
+        payer_name=payer_name or None,
+        bytes_total=size,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _start_job(job, background_tasks)
+    return job
+
+
+def _start_job(job: RagIngestJob, background_tasks: BackgroundTasks) -> None:
+    from ..tasks.rag_tasks import enqueue_rag_ingest
+
+    if not enqueue_rag_ingest(job.id):
+        background_tasks.add_task(run_ingest_job, job.id)  # no broker: ingest in this process after responding
+
+
+@router.post("/denial-codes/upload", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_denial_codes(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Ingest denial codes from a CSV or JSONL file in the background (columns / keys: code, description,
+    remedy, payer). Poll GET /rag/jobs/{id} for progress.
+    """
+    return await _create_ingest_job("denial_codes", file, current_user, db, background_tasks)
+
+
+@router.post("/payer-policies/upload", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_payer_policies(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    payer_id: Optional[int] = Query(None),
+    payer_name: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Ingest payer policies in the background: CSV / JSONL rows (text, payer_name or payer_id) or a
+    whole policy manual as .txt / .md. Long text is split into overlapping chunks (RAG_CHUNK_SIZE,
+    RAG_CHUNK_OVERLAP). payer_id / payer_name apply to rows without a payer. Poll GET /rag/jobs/{id}.
+    """
+    return await _create_ingest_job(
+        "payer_policies", file, current_user, db, background_tasks, payer_id=payer_id, payer_name=payer_name
+    )
+
+
+def _visible_jobs(db: Session, current_user: User):
+    """Jobs of the user's practice, or the user's own when they have no practice."""
+    query = db.query(RagIngestJob)
+    if current_user.practice_id:
+        return query.filter(or_(RagIngestJob.practice_id == current_user.practice_id, RagIngestJob.user_id == current_user.id))
+    return query.filter(RagIngestJob.user_id == current_user.id)
+
+
+@router.get("/jobs", response_model=list[IngestJobResponse])
+def list_ingest_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Most recent file ingestion jobs."""
+    return _visible_jobs(db, current_user).order_by(RagIngestJob.id.desc()).limit(limit).all()
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def get_ingest_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Status and progress of a file ingestion job (bytes_read / bytes_total, documents written)."""
+    job = _visible_jobs(db, current_user).filter(RagIngestJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/retry", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def retry_ingest_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
-    """Ingest payer policy text into the RAG vector store. Requires OPENAI_API_KEY."""
-    dicts = [{"payer_name": e.payer_name, "text": e.text} for e in data.entries]
-    added = add_payer_policies(dicts)
-    return IngestResponse(added=added)
+    """Run a failed job again from the start of its upload (kept RAG_UPLOAD_RETENTION_HOURS after the failure)."""
+    job = _visible_jobs(db, current_user).filter(RagIngestJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != RagIngestJobStatus.FAILED:
+        raise HTTPException(status_code=409, detail="Only failed jobs can be retried")
+    if not Path(job.file_path).is_file():
+        raise HTTPException(status_code=410, detail="The upload is no longer available; upload the file again")
+    job.status = RagIngestJobStatus.PENDING
+    job.error = None
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    _start_job(job, background_tasks)
+    return job
@@ -8,7 +8,7 @@ from ..database import get_db
 from ..core.dependencies import get_current_user
 from ..models import User, Claim, ScheduledCall
 from ..schemas.scheduled_call import ScheduledCallCreate, ScheduledCallResponse
-from ..tasks.call_tasks import initiate_call_for_claim
+from ..services.follow_up_queue import schedule_follow_up, cancel_follow_ups
 
 router = APIRouter(prefix="/scheduled-calls", tags=["scheduled-calls"])
 
@@ -28,7 +28,10 @@ def create_scheduled_call(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Schedule a follow-up call for a claim. Call will be queued when call_after is reached (processed by Celery)."""
+    """
+    Schedule a follow-up call for a claim. Call will be queued when call_after is reached (processed by Celery).
+    A claim has at most one pending follow-up: if one exists it is merged (earliest or latest time, per merge_policy).
+    """
     practice_id = require_practice(current_user)
     claim = (
         db.query(Claim)
@@ -46,12 +49,7 @@ def create_scheduled_call(
             status_code=400,
             detail="call_after must be in the future",
         )
-    scheduled = ScheduledCall(
-        claim_id=data.claim_id,
-        call_after=call_after,
-        reason=data.reason,
-    )
-    db.add(scheduled)
+    scheduled = schedule_follow_up(db, data.claim_id, call_after, reason=data.reason, policy=data.merge_policy)
     db.commit()
     db.refresh(scheduled)
     return scheduled
@@ -84,7 +82,7 @@ def cancel_scheduled_call(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Cancel a scheduled call."""
+    """Cancel a scheduled call, and everything else queued for its claim."""
     practice_id = require_practice(current_user)
     scheduled = (
         db.query(ScheduledCall)
@@ -97,6 +95,26 @@ def cancel_scheduled_call(
     )
     if not scheduled:
         raise HTTPException(status_code=404, detail="Scheduled call not found")
-    db.delete(scheduled)
+    cancel_follow_ups(db, scheduled.claim_id)
+    db.commit()
+    return None
+
+
+@router.delete("/claims/{claim_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_claim_follow_ups(
+    claim_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Cancel everything queued for a claim: its pending follow-up and its place in the call queue."""
+    practice_id = require_practice(current_user)
+    claim = (
+        db.query(Claim)
+        .filter(Claim.id == claim_id, Claim.practice_id == practice_id)
+        .first()
+    )
+    if not claim:
+        raise HTTPException(status_code=404, detail="Claim not found")
+    cancel_follow_ups(db, claim_id)
     db.commit()
     return None
@@ -1,6 +1,8 @@
 """Celery application for background tasks."""
 
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu import Queue
 
 from .core.config import get_settings
 
@@ -10,7 +12,12 @@ celery_app = Celery(
     "billingpulse",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=["app.tasks.call_tasks"],
+    include=[
+        "app.tasks.call_tasks",
+        "app.tasks.webhook_tasks",
+        "app.tasks.rag_tasks",
+        "app.tasks.notification_tasks",
+    ],
 )
 
 celery_app.conf.update(
@@ -23,10 +30,43 @@ celery_app.conf.update(
     task_max_retries=3,
     task_acks_late=True,  # Ack after task completes
     worker_prefetch_multiplier=1,  # One task at a time per worker
+    # Dial tasks get their own queue (its length is what the dispatcher tops up); workers consume
+    # both unless started with -Q
+    task_default_queue="celery",
+    task_queues=(Queue("celery"), Queue(settings.CALL_TASK_QUEUE)),
+    task_routes={"app.tasks.call_tasks.initiate_call_for_claim": {"queue": settings.CALL_TASK_QUEUE}},
     beat_schedule={
-        "process-scheduled-calls": {
-            "task": "app.tasks.call_tasks.process_scheduled_calls",
-            "schedule": 60.0,  # every 60 seconds
+        "pump-follow-up-queue": {
+            "task": "app.tasks.call_tasks.pump_follow_up_queue",
+            "schedule": settings.FOLLOW_UP_PUMP_INTERVAL,  # ~1 s precision for due follow-ups
+        },
+        "reconcile-follow-up-queue": {
+            "task": "app.tasks.call_tasks.reconcile_follow_up_queue",
+            "schedule": settings.FOLLOW_UP_RECONCILE_INTERVAL,
+        },
+        "dispatch-call-queue": {
+            "task": "app.tasks.call_tasks.dispatch_call_queue",
+            "schedule": settings.CALL_DISPATCH_INTERVAL,
+        },
+        "sweep-webhook-inbox": {
+            "task": "app.tasks.webhook_tasks.sweep_webhook_inbox",
+            "schedule": settings.WEBHOOK_SWEEP_INTERVAL,
+        },
+        "send-notification-digests": {
+            "task": "app.tasks.notification_tasks.send_notification_digests",
+            "schedule": settings.NOTIFICATION_DIGEST_SWEEP_INTERVAL,
+        },
+        "cleanup-rag-uploads": {
+            "task": "app.tasks.rag_tasks.cleanup_rag_uploads",
+            "schedule": 3600,
         },
     },
 )
+
+
+@worker_process_init.connect
+def _warm_up_worker(**kwargs):
+    """Open the RAG stores in each worker process before its first post-call task."""
+    if settings.RAG_WARM_UP:
+        from .services.rag_service import warm_up_rag
+        warm_up_rag()
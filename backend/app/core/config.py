@@ -36,13 +36,72 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
     ANTHROPIC_API_KEY: str = ""
+    FAST_PATH_ENABLED: bool = True  # try the local outcome classifier before the LLM
+    FAST_PATH_MIN_CONFIDENCE: float = 0.9  # below this the LLM decides
+    FAST_PATH_MODEL_PATH: str = ""  # trained model (scripts/train_fast_path.py); default backend/fast_path_model.json
+    EXTRACTION_TOKEN_BUDGET: int = 1500  # transcript tokens sent to the LLM after IVR/hold stripping
+    WORKFLOW_CHECKPOINT_URL: str = ""  # LangGraph checkpoints: postgresql://… | sqlite:///path | memory; default DATABASE_URL
+    WORKFLOW_RUN_HISTORY: bool = True  # record per-node timings in workflow_node_runs
+    EXTRACTION_CACHE_TTL: int = 60 * 60 * 24 * 30  # seconds to keep LLM extraction results (Redis); 0 = no cache
+    RAG_BACKEND: str = "openai"  # openai | local (BM25 + optional local embeddings, offline) | hybrid (BM25 + OpenAI)
+    RAG_LOCAL_EMBEDDINGS: bool = False  # CPU-only all-MiniLM-L6-v2 (ONNX, via chromadb) for the local/hybrid backends
+    RAG_PERSIST_DIR: str = ""  # Chroma collections and local indexes; default backend/chroma_data
+    RAG_QUERY_CACHE_TTL: int = 600  # seconds to cache RAG query results (Redis) per payer partition + query; 0 = off
+    RAG_EMBED_BATCH_SIZE: int = 500  # texts per embeddings request / Chroma upsert during ingestion
+    RAG_EMBEDDING_CACHE_DIR: str = ""  # on-disk document embedding cache; default chroma_data/embedding_cache
+    RAG_CHUNK_SIZE: int = 1500  # characters per payer policy chunk (file uploads)
+    RAG_CHUNK_OVERLAP: int = 200  # characters shared by consecutive chunks
+    RAG_INGEST_BATCH_SIZE: int = 200  # documents per upsert when ingesting an uploaded file
+    RAG_INDEX_FLUSH_BATCHES: int = 20  # file ingestion rewrites the BM25 / denial code index files every N batches
+    RAG_UPLOAD_DIR: str = ""  # uploaded files awaiting ingestion (shared by API and workers); default chroma_data/ingest_uploads
+    RAG_UPLOAD_RETENTION_HOURS: float = 72  # failed jobs' uploads are kept this long for POST /rag/jobs/{id}/retry
+    RAG_WARM_UP: bool = True  # open the Chroma collections and embeddings client at app / worker startup
 
     # Redis (Phase 4 - Celery broker)
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50  # per process
+    REDIS_POOL_TIMEOUT: float = 5.0  # seconds to wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # PING idle connections older than this before reuse
 
     # Call queue (Phase 4)
     CALL_RATE_LIMIT_PER_PAYER: int = 2  # max calls per payer per window
     CALL_RATE_LIMIT_WINDOW: int = 300  # 5 minutes
+    CALL_DISPATCH_INTERVAL: float = 5.0  # seconds between priority-queue dispatch runs (Celery Beat)
+    CALL_DISPATCH_MAX_IN_FLIGHT: int = 20  # keep at most this many dial tasks waiting in the broker
+    CALL_TASK_QUEUE: str = "calls"  # broker queue for dial tasks only, so its length is the dial backlog
+    FOLLOW_UP_PUMP_INTERVAL: float = 1.0  # seconds between delay-queue pops (Celery Beat)
+    FOLLOW_UP_RECONCILE_INTERVAL: float = 600.0  # rebuild the Redis delay queue from the table
+    FOLLOW_UP_MERGE_POLICY: str = "earliest"  # earliest | latest – one pending follow-up per claim
+    SCHEDULED_CALLS_BATCH_SIZE: int = 200  # due follow-ups claimed per transaction
+    SCHEDULED_CALLS_MAX_BATCHES: int = 50  # per processor run; the next run picks up the rest
+    CALL_RETRY_BASE_DELAY: int = 30  # seconds; doubled per retry, with jitter
+    CALL_RETRY_MAX_DELAY: int = 900
+
+    # Circuit breaker around the telephony provider (state shared via Redis)
+    CALL_BREAKER_ERROR_RATE: float = 0.5  # open when this fraction of recent dials fail
+    CALL_BREAKER_MIN_REQUESTS: int = 5  # ...and at least this many dials were seen in the window
+    CALL_BREAKER_WINDOW: int = 120  # seconds of dial outcomes considered
+    CALL_BREAKER_BASE_COOLDOWN: int = 30  # first open period; doubled on each consecutive trip
+    CALL_BREAKER_MAX_COOLDOWN: int = 900
+    CALL_BREAKER_PROBE_TIMEOUT: int = 60  # how long a half-open probe dial may hold the probe slot
+
+    # Webhook inbox (events are stored and acknowledged; Celery applies them)
+    WEBHOOK_MAX_ATTEMPTS: int = 5  # per event, then it is marked failed
+    WEBHOOK_RETRY_BASE_DELAY: int = 5  # seconds; doubled per retry, with jitter
+    WEBHOOK_RETRY_MAX_DELAY: int = 300
+    WEBHOOK_ORPHAN_GRACE: int = 300  # seconds to wait for the Call row before ignoring an event
+    WEBHOOK_LOCK_TIMEOUT: int = 600  # per-call processing lock; covers a slow post-call workflow
+    WEBHOOK_LOCK_RETRY_DELAY: float = 2.0
+    WEBHOOK_SWEEP_INTERVAL: float = 30.0  # Celery Beat: re-enqueue stuck pending events
+    WEBHOOK_SWEEP_AFTER: float = 120.0  # ...untouched for this many seconds
+    STATUS_BATCH_WINDOW: float = 0.25  # buffer status-update webhooks this long, then one UPDATE; 0 = a worker applies each one
+    STATUS_BATCH_MAX_SIZE: int = 500  # flush early once this many calls are buffered
+
+    # Call transcripts / end-of-call artifacts (compressed, stored off the calls table)
+    TRANSCRIPT_STORE: str = "database"  # database | filesystem
+    TRANSCRIPT_STORE_DIR: str = ""  # filesystem store root; default backend/transcript_data
+    TRANSCRIPT_ZSTD_LEVEL: int = 9
 
     # Email (claimer notifications)
     SMTP_HOST: str = ""
@@ -50,9 +109,15 @@ class Settings(BaseSettings):
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
     SMTP_USE_TLS: bool = True
+    SMTP_POOL_SIZE: int = 2  # authenticated SMTP connections kept open per process
+    SMTP_POOL_MAX_IDLE: int = 60  # seconds an idle connection is reused before reconnecting
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100  # reconnect after this many messages (server limits)
+    SMTP_TIMEOUT: int = 30  # seconds per SMTP connect / command
     MAIL_FROM_EMAIL: str = "noreply@billingpulse.local"
     MAIL_FROM_NAME: str = "BillingPulse"
     USE_MCP_EMAIL: bool = False  # if True, send email via MCP server (spawned subprocess) instead of direct SMTP
+    MCP_EMAIL_TIMEOUT: int = 60  # seconds to wait for the MCP email server to start / answer a send
+    NOTIFICATION_DIGEST_SWEEP_INTERVAL: float = 60.0  # Celery Beat: send due digests (practices with notification_mode=digest)
 
     class Config:
         env_file = ".env"
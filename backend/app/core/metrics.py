@@ -0,0 +1,26 @@
+"""
+Shared counters (Redis hashes) for routing/cache metrics reported by /health/metrics.
+Counting never raises: a Redis outage just loses counts.
+"""
+
+from .redis_client import get_redis
+
+_PREFIX = "metrics:"
+
+
+def incr_counter(name: str, field: str, amount: int = 1) -> None:
+    try:
+        get_redis().hincrby(f"{_PREFIX}{name}", field, amount)
+    except Exception:
+        pass
+
+
+def read_counters(name: str) -> dict[str, int]:
+    try:
+        raw = get_redis().hgetall(f"{_PREFIX}{name}")
+    except Exception:
+        return {}
+    return {
+        (k.decode() if isinstance(k, bytes) else str(k)): int(v)
+        for k, v in sorted(raw.items())
+    }
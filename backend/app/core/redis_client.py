@@ -0,0 +1,142 @@
+"""
+Process-wide Redis access for rate limiting, health checks, queues and caches.
+One blocking connection pool per process with health-checked, keep-alive connections.
+The pool is dropped after fork so Celery prefork children never share a parent's sockets.
+Command latency and pool usage are tracked in-process and reported by /health/metrics.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+import redis
+from redis.client import Pipeline
+
+from .config import get_settings
+
+_lock = threading.Lock()
+_pool: Optional[redis.BlockingConnectionPool] = None
+_client: Optional["InstrumentedRedis"] = None
+_pid: Optional[int] = None
+
+# command name -> [count, errors, total_ms, max_ms]
+_latency: dict[str, list[float]] = {}
+_latency_lock = threading.Lock()
+
+
+def _record(command: str, started: float, failed: bool) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _latency_lock:
+        entry = _latency.setdefault(command, [0, 0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += 1 if failed else 0
+        entry[2] += elapsed_ms
+        entry[3] = max(entry[3], elapsed_ms)
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline that records the round trip of each execute() as a PIPELINE command."""
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = super().execute(raise_on_error)
+            failed = False
+            return result
+        finally:
+            _record("PIPELINE", started, failed)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that records per-command latency."""
+
+    def execute_command(self, *args: Any, **options: Any) -> Any:
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = super().execute_command(*args, **options)
+            failed = False
+            return result
+        finally:
+            _record(str(args[0]).upper() if args else "?", started, failed)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def _reset_after_fork() -> None:
+    """Forget the parent's pool in a forked child; the child builds its own on first use."""
+    global _pool, _client, _pid
+    _pool = None
+    _client = None
+    _pid = None
+    with _latency_lock:
+        _latency.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_redis() -> InstrumentedRedis:
+    """The shared Redis client for this process (created lazily)."""
+    global _pool, _client, _pid
+    if _client is not None and _pid == os.getpid():
+        return _client
+    with _lock:
+        if _client is None or _pid != os.getpid():
+            s = get_settings()
+            _pool = redis.BlockingConnectionPool.from_url(
+                s.REDIS_URL,
+                max_connections=s.REDIS_MAX_CONNECTIONS,
+                timeout=s.REDIS_POOL_TIMEOUT,
+                health_check_interval=s.REDIS_HEALTH_CHECK_INTERVAL,
+                socket_timeout=s.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=s.REDIS_SOCKET_TIMEOUT,
+                socket_keepalive=True,
+                retry_on_timeout=True,
+            )
+            _client = InstrumentedRedis(connection_pool=_pool)
+            _pid = os.getpid()
+    return _client
+
+
+@contextmanager
+def pipeline(transaction: bool = False) -> Iterator[InstrumentedPipeline]:
+    """
+    Batch commands into one round trip. The pipeline is executed when the block exits normally:
+
+        with pipeline() as pipe:
+            pipe.incr(key)
+            pipe.expire(key, 300)
+    """
+    pipe = get_redis().pipeline(transaction=transaction)
+    try:
+        yield pipe
+        pipe.execute()
+    finally:
+        pipe.reset()
+
+
+def redis_stats() -> dict:
+    """Pool usage and per-command latency for this process."""
+    pool_info: dict[str, Any] = {"max_connections": get_settings().REDIS_MAX_CONNECTIONS}
+    pool = _pool
+    if pool is not None and _pid == os.getpid():
+        created = len(getattr(pool, "_connections", []) or [])
+        idle = sum(1 for c in list(getattr(pool, "pool").queue) if c is not None) if hasattr(pool, "pool") else 0
+        pool_info.update({"created": created, "idle": idle, "in_use": created - idle})
+    with _latency_lock:
+        commands = {
+            name: {
+                "count": int(count),
+                "errors": int(errors),
+                "avg_ms": round(total / count, 3) if count else 0.0,
+                "max_ms": round(peak, 3),
+            }
+            for name, (count, errors, total, peak) in sorted(_latency.items())
+        }
+    return {"pid": os.getpid(), "pool": pool_info, "commands": commands}
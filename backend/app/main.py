@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from contextlib import asynccontextmanager
 
@@ -22,8 +23,13 @@ async def lifespan(app: FastAPI):
         except Exception:
             pass
     init_db()
+    if settings.RAG_WARM_UP:
+        from .services.rag_service import warm_up_rag
+        await asyncio.to_thread(warm_up_rag)
     yield
     # Shutdown
+    from .services.status_batcher import get_status_batcher
+    await get_status_batcher().close()
 
 
 app = FastAPI(
@@ -76,7 +82,7 @@ def health():
 
 @app.get("/health/ready")
 def health_ready():
-    """Readiness: DB and Redis connectivity (Phase 7)."""
+    """Readiness: DB and Redis connectivity (Phase 7), plus circuit breaker state."""
     db_ok = True
     try:
         with engine.connect() as conn:
@@ -85,14 +91,48 @@ def health_ready():
         db_ok = False
     redis_ok = True
     try:
-        import redis
-        r = redis.from_url(settings.REDIS_URL)
-        r.ping()
+        from .core.redis_client import get_redis
+        get_redis().ping()
     except Exception:
         redis_ok = False
+    breakers = {}
+    if redis_ok:
+        from .services.circuit_breaker import telephony_breaker
+        try:
+            breakers[telephony_breaker.name] = telephony_breaker.snapshot()
+        except Exception:
+            breakers[telephony_breaker.name] = {"state": "unknown"}
     ready = db_ok and redis_ok
     return {
         "status": "ready" if ready else "degraded",
         "database": "ok" if db_ok else "error",
         "redis": "ok" if redis_ok else "error",
+        "circuit_breakers": breakers,
+    }
+
+
+@app.get("/health/metrics")
+def health_metrics():
+    """Process-level infrastructure metrics (Redis pool usage and command latency) and extraction routing/cache counts, post-call node timings."""
+    from .core.metrics import read_counters
+    from .core.redis_client import redis_stats
+    from .agents.extraction_cache import cache_stats
+    from .agents.outcome_extractor import DENIAL_LOOKUP_METRIC, ROUTING_METRIC, TOKENS_METRIC
+    from .services.rag_service import QUERY_CACHE_METRIC
+    from .services.mcp_email_client import mcp_email_stats
+    from .services.smtp_pool import smtp_stats
+    from .workflows.checkpointing import node_timing_summary
+    from .workflows.post_call_workflow import WORKFLOW_NAME
+    return {
+        "redis": redis_stats(),
+        "extraction": {
+            "routes": read_counters(ROUTING_METRIC),
+            "cache": cache_stats(),
+            "transcript_tokens": read_counters(TOKENS_METRIC),
+            "denial_code_lookups": read_counters(DENIAL_LOOKUP_METRIC),
+            "rag_query_cache": read_counters(QUERY_CACHE_METRIC),
+        },
+        "smtp": smtp_stats(),
+        "mcp_email": mcp_email_stats(),
+        "post_call_nodes_24h": node_timing_summary(WORKFLOW_NAME),
     }
@@ -5,16 +5,24 @@ Expects env: SMTP_HOST, MAIL_FROM_EMAIL, (optional) SMTP_PORT, SMTP_USER, SMTP_P
 Used by the FastAPI app when USE_MCP_EMAIL=true (spawned as subprocess) or by your IDE MCP config.
 """
 
+import functools
 import os
-import smtplib
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 import anyio
+import anyio.to_thread
 from mcp import types
 from mcp.server import Server, ServerRequestContext
 from mcp.server.stdio import stdio_server
 
+from app.services.smtp_pool import SMTPPool
+
+# One pool for the life of the server: SMTP connect/STARTTLS/login happens once, not per tool call
+_pools: dict[tuple, SMTPPool] = {}
+_pools_lock = threading.Lock()  # sends run in worker threads
+
 
 def _smtp_send(
     to_emails: list[str],
@@ -39,21 +47,24 @@ def _smtp_send(
     if body_text:
         msg.attach(MIMEText(body_text, "plain"))
     msg.attach(MIMEText(body_html, "html"))
-    try:
-        if use_tls:
-            with smtplib.SMTP(host, port) as server:
-                server.starttls()
-                if user and password:
-                    server.login(user, password)
-                server.sendmail(from_email, to_emails, msg.as_string())
-        else:
-            with smtplib.SMTP(host, port) as server:
-                if user and password:
-                    server.login(user, password)
-                server.sendmail(from_email, to_emails, msg.as_string())
+    key = (host, port, user, password, use_tls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SMTPPool(
+                host,
+                port,
+                user=user,
+                password=password,
+                use_tls=use_tls,
+                size=int(os.environ.get("SMTP_POOL_SIZE", "2")),
+                max_idle=float(os.environ.get("SMTP_POOL_MAX_IDLE", "60")),
+                max_messages=int(os.environ.get("SMTP_MAX_MESSAGES_PER_CONNECTION", "100")),
+                timeout=float(os.environ.get("SMTP_TIMEOUT", "30")),
+            )
+    if pool.send(from_email, to_emails, msg.as_string()):
         return "ok"
-    except Exception as e:
-        return f"error: {e}"
+    return f"error: {pool.last_error or 'send failed'}"
 
 
 async def handle_list_tools(
@@ -111,7 +122,9 @@ async def handle_call_tool(
     user = os.environ.get("SMTP_USER", "")
     password = os.environ.get("SMTP_PASSWORD", "")
     use_tls = os.environ.get("SMTP_USE_TLS", "true").lower() in ("1", "true", "yes")
-    result = _smtp_send(
+    # Blocking SMTP runs in a worker thread, so concurrent calls use the pool's connections in parallel
+    send = functools.partial(
+        _smtp_send,
         to_emails=receiver,
         subject=subject,
         body_html=body,
@@ -124,6 +137,7 @@ async def handle_call_tool(
         password=password,
         use_tls=use_tls,
     )
+    result = await anyio.to_thread.run_sync(send)
     if result == "ok":
         text = "Email sent successfully."
     else:
@@ -3,8 +3,13 @@ from .user import User, Practice
 from .payer import Payer
 from .claim import Claim
 from .call import Call, CallOutcome
+from .call_artifact import CallArtifact
 from .scheduled_call import ScheduledCall
 from .audit_log import AuditLog
+from .webhook_event import WebhookEvent
+from .workflow_run import WorkflowNodeRun
+from .rag_ingest_job import RagIngestJob, RagIngestJobStatus
+from .call_notification import CallNotification
 
 __all__ = [
     "Base",
@@ -14,6 +19,12 @@ __all__ = [
     "Claim",
     "Call",
     "CallOutcome",
+    "CallArtifact",
     "ScheduledCall",
     "AuditLog",
+    "WebhookEvent",
+    "WorkflowNodeRun",
+    "RagIngestJob",
+    "RagIngestJobStatus",
+    "CallNotification",
 ]
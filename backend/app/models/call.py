@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, Column, Integer, Text, JSON
+from sqlalchemy import String, ForeignKey, Column, Integer, JSON, DateTime
 from sqlalchemy.orm import relationship
 
 from .base import Base, TimestampMixin
@@ -23,8 +23,10 @@ class Call(Base, TimestampMixin):
     status = Column(String(50), default="pending", index=True)
     outcome = Column(String(50))
     duration_seconds = Column(Integer)
-    transcript = Column(Text)
     external_id = Column(String(100), index=True)  # Vapi/Bland call ID
     extracted_data = Column(JSON)  # LLM-extracted outcome (Phase 3)
+    post_call_processed_at = Column(DateTime(timezone=True), nullable=True)  # set once the post-call workflow ran
 
     claim = relationship("Claim", back_populates="calls")
+    # Transcript and raw artifact live in call_artifacts (compressed); read via services.transcript_store
+    artifact = relationship("CallArtifact", back_populates="call", uselist=False, passive_deletes=True)
@@ -0,0 +1,21 @@
+"""Compressed call transcripts and raw end-of-call artifacts, kept off the hot calls table."""
+
+from sqlalchemy import String, ForeignKey, Column, Integer, LargeBinary
+from sqlalchemy.orm import relationship
+
+from .base import Base, TimestampMixin
+
+
+class CallArtifact(Base, TimestampMixin):
+    __tablename__ = "call_artifacts"
+
+    call_id = Column(Integer, ForeignKey("calls.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String(16), nullable=False)  # zstd | zlib
+    backend = Column(String(16), nullable=False)  # database (blobs inline) | filesystem (blobs by sha256 ref)
+    transcript_blob = Column(LargeBinary)
+    transcript_ref = Column(String(64))  # sha256 of the uncompressed transcript (filesystem backend)
+    transcript_size = Column(Integer)  # uncompressed bytes
+    artifact_blob = Column(LargeBinary)  # compressed JSON of Vapi's end-of-call artifact
+    artifact_ref = Column(String(64))
+
+    call = relationship("Call", back_populates="artifact")
@@ -0,0 +1,28 @@
+"""Call outcomes waiting to go out in a practice's notification digest."""
+
+from sqlalchemy import String, Column, Integer, Text, DateTime, ForeignKey, Index
+
+from .base import Base, TimestampMixin
+
+
+class CallNotification(Base, TimestampMixin):
+    __tablename__ = "call_notifications"
+    __table_args__ = (
+        # Digest sweep: pending rows per practice, oldest first
+        Index("ix_call_notifications_practice_sent_id", "practice_id", "sent_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    practice_id = Column(Integer, ForeignKey("practices.id", ondelete="CASCADE"), nullable=False)
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), nullable=False, index=True)
+    call_id = Column(Integer, ForeignKey("calls.id", ondelete="CASCADE"), nullable=True, index=True, unique=True)  # one per call
+    # Snapshot of the outcome when the call finished (what the per-call email would have said)
+    claim_number = Column(String(100))
+    patient_name = Column(String(255))
+    payer_name = Column(String(255))
+    claim_status = Column(String(50))
+    summary = Column(Text)
+    next_steps = Column(Text)
+    denial = Column(String(500))
+    call_duration_seconds = Column(Integer)
+    sent_at = Column(DateTime(timezone=True), nullable=True)  # set when the digest containing it was sent
@@ -0,0 +1,38 @@
+"""Background RAG ingestion of an uploaded CSV / JSONL / text file, with progress."""
+
+from sqlalchemy import String, Column, Integer, Text, JSON, DateTime, ForeignKey
+
+from .base import Base, TimestampMixin
+
+
+class RagIngestJobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class RagIngestJob(Base, TimestampMixin):
+    __tablename__ = "rag_ingest_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    practice_id = Column(Integer, ForeignKey("practices.id", ondelete="CASCADE"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    kind = Column(String(32), nullable=False)  # denial_codes | payer_policies
+    file_format = Column(String(16), nullable=False)  # csv | jsonl | text
+    filename = Column(String(255), nullable=True)
+    file_path = Column(String(500), nullable=False)  # upload on disk; removed when the job is done (kept for retry after a failure)
+    payer_id = Column(Integer, ForeignKey("payers.id", ondelete="SET NULL"), nullable=True)  # default payer for policies
+    payer_name = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default=RagIngestJobStatus.PENDING, index=True)
+    bytes_total = Column(Integer, nullable=False, default=0)
+    bytes_read = Column(Integer, nullable=False, default=0)
+    records = Column(Integer, nullable=False, default=0)  # rows / lines / text chunks read
+    documents = Column(Integer, nullable=False, default=0)  # entries sent to the RAG indexes (after chunking)
+    written = Column(Integer, nullable=False, default=0)
+    unchanged = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True)  # first few row errors
+    error = Column(Text, nullable=True)  # why the job failed
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
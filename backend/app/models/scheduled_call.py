@@ -10,8 +10,8 @@ class ScheduledCall(Base, TimestampMixin):
     __tablename__ = "scheduled_calls"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    claim_id = Column(Integer, ForeignKey("claims.id"), nullable=False)
-    call_after = Column(DateTime(timezone=True), nullable=False)
+    claim_id = Column(Integer, ForeignKey("claims.id"), nullable=False, index=True, unique=True)  # one pending follow-up per claim (migration 007)
+    call_after = Column(DateTime(timezone=True), nullable=False, index=True)  # due-row scans (migration 003)
     reason = Column(String(255), nullable=True)
 
     claim = relationship("Claim", back_populates="scheduled_calls")
@@ -14,6 +14,9 @@ class Practice(Base, TimestampMixin):
     address = Column(String(500))
     phone = Column(String(20))
     notification_email = Column(String(255))  # optional; if set, call notifications go here instead of user emails
+    notification_mode = Column(String(16), default="immediate", nullable=False)  # immediate (email per call) | digest
+    digest_interval_minutes = Column(Integer, default=60, nullable=False)  # digest: send pending outcomes at least this often
+    digest_max_items = Column(Integer, default=100, nullable=False)  # digest: ...or as soon as this many are pending
 
     users = relationship("User", back_populates="practice")
     payers = relationship("Payer", back_populates="practice")
@@ -0,0 +1,32 @@
+"""Inbox of raw provider webhook events, processed asynchronously by Celery."""
+
+from sqlalchemy import String, Column, Integer, Text, JSON, DateTime, Index
+
+from .base import Base, TimestampMixin
+
+
+class WebhookEventStatus:
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"  # gave up after WEBHOOK_MAX_ATTEMPTS
+    IGNORED = "ignored"  # no matching call, or an event type we don't handle
+
+
+class WebhookEvent(Base, TimestampMixin):
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        # Per-call drain in arrival order, and the sweeper's scan for stuck pending events
+        Index("ix_webhook_events_call_status_id", "external_call_id", "status", "id"),
+        Index("ix_webhook_events_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    provider = Column(String(32), nullable=False, default="vapi")
+    event_type = Column(String(64), nullable=False)  # status-update, end-of-call-report, ...
+    external_call_id = Column(String(100), nullable=True)
+    dedupe_key = Column(String(64), nullable=True, index=True, unique=True)  # sha256 of provider event id, else of the body
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default=WebhookEventStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,20 @@
+"""Per-node timing history of workflow runs (e.g. post-call), written outside the workflow's transaction."""
+
+from sqlalchemy import String, Column, Integer, Text, DateTime, Float, ForeignKey
+
+from .base import Base
+
+
+class WorkflowNodeRun(Base):
+    __tablename__ = "workflow_node_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    workflow = Column(String(64), nullable=False)  # post_call
+    thread_id = Column(String(100), nullable=False, index=True)  # checkpoint thread, e.g. post_call:42
+    run_id = Column(String(36), nullable=False, index=True)  # one workflow attempt
+    call_id = Column(Integer, ForeignKey("calls.id", ondelete="CASCADE"), nullable=True, index=True)
+    node = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False)  # ok | error | skipped (output reused from a checkpoint)
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    duration_ms = Column(Float, nullable=False)
+    error = Column(Text, nullable=True)
@@ -2,7 +2,7 @@ from .auth import Token, TokenData, UserCreate, UserLogin, UserResponse
 from .practice import PracticeCreate, PracticeUpdate, PracticeResponse
 from .payer import PayerCreate, PayerUpdate, PayerResponse
 from .claim import ClaimCreate, ClaimUpdate, ClaimResponse, ClaimBulkCreate
-from .call import CallInitiateRequest, CallInitiateResponse, CallResponse
+from .call import CallInitiateRequest, CallInitiateResponse, CallResponse, CallDetailResponse
 from .scheduled_call import ScheduledCallCreate, ScheduledCallResponse
 
 __all__ = [
@@ -24,6 +24,7 @@ __all__ = [
     "CallInitiateRequest",
     "CallInitiateResponse",
     "CallResponse",
+    "CallDetailResponse",
     "ScheduledCallCreate",
     "ScheduledCallResponse",
 ]
@@ -13,7 +13,6 @@ class CallResponse(BaseModel):
     status: str
     outcome: Optional[str] = None
     duration_seconds: Optional[int] = None
-    transcript: Optional[str] = None
     external_id: Optional[str] = None
     extracted_data: Optional[dict] = None
     created_at: Optional[datetime] = None
@@ -22,6 +21,13 @@ class CallResponse(BaseModel):
         from_attributes = True
 
 
+class CallDetailResponse(CallResponse):
+    """Single call with its transcript and raw end-of-call artifact (loaded from the transcript store)."""
+
+    transcript: Optional[str] = None
+    artifact: Optional[dict] = None
+
+
 class CallInitiateResponse(BaseModel):
     call_id: int
     external_id: str
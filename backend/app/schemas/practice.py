@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
 
 
 class PracticeCreate(BaseModel):
@@ -8,6 +10,9 @@ class PracticeCreate(BaseModel):
     address: str | None = None
     phone: str | None = None
     notification_email: str | None = None
+    notification_mode: Literal["immediate", "digest"] = "immediate"
+    digest_interval_minutes: int = Field(60, ge=1, le=7 * 24 * 60)
+    digest_max_items: int = Field(100, ge=1, le=1000)
 
 
 class PracticeUpdate(BaseModel):
@@ -17,6 +22,17 @@ class PracticeUpdate(BaseModel):
     address: str | None = None
     phone: str | None = None
     notification_email: str | None = None
+    notification_mode: Literal["immediate", "digest"] | None = None
+    digest_interval_minutes: int | None = Field(None, ge=1, le=7 * 24 * 60)
+    digest_max_items: int | None = Field(None, ge=1, le=1000)
+
+    @field_validator("name", "notification_mode", "digest_interval_minutes", "digest_max_items")
+    @classmethod
+    def _not_null(cls, value):
+        # Leave these out to keep the current value; null would violate NOT NULL
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
 
 
 class PracticeResponse(BaseModel):
@@ -27,6 +43,9 @@ class PracticeResponse(BaseModel):
     address: str | None
     phone: str | None
     notification_email: str | None
+    notification_mode: str = "immediate"
+    digest_interval_minutes: int = 60
+    digest_max_items: int = 100
 
     class Config:
         from_attributes = True
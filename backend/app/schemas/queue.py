@@ -1,3 +1,5 @@
+from typing import Any, Optional
+
 from pydantic import BaseModel
 
 
@@ -11,5 +13,21 @@ class QueueBulkRequest(BaseModel):
 
 class QueueResponse(BaseModel):
     queued: int
-    task_ids: list[str]
+    task_ids: list[str] = []  # dial tasks are created by the dispatcher, not at queue time
+    claim_ids: list[int] = []
     message: str
+
+
+class QueueEntry(BaseModel):
+    rank: int  # position in the global queue (1 = dialed next)
+    claim_id: int
+    claim_number: Optional[str] = None
+    patient_name: Optional[str] = None
+    score: float
+    factors: dict[str, Any]  # per-factor input value and points
+    queued_at: Optional[str] = None
+
+
+class QueueInspectResponse(BaseModel):
+    total_queued: int  # all practices
+    entries: list[QueueEntry]
@@ -8,6 +8,7 @@ class ScheduledCallCreate(BaseModel):
     claim_id: int
     call_after: datetime
     reason: Optional[str] = None
+    merge_policy: Optional[str] = Field(None, pattern="^(earliest|latest)$")  # default FOLLOW_UP_MERGE_POLICY
 
 
 class ScheduledCallResponse(BaseModel):
@@ -0,0 +1,241 @@
+"""
+Value-weighted priority queue for outbound calls.
+Queued claims live in a Redis sorted set scored by expected value of calling now;
+the dispatcher (Celery Beat) pops the highest scores first and hands them to the call workers.
+"""
+
+import json
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.redis_client import get_redis, pipeline
+from ..models import Call, Claim
+
+QUEUE_KEY = "call_queue:priority"
+REASONS_KEY = "call_queue:priority:reasons"
+CANCELLED_PREFIX = "call_queue:cancelled:"  # claim id → when its queued calls were cancelled
+CANCELLED_TTL = 86400  # longer than a dial task can sit in the broker or retry
+
+# Points per factor (max). Total score is their sum, minus the attempts penalty.
+VALUE_POINTS = 40.0
+VALUE_CEILING = 50_000.0  # claims at or above this amount get full value points
+AGE_POINTS = 20.0
+AGE_CEILING_DAYS = 120  # approaching typical timely-filing limits
+RECENCY_POINTS = 15.0
+RECENCY_CEILING_DAYS = 14
+ATTEMPT_PENALTY = 5.0
+MAX_ATTEMPT_PENALTY = 20.0
+
+# Denial codes: how likely a call moves the claim. Fixable on the phone → high; dead ends → low.
+DENIAL_CODE_POINTS = {
+    "16": 15.0,  # missing/incorrect info – rep can often fix or reprocess
+    "97": 12.0,  # bundled – ask for reprocess with modifier
+    "197": 12.0,  # precert/authorization absent – retro auth
+    "15": 12.0,  # authorization number missing/invalid
+    "4": 10.0,  # modifier inconsistent
+    "11": 10.0,  # diagnosis inconsistent with procedure
+    "50": 8.0,  # not medically necessary – appeal route
+    "18": 3.0,  # duplicate claim
+    "29": 2.0,  # timely filing expired
+}
+DENIAL_GROUP_POINTS = {"CO": 8.0, "OA": 6.0, "PI": 6.0, "CR": 6.0, "PR": 1.0}  # PR = patient responsibility
+DEFAULT_DENIAL_POINTS = 8.0
+NO_DENIAL_POINTS = 5.0
+
+_CODE_RE = re.compile(r"^\s*([A-Z]{2})?\s*-?\s*(\d+)", re.I)
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y/%m/%d", "%m-%d-%Y")
+
+
+def _parse_service_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip()[:10], fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def _as_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _denial_points(denial_code: Optional[str]) -> float:
+    if not denial_code or not denial_code.strip():
+        return NO_DENIAL_POINTS
+    match = _CODE_RE.match(denial_code.upper())
+    if not match:
+        return DEFAULT_DENIAL_POINTS
+    group, number = match.group(1), match.group(2)
+    if group == "PR":
+        return DENIAL_GROUP_POINTS["PR"]
+    if number in DENIAL_CODE_POINTS:
+        return DENIAL_CODE_POINTS[number]
+    return DENIAL_GROUP_POINTS.get(group or "", DEFAULT_DENIAL_POINTS)
+
+
+def score_claim(
+    claim: Claim,
+    last_call_at: Optional[datetime],
+    attempts: int,
+    now: Optional[datetime] = None,
+) -> tuple[float, dict]:
+    """
+    Score a claim for dialing. Higher is dialed sooner.
+    Returns (score, factors) where factors explains each component.
+    """
+    now = now or datetime.now(timezone.utc)
+    amount = float(claim.amount or 0)
+    value = VALUE_POINTS * min(1.0, math.log10(1 + max(0.0, amount)) / math.log10(1 + VALUE_CEILING))
+
+    started = _parse_service_date(claim.date_of_service) or _as_utc(claim.created_at) or now
+    age_days = max(0, (now - started).days)
+    age = AGE_POINTS * min(1.0, age_days / AGE_CEILING_DAYS)
+
+    denial = _denial_points(claim.denial_code)
+
+    last_call_at = _as_utc(last_call_at)
+    if last_call_at is None:
+        days_since_call = None
+        recency = RECENCY_POINTS
+    else:
+        days_since_call = max(0, (now - last_call_at).days)
+        recency = RECENCY_POINTS * min(1.0, days_since_call / RECENCY_CEILING_DAYS)
+
+    penalty = min(MAX_ATTEMPT_PENALTY, ATTEMPT_PENALTY * attempts)
+
+    score = round(value + age + denial + recency - penalty, 2)
+    factors = {
+        "amount": {"value": amount, "points": round(value, 2)},
+        "age_days": {"value": age_days, "points": round(age, 2)},
+        "denial_code": {"value": claim.denial_code, "points": round(denial, 2)},
+        "days_since_last_call": {"value": days_since_call, "points": round(recency, 2)},
+        "attempts": {"value": attempts, "points": -round(penalty, 2)},
+    }
+    return score, factors
+
+
+def _call_stats(db: Session, claim_ids: list[int]) -> dict[int, tuple[Optional[datetime], int]]:
+    """(last call time, number of calls) per claim, in one grouped query."""
+    if not claim_ids:
+        return {}
+    rows = (
+        db.query(Call.claim_id, func.max(Call.created_at), func.count(Call.id))
+        .filter(Call.claim_id.in_(claim_ids))
+        .group_by(Call.claim_id)
+        .all()
+    )
+    return {claim_id: (last_at, count) for claim_id, last_at, count in rows}
+
+
+def enqueue_claims(db: Session, claims: list[Claim]) -> list[int]:
+    """Score and add claims to the priority queue (re-queueing a claim just rescores it). Returns claim ids."""
+    if not claims:
+        return []
+    stats = _call_stats(db, [c.id for c in claims])
+    now = datetime.now(timezone.utc)
+    with pipeline() as pipe:
+        for claim in claims:
+            last_at, attempts = stats.get(claim.id, (None, 0))
+            score, factors = score_claim(claim, last_at, attempts, now=now)
+            pipe.zadd(QUEUE_KEY, {str(claim.id): score})
+            pipe.hset(
+                REASONS_KEY,
+                str(claim.id),
+                json.dumps({"practice_id": claim.practice_id, "factors": factors, "queued_at": now.isoformat()}),
+            )
+    return [c.id for c in claims]
+
+
+def pop_next(count: int) -> list[tuple[int, float]]:
+    """
+    Atomically take the highest-scoring claims off the queue: [(claim_id, score)]. Their reasons
+    are kept until ack(); requeue() puts claims back if they couldn't be handed to a worker.
+    """
+    if count <= 0:
+        return []
+    popped = get_redis().zpopmax(QUEUE_KEY, count)
+    return [(int(m.decode() if isinstance(m, bytes) else m), float(score)) for m, score in popped]
+
+
+def ack(claim_ids: list[int]) -> None:
+    """The popped claims reached the call workers: drop their reasons."""
+    if claim_ids:
+        get_redis().hdel(REASONS_KEY, *[str(i) for i in claim_ids])
+
+
+def requeue(popped: list[tuple[int, float]]) -> None:
+    """Put popped claims back with their scores (a claim re-queued meanwhile keeps its newer score)."""
+    if popped:
+        get_redis().zadd(QUEUE_KEY, {str(claim_id): score for claim_id, score in popped}, nx=True)
+
+
+def remove_claims(claim_ids: list[int]) -> None:
+    """
+    Drop cancelled claims from the queue, and mark them cancelled so a dial task that was
+    already dispatched for them skips the call (see cancelled_since).
+    """
+    if not claim_ids:
+        return
+    members = [str(i) for i in claim_ids]
+    now = datetime.now(timezone.utc).timestamp()
+    with pipeline() as pipe:
+        pipe.zrem(QUEUE_KEY, *members)
+        pipe.hdel(REASONS_KEY, *members)
+        for member in members:
+            pipe.set(f"{CANCELLED_PREFIX}{member}", now, ex=CANCELLED_TTL)
+
+
+def cancelled_since(claim_id: int, queued_at: Optional[float]) -> bool:
+    """True if the claim's calls were cancelled after `queued_at` (epoch seconds). False on Redis errors."""
+    if queued_at is None:
+        return False
+    try:
+        cancelled_at = get_redis().get(f"{CANCELLED_PREFIX}{claim_id}")
+    except Exception:
+        return False
+    return cancelled_at is not None and float(cancelled_at) >= queued_at
+
+
+def queue_size() -> int:
+    return int(get_redis().zcard(QUEUE_KEY))
+
+
+def peek_for_practice(practice_id: int, limit: int = 20, max_scan: int = 5000) -> list[dict[str, Any]]:
+    """
+    The next claims this practice will have dialed, highest score first.
+    Each entry: rank (global, 1-based), claim_id, score, factors.
+    """
+    r = get_redis()
+    entries: list[dict[str, Any]] = []
+    chunk = 200
+    start = 0
+    while len(entries) < limit and start < max_scan:
+        members = r.zrevrange(QUEUE_KEY, start, start + chunk - 1, withscores=True)
+        if not members:
+            break
+        ids = [m.decode() if isinstance(m, bytes) else str(m) for m, _ in members]
+        reasons = r.hmget(REASONS_KEY, ids)
+        for offset, ((_, score), raw) in enumerate(zip(members, reasons)):
+            info = json.loads(raw) if raw else {}
+            if info.get("practice_id") != practice_id:
+                continue
+            entries.append({
+                "rank": start + offset + 1,
+                "claim_id": int(ids[offset]),
+                "score": float(score),
+                "factors": info.get("factors") or {},
+                "queued_at": info.get("queued_at"),
+            })
+            if len(entries) >= limit:
+                break
+        start += chunk
+    return entries
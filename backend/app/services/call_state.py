@@ -0,0 +1,38 @@
+"""
+Call status state machine. Statuses only move forward, so provider events that arrive late or
+are retried (e.g. an in-progress update after end-of-call) can't roll a call back.
+"""
+
+from typing import Optional
+
+# Rank of each status; a transition is applied only if it moves to a higher rank
+STATUS_RANK = {
+    "pending": 0,
+    "initiated": 1,
+    "in_progress": 2,
+    "ended": 3,
+}
+
+# Vapi status-update values → our Call.status
+PROVIDER_STATUS_MAP = {
+    "in-progress": "in_progress",
+    "forwarding": "in_progress",
+    "ended": "ended",
+}
+
+
+def status_rank(status: Optional[str]) -> int:
+    return STATUS_RANK.get(status or "pending", 0)
+
+
+def can_transition(current: Optional[str], new: Optional[str]) -> bool:
+    """True if moving from current to new is forward progress."""
+    return new in STATUS_RANK and status_rank(new) > status_rank(current)
+
+
+def advance_status(call_record, new_status: Optional[str]) -> bool:
+    """Set call_record.status if the move is forward. Returns True if it changed."""
+    if not can_transition(call_record.status, new_status):
+        return False
+    call_record.status = new_status
+    return True
@@ -0,0 +1,259 @@
+"""
+Circuit breaker for outbound dialing.
+State lives in Redis so every API process and Celery worker sees the same breaker:
+closed → open (on error rate over the window) → half_open (one probe dial) → closed or open again.
+Consecutive trips double the open period (capped), with jitter so workers do not retry in lockstep.
+Fails open: if Redis is unreachable, dialing is allowed (same policy as the payer rate limit).
+"""
+
+import json
+import random
+import time
+import uuid
+from typing import Any, Optional
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis, pipeline
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_MAX_TRANSITIONS = 20
+_BUCKETS_PER_WINDOW = 6
+
+# Trip atomically so concurrent failures on several workers count as one trip.
+# KEYS: state, open_until, trips, probe, transitions
+# ARGV: now, base_cooldown, max_cooldown, jitter_factor, reason
+_TRIP_SCRIPT = """
+local state = redis.call('GET', KEYS[1]) or 'closed'
+if state == 'open' then return false end
+local trips = redis.call('INCR', KEYS[3])
+local cooldown = math.min(tonumber(ARGV[3]), tonumber(ARGV[2]) * 2 ^ (trips - 1)) * tonumber(ARGV[4])
+redis.call('SET', KEYS[1], 'open')
+redis.call('SET', KEYS[2], tostring(tonumber(ARGV[1]) + cooldown))
+redis.call('DEL', KEYS[4])
+redis.call('LPUSH', KEYS[5], cjson.encode({at = tonumber(ARGV[1]), from = state, to = 'open', reason = ARGV[5], cooldown = cooldown}))
+redis.call('LTRIM', KEYS[5], 0, %d)
+return tostring(cooldown)
+""" % (_MAX_TRANSITIONS - 1)
+
+# Close from half-open, only for the dial holding the probe (a late success from before the trip must not).
+# KEYS: state, probe, open_until, trips, transitions, outcome buckets...
+# ARGV: token, now
+_CLOSE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= 'half_open' or redis.call('GET', KEYS[2]) ~= ARGV[1] then return 0 end
+redis.call('SET', KEYS[1], 'closed')
+for i = 2, #KEYS do
+  if i ~= 5 then redis.call('DEL', KEYS[i]) end
+end
+redis.call('LPUSH', KEYS[5], cjson.encode({at = tonumber(ARGV[2]), from = 'half_open', to = 'closed', reason = 'probe succeeded'}))
+redis.call('LTRIM', KEYS[5], 0, %d)
+return 1
+""" % (_MAX_TRANSITIONS - 1)
+
+# Release the half-open probe only if this caller still holds it (it may have expired and been retaken).
+# KEYS: probe  ARGV: token
+_RELEASE_PROBE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class CircuitOpenError(Exception):
+    """Raised by CircuitBreaker.before_call when dialing should be held."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = max(1.0, retry_after)
+        super().__init__(f"Circuit '{name}' is open; retry in {self.retry_after:.0f}s")
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with equal jitter: half the delay is fixed, half random."""
+    delay = min(cap, base * (2 ** max(0, attempt)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """Redis-backed circuit breaker shared by all processes that use the same name."""
+
+    def __init__(self, name: str):
+        self.name = name
+        prefix = f"circuit:{name}"
+        self._state_key = f"{prefix}:state"
+        self._open_until_key = f"{prefix}:open_until"
+        self._trips_key = f"{prefix}:trips"
+        self._probe_key = f"{prefix}:probe"
+        self._transitions_key = f"{prefix}:transitions"
+        self._bucket_prefix = f"{prefix}:outcomes"
+
+    # --- window of recent outcomes -------------------------------------------------
+
+    def _bucket_seconds(self) -> int:
+        return max(1, get_settings().CALL_BREAKER_WINDOW // _BUCKETS_PER_WINDOW)
+
+    def _bucket_keys(self, now: float) -> list[str]:
+        size = self._bucket_seconds()
+        current = int(now // size)
+        return [f"{self._bucket_prefix}:{b}" for b in range(current - _BUCKETS_PER_WINDOW + 1, current + 1)]
+
+    def _window_counts(self, r: Any, now: float) -> tuple[int, int]:
+        pipe = r.pipeline()
+        for key in self._bucket_keys(now):
+            pipe.hmget(key, "ok", "err")
+        ok = err = 0
+        for ok_count, err_count in pipe.execute():
+            ok += int(ok_count or 0)
+            err += int(err_count or 0)
+        return ok + err, err
+
+    def _count(self, now: float, field: str) -> None:
+        key = self._bucket_keys(now)[-1]
+        with pipeline() as pipe:
+            pipe.hincrby(key, field, 1)
+            pipe.expire(key, get_settings().CALL_BREAKER_WINDOW + self._bucket_seconds())
+
+    def _push_transition(self, now: float, from_state: str, to_state: str, reason: str) -> None:
+        entry = json.dumps({"at": now, "from": from_state, "to": to_state, "reason": reason})
+        with pipeline() as pipe:
+            pipe.lpush(self._transitions_key, entry)
+            pipe.ltrim(self._transitions_key, 0, _MAX_TRANSITIONS - 1)
+
+    # --- public API ----------------------------------------------------------------
+
+    def before_call(self) -> Optional[str]:
+        """
+        Check whether a dial may go out. Raises CircuitOpenError with a retry_after (seconds)
+        while the breaker is open, or while another worker holds the half-open probe.
+        Returns a probe token when this dial is the half-open probe (None otherwise); if the dial
+        ends without record_success / record_failure, pass it to release_probe.
+        """
+        settings = get_settings()
+        try:
+            r = get_redis()
+            state = (r.get(self._state_key) or b"").decode() or CLOSED
+            if state == CLOSED:
+                return None
+            now = time.time()
+            if state == OPEN:
+                open_until = float(r.get(self._open_until_key) or 0)
+                if now < open_until:
+                    raise CircuitOpenError(self.name, open_until - now)
+            # Cooldown elapsed (or already half-open): let exactly one probe through
+            token = uuid.uuid4().hex
+            if r.set(self._probe_key, token, nx=True, ex=settings.CALL_BREAKER_PROBE_TIMEOUT):
+                if state != HALF_OPEN:
+                    r.set(self._state_key, HALF_OPEN)
+                    self._push_transition(now, state, HALF_OPEN, "cooldown elapsed; probing")
+                return token
+            raise CircuitOpenError(
+                self.name,
+                jittered_backoff(0, settings.CALL_BREAKER_PROBE_TIMEOUT / 2, settings.CALL_BREAKER_PROBE_TIMEOUT),
+            )
+        except CircuitOpenError:
+            raise
+        except Exception:
+            return None  # Allow on Redis error
+
+    def release_probe(self, token: Optional[str]) -> None:
+        """
+        Give up the half-open probe without a verdict (the dial failed before reaching the
+        provider), so the next dial can probe now instead of after CALL_BREAKER_PROBE_TIMEOUT.
+        """
+        if not token:
+            return
+        try:
+            get_redis().eval(_RELEASE_PROBE_SCRIPT, 1, self._probe_key, token)
+        except Exception:
+            pass  # the probe key expires with CALL_BREAKER_PROBE_TIMEOUT
+
+    def record_success(self, probe: Optional[str] = None) -> None:
+        """
+        Record a successful dial. Closes the breaker when it is half-open and this dial holds the
+        probe (the token from before_call); any other success is only counted.
+        """
+        try:
+            now = time.time()
+            self._count(now, "ok")
+            if probe:
+                get_redis().eval(
+                    _CLOSE_SCRIPT,
+                    5 + _BUCKETS_PER_WINDOW,
+                    self._state_key,
+                    self._probe_key,
+                    self._open_until_key,
+                    self._trips_key,
+                    self._transitions_key,
+                    *self._bucket_keys(now),
+                    probe,
+                    now,
+                )
+        except Exception:
+            pass
+
+    def record_failure(self, reason: str = "provider error") -> Optional[float]:
+        """
+        Record a failed dial. Trips the breaker when the window error rate crosses the threshold
+        (or immediately when the half-open probe fails). Returns the new cooldown if it tripped.
+        """
+        settings = get_settings()
+        try:
+            r = get_redis()
+            now = time.time()
+            self._count(now, "err")
+            state = (r.get(self._state_key) or b"").decode() or CLOSED
+            if state == OPEN:
+                return None
+            if state == CLOSED:
+                total, errors = self._window_counts(r, now)
+                if total < settings.CALL_BREAKER_MIN_REQUESTS or errors / total < settings.CALL_BREAKER_ERROR_RATE:
+                    return None
+                reason = f"{reason}; {errors}/{total} dials failed in {settings.CALL_BREAKER_WINDOW}s"
+            cooldown = r.eval(
+                _TRIP_SCRIPT,
+                5,
+                self._state_key,
+                self._open_until_key,
+                self._trips_key,
+                self._probe_key,
+                self._transitions_key,
+                now,
+                settings.CALL_BREAKER_BASE_COOLDOWN,
+                settings.CALL_BREAKER_MAX_COOLDOWN,
+                random.uniform(0.8, 1.2),
+                reason,
+            )
+            return float(cooldown) if cooldown else None
+        except Exception:
+            return None
+
+    def snapshot(self) -> dict:
+        """Current state, window error rate and recent transitions (for readiness/ops)."""
+        r = get_redis()
+        now = time.time()
+        pipe = r.pipeline()
+        pipe.get(self._state_key)
+        pipe.get(self._open_until_key)
+        pipe.get(self._trips_key)
+        pipe.lrange(self._transitions_key, 0, _MAX_TRANSITIONS - 1)
+        state, open_until, trips, transitions = pipe.execute()
+        total, errors = self._window_counts(r, now)
+        state = (state or b"").decode() or CLOSED
+        retry_after = max(0.0, float(open_until) - now) if open_until and state == OPEN else 0.0
+        return {
+            "state": state,
+            "retry_after_seconds": round(retry_after, 1),
+            "consecutive_trips": int(trips or 0),
+            "window": {
+                "seconds": get_settings().CALL_BREAKER_WINDOW,
+                "requests": total,
+                "errors": errors,
+                "error_rate": round(errors / total, 3) if total else 0.0,
+            },
+            "transitions": [json.loads(t) for t in transitions],
+        }
+
+
+# Shared breaker for the telephony provider (Vapi); used by the call queue and direct dials.
+telephony_breaker = CircuitBreaker("telephony")
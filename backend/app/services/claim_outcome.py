@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from ..models import Claim
 from ..agents.outcome_extractor import ExtractedOutcome
+from .follow_up_queue import cancel_follow_ups
 
 
 def apply_extracted_to_claim(
@@ -31,6 +32,8 @@ def apply_extracted_to_claim(
         new_status = "appeal_required"
 
     claim.status = new_status
+    if new_status == "resolved":
+        cancel_follow_ups(db, claim_id)
     if extracted.denial_reason:
         claim.denial_reason = extracted.denial_reason
     if extracted.denial_code:
@@ -50,5 +53,6 @@ def apply_ended_reason_to_claim(db: Session, claim_id: int, outcome: str) -> Non
         return
     if outcome in ("resolved", "reprocess_requested"):
         claim.status = "resolved"
+        cancel_follow_ups(db, claim_id)
     elif outcome == "no_answer":
         claim.status = "pending"
@@ -0,0 +1,203 @@
+"""
+Exact-match denial code dictionary, checked before vector search.
+Built from ingested denial code entries and persisted next to the Chroma collections
+(chroma_data/denial_code_index.json), so "CO-16", "co16", "CO 016" or a bare "16" resolve to their
+description/remedy with a dict lookup instead of an embedding request + ANN query. RARC remark codes
+(N290, MA130, M15) are indexed the same way. Free-text queries still go to the vector store.
+"""
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+INDEX_FILENAME = "denial_code_index.json"
+INDEX_VERSION = 1
+
+# CARC group codes (CO-16); RARC remark codes (N290, MA130, M15)
+GROUP_CODES = ("CO", "PR", "OA", "PI", "CR")
+_RARC_RE = re.compile(r"^(MA|N|M)0*(\d{1,3})$")
+_CARC_RE = re.compile(r"^(?:(CO|PR|OA|PI|CR))?([A-Z]?)0*(\d{1,3})$")
+_CODE_IN_TEXT_RE = re.compile(r"\b(?:(?:CO|PR|OA|PI|CR)[\s_-]*[A-Z]?\d{1,3}|(?:MA|[NM])[\s_-]*\d{1,3})\b", re.I)
+# A bare reason ("16", "A1") is only a code when it is the whole field; inside text it's a date or amount
+_BARE_REASON_RE = re.compile(r"^\s*[A-Z]?\d{1,3}\s*$", re.I)
+
+
+def normalize_code(raw: str) -> Optional[str]:
+    """Canonical form: "CO-16", bare reason "16" / "A1", or RARC "N290". None if it isn't a code."""
+    compact = re.sub(r"[\s_\-.]+", "", (raw or "").upper())
+    if not compact:
+        return None
+    match = _RARC_RE.match(compact)
+    if match:
+        return f"{match.group(1)}{int(match.group(2))}"
+    match = _CARC_RE.match(compact)
+    if match:
+        group, letter, number = match.groups()
+        reason = f"{letter}{int(number)}"
+        return f"{group}-{reason}" if group else reason
+    return None
+
+
+def parse_codes(text: str) -> list[str]:
+    """All codes in a denial code field such as "CO-16 / N290", normalized, in order, without repeats."""
+    if _BARE_REASON_RE.match(text or ""):
+        code = normalize_code(text)
+        return [code] if code else []
+    codes: list[str] = []
+    for token in _CODE_IN_TEXT_RE.findall(text or ""):
+        code = normalize_code(token)
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def _bare_reason(code: str) -> str:
+    """"CO-16" -> "16" (the CARC reason without its group); other codes unchanged."""
+    return code.split("-", 1)[1] if "-" in code else code
+
+
+def format_entry(entry: dict) -> str:
+    """Same text as the vector store document, so the prompt looks the same either way."""
+    return (
+        f"Code: {entry.get('code', '')}. Description: {entry.get('description', '')}. "
+        f"Remedy: {entry.get('remedy', '')}. Payer: {entry.get('payer', '')}"
+    ).strip()
+
+
+class DenialCodeIndex:
+    """code -> entries; each entry is {code, description, remedy, payer}, one per (code, payer)."""
+
+    def __init__(self, entries: Optional[dict[str, dict[str, dict]]] = None):
+        self._entries: dict[str, dict[str, dict]] = entries or {}
+
+    def __len__(self) -> int:
+        return sum(len(by_payer) for by_payer in self._entries.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def add(self, entries: list[dict]) -> int:
+        """Add or replace entries (same code + payer). Returns how many were indexed."""
+        added = 0
+        for e in entries:
+            code = normalize_code(e.get("code") or e.get("denial_code") or "")
+            if not code:
+                continue
+            payer = (e.get("payer") or "").strip()
+            entry = {
+                "code": code,
+                "description": (e.get("description") or e.get("reason") or "").strip(),
+                "remedy": (e.get("remedy") or "").strip(),
+                "payer": payer,
+            }
+            self._entries.setdefault(code, {})[payer.lower()] = entry
+            added += 1
+        return added
+
+    def _for_code(self, code: str, payer_key: str) -> list[dict]:
+        """The payer's own entry first, then the generic one; other payers' entries don't apply."""
+        by_payer = self._entries.get(code) or {}
+        found = []
+        if payer_key and payer_key in by_payer:
+            found.append(by_payer[payer_key])
+        if "" in by_payer:
+            found.append(by_payer[""])
+        if not found and not payer_key:
+            found = list(by_payer.values())
+        return found
+
+    def _any_group(self, reason: str, payer_key: str) -> list[dict]:
+        found: list[dict] = []
+        for group in GROUP_CODES:
+            found.extend(self._for_code(f"{group}-{reason}", payer_key))
+        return found
+
+    def lookup(self, code: str, payer: Optional[str] = None) -> list[dict]:
+        """
+        Entries for one code. "CO-16" falls back to reason 16 under another group; a bare "16"
+        matches every group's entry for that reason.
+        """
+        normalized = normalize_code(code)
+        if not normalized:
+            return []
+        payer_key = (payer or "").strip().lower()
+        found = self._for_code(normalized, payer_key)
+        if found or _RARC_RE.match(normalized):
+            return found
+        reason = _bare_reason(normalized)
+        if reason != normalized:
+            return self._for_code(reason, payer_key) or self._any_group(reason, payer_key)
+        return self._any_group(reason, payer_key)
+
+    def to_dict(self) -> dict:
+        return {"version": INDEX_VERSION, "entries": self._entries}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DenialCodeIndex":
+        if data.get("version") != INDEX_VERSION:
+            return cls()
+        return cls(data.get("entries") or {})
+
+
+_lock = threading.Lock()
+# path -> (mtime, index); reloaded when another process (API ingest) rewrites the file
+_loaded: dict[str, tuple[float, DenialCodeIndex]] = {}
+
+
+def _index_path() -> Path:
+    from .rag_service import chroma_persist_dir
+    return chroma_persist_dir() / INDEX_FILENAME
+
+
+def get_denial_code_index() -> DenialCodeIndex:
+    """The persisted index (empty until denial codes are ingested)."""
+    path = _index_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return DenialCodeIndex()
+    cached = _loaded.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        cached = _loaded.get(str(path))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = _read_index(path)
+        _loaded[str(path)] = (mtime, index)
+        return index
+
+
+def _read_index(path: Path) -> DenialCodeIndex:
+    try:
+        return DenialCodeIndex.from_dict(json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return DenialCodeIndex()
+
+
+def _add_entries(index: DenialCodeIndex, entries: list[dict]) -> tuple[int, bool]:
+    added = index.add(entries)
+    return added, added > 0
+
+
+def update_denial_code_index(entries: list[dict]) -> int:
+    """Merge entries into the persisted index (see rag_local.update_index_file). Returns how many were indexed."""
+    from .rag_local import update_index_file
+
+    return update_index_file(_index_path(), _read_index, _add_entries, entries)
+
+
+def lookup_denial_codes(denial_code: str, payer_name: Optional[str] = None, limit: int = 3) -> list[str]:
+    """Snippets for every code in a denial code field ("CO-16, N290"); [] when none are indexed."""
+    index = get_denial_code_index()
+    if not index:
+        return []
+    snippets: list[str] = []
+    for code in parse_codes(denial_code):
+        for entry in index.lookup(code, payer_name):
+            text = format_entry(entry)
+            if text not in snippets:
+                snippets.append(text)
+    return snippets[:limit]
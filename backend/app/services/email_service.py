@@ -1,14 +1,15 @@
 """
 Email service for notifying claimers (practice) after a call.
-Uses direct SMTP by default, or MCP (send_email tool via subprocess) when USE_MCP_EMAIL=true.
+Uses pooled SMTP connections by default (smtp_pool), or MCP (send_email tool via subprocess) when USE_MCP_EMAIL=true.
 """
 
-import smtplib
+import asyncio
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Any, Optional
 
 from ..core.config import get_settings
+from .smtp_pool import get_smtp_pool
 
 
 def is_email_configured() -> bool:
@@ -17,13 +18,12 @@ def is_email_configured() -> bool:
     return bool(s.SMTP_HOST and s.MAIL_FROM_EMAIL)
 
 
-def _send_email_smtp(
+def _build_message(
     to_emails: list[str],
     subject: str,
     body_html: str,
     body_text: Optional[str] = None,
-) -> bool:
-    """Send via direct SMTP (original implementation)."""
+) -> str:
     settings = get_settings()
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
@@ -32,21 +32,28 @@ def _send_email_smtp(
     if body_text:
         msg.attach(MIMEText(body_text, "plain"))
     msg.attach(MIMEText(body_html, "html"))
+    return msg.as_string()
+
+
+def _send_emails_smtp(messages: list[tuple[list[str], str, str, Optional[str]]]) -> list[bool]:
+    """Send over one pooled, already-authenticated SMTP connection."""
+    from_email = get_settings().MAIL_FROM_EMAIL
     try:
-        if settings.SMTP_USE_TLS:
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                server.starttls()
-                if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                    server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                server.sendmail(settings.MAIL_FROM_EMAIL, to_emails, msg.as_string())
-        else:
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                    server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                server.sendmail(settings.MAIL_FROM_EMAIL, to_emails, msg.as_string())
-        return True
+        return get_smtp_pool().send_many([
+            (from_email, to_emails, _build_message(to_emails, subject, body_html, body_text))
+            for to_emails, subject, body_html, body_text in messages
+        ])
     except Exception:
-        return False
+        return [False] * len(messages)
+
+
+def _send_email_smtp(
+    to_emails: list[str],
+    subject: str,
+    body_html: str,
+    body_text: Optional[str] = None,
+) -> bool:
+    return _send_emails_smtp([(to_emails, subject, body_html, body_text)])[0]
 
 
 def send_email(
@@ -67,6 +74,25 @@ def send_email(
     return _send_email_smtp(to_emails, subject, body_html, body_text)
 
 
+def send_emails(messages: list[tuple[list[str], str, str, Optional[str]]]) -> list[bool]:
+    """
+    Send several emails, each (to_emails, subject, body_html, body_text), as one batch: over a single
+    pooled SMTP connection, or one MCP call each. Returns one bool per message.
+    """
+    if not is_email_configured():
+        return [False] * len(messages)
+    sendable = [i for i, m in enumerate(messages) if m[0]]
+    results = [False] * len(messages)
+    if get_settings().USE_MCP_EMAIL:
+        from .mcp_email_client import send_email_via_mcp
+        sent = [send_email_via_mcp(*messages[i]) for i in sendable]
+    else:
+        sent = _send_emails_smtp([messages[i] for i in sendable]) if sendable else []
+    for i, ok in zip(sendable, sent):
+        results[i] = ok
+    return results
+
+
 def _get_practice_notification_emails(db: Any, practice_id: int) -> list[str]:
     """Return list of emails to notify for this practice: notification_email if set, else active users."""
     from ..models import Practice, User
@@ -130,33 +156,74 @@ def build_claim_call_notification_content(
     return subject, body_html
 
 
-def send_claim_call_notification(
+def _prepare_claim_call_notification(
     db: Any,
     claim_id: int,
     payer_name: str,
     extracted: Optional[dict] = None,
     call_duration_seconds: Optional[int] = None,
-) -> bool:
-    """
-    Send email to the claim's practice (claimer) with the call outcome.
-    Returns True if at least one email was sent. Also updates claim.claimer_notified_at when sent.
-    """
+) -> Optional[tuple[Any, list[str], str, str, str]]:
+    """(claim, to_emails, subject, body_html, body_text), or None if there is nobody to notify."""
     from ..models import Claim
     claim = db.get(Claim, claim_id)
     if not claim:
-        return False
+        return None
     practice_id = getattr(claim, "practice_id", None)
     if not practice_id:
-        return False
+        return None
     to_emails = _get_practice_notification_emails(db, practice_id)
     if not to_emails:
-        return False
+        return None
     subject, body_html = build_claim_call_notification_content(
         claim, payer_name, extracted=extracted, call_duration_seconds=call_duration_seconds
     )
     body_text = subject + "\n\n" + ((extracted or {}).get("summary") or "") if extracted else subject
-    ok = send_email(to_emails, subject, body_html, body_text=body_text)
-    if ok and hasattr(claim, "claimer_notified_at"):
+    return claim, to_emails, subject, body_html, body_text
+
+
+def _mark_claimer_notified(claim: Any) -> None:
+    if hasattr(claim, "claimer_notified_at"):
         from datetime import datetime, timezone
         claim.claimer_notified_at = datetime.now(timezone.utc)
+
+
+def send_claim_call_notification(
+    db: Any,
+    claim_id: int,
+    payer_name: str,
+    extracted: Optional[dict] = None,
+    call_duration_seconds: Optional[int] = None,
+) -> bool:
+    """
+    Send email to the claim's practice (claimer) with the call outcome.
+    Returns True if at least one email was sent. Also updates claim.claimer_notified_at when sent.
+    """
+    prepared = _prepare_claim_call_notification(db, claim_id, payer_name, extracted, call_duration_seconds)
+    if not prepared:
+        return False
+    claim, to_emails, subject, body_html, body_text = prepared
+    ok = send_email(to_emails, subject, body_html, body_text=body_text)
+    if ok:
+        _mark_claimer_notified(claim)
+    return ok
+
+
+async def asend_claim_call_notification(
+    db: Any,
+    claim_id: int,
+    payer_name: str,
+    extracted: Optional[dict] = None,
+    call_duration_seconds: Optional[int] = None,
+) -> bool:
+    """
+    Async send_claim_call_notification. DB reads/writes stay on the caller's thread (the session isn't
+    thread-safe); only the blocking SMTP/MCP send runs in a worker thread.
+    """
+    prepared = _prepare_claim_call_notification(db, claim_id, payer_name, extracted, call_duration_seconds)
+    if not prepared:
+        return False
+    claim, to_emails, subject, body_html, body_text = prepared
+    ok = await asyncio.to_thread(send_email, to_emails, subject, body_html, body_text)
+    if ok:
+        _mark_claimer_notified(claim)
     return ok
@@ -0,0 +1,204 @@
+"""
+Delayed-job engine for follow-up calls.
+The scheduled_calls table is the durable record; a Redis sorted set (member = scheduled_call id,
+score = call_after epoch) is the index the pump polls every second. Due ids are popped atomically,
+so the cost per tick is O(log n) instead of a table scan. Redis is only updated after the row
+commits (session after_commit hook); reconcile() rebuilds the set from the table after a Redis restart.
+
+A claim has at most one pending follow-up (unique scheduled_calls.claim_id). New requests merge into
+the pending one per FOLLOW_UP_MERGE_POLICY: "earliest" keeps the sooner time, "latest" the later one.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import case, event
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis, pipeline
+from ..models import ScheduledCall
+
+MERGE_POLICIES = ("earliest", "latest")
+
+DELAY_KEY = "scheduled_calls:due"
+BUILT_KEY = "scheduled_calls:due:built"  # absent after a Redis restart/flush → reconcile
+_REBUILD_LOCK_KEY = "scheduled_calls:due:rebuilding"
+_PENDING_ADD_KEY = "follow_up_queue_add"
+_PENDING_REMOVE_KEY = "follow_up_queue_remove"
+_PENDING_CANCELLED_CLAIMS_KEY = "follow_up_queue_cancelled_claims"
+
+# Pop up to ARGV[2] members with score <= ARGV[1], atomically (no two pumps get the same id)
+_POP_DUE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #ids > 0 then redis.call('ZREM', KEYS[1], unpack(ids)) end
+return ids
+"""
+
+
+def _score(call_after: datetime) -> float:
+    if call_after.tzinfo is None:
+        call_after = call_after.replace(tzinfo=timezone.utc)
+    return call_after.timestamp()
+
+
+def add(entries: dict[int, datetime]) -> None:
+    """Index scheduled calls (id → call_after). Re-adding an id just moves it."""
+    if not entries:
+        return
+    with pipeline() as pipe:
+        pipe.zadd(DELAY_KEY, {str(sc_id): _score(call_after) for sc_id, call_after in entries.items()})
+
+
+def remove(scheduled_call_ids: list[int]) -> None:
+    if scheduled_call_ids:
+        get_redis().zrem(DELAY_KEY, *[str(i) for i in scheduled_call_ids])
+
+
+def pop_due(limit: int, now: Optional[datetime] = None) -> list[int]:
+    """Atomically take up to `limit` ids whose call_after has passed."""
+    now = now or datetime.now(timezone.utc)
+    ids = get_redis().eval(_POP_DUE_SCRIPT, 1, DELAY_KEY, now.timestamp(), limit)
+    return [int(i) for i in ids]
+
+
+def requeue_now(scheduled_call_ids: list[int]) -> None:
+    """Put popped ids back as due immediately (e.g. processing failed)."""
+    add({i: datetime.now(timezone.utc) for i in scheduled_call_ids})
+
+
+def needs_rebuild() -> bool:
+    """True (for one caller at a time) when the index is missing, e.g. after a Redis restart."""
+    r = get_redis()
+    if r.exists(BUILT_KEY):
+        return False
+    return bool(r.set(_REBUILD_LOCK_KEY, "1", nx=True, ex=120))
+
+
+def reconcile(db: Session, batch_size: int = 1000) -> dict:
+    """
+    Make the sorted set match the scheduled_calls table: add/rescore every row, drop members
+    whose row is gone. Additive, so follow-ups scheduled while it runs are never lost.
+    """
+    added = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(ScheduledCall.id, ScheduledCall.call_after)
+            .filter(ScheduledCall.id > last_id)
+            .order_by(ScheduledCall.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        add({sc_id: call_after for sc_id, call_after in rows})
+        added += len(rows)
+        last_id = rows[-1][0]
+
+    removed = 0
+    r = get_redis()
+    cursor = 0
+    while True:
+        cursor, members = r.zscan(DELAY_KEY, cursor=cursor, count=batch_size)
+        ids = [int(m) for m, _ in members]
+        if ids:
+            existing = {i for (i,) in db.query(ScheduledCall.id).filter(ScheduledCall.id.in_(ids))}
+            stale = [i for i in ids if i not in existing]
+            if stale:
+                remove(stale)
+                removed += len(stale)
+        if cursor == 0:
+            break
+    r.set(BUILT_KEY, datetime.now(timezone.utc).isoformat())
+    return {"indexed": added, "removed": removed}
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending_follow_ups(session: Session) -> None:
+    to_add = session.info.pop(_PENDING_ADD_KEY, None)
+    to_remove = session.info.pop(_PENDING_REMOVE_KEY, None)
+    cancelled_claims = session.info.pop(_PENDING_CANCELLED_CLAIMS_KEY, None)
+    try:
+        if to_remove:
+            remove(sorted(to_remove))
+        if to_add:
+            add(to_add)
+        if cancelled_claims:
+            from .call_priority import remove_claims
+            remove_claims(sorted(cancelled_claims))
+    except Exception:
+        pass  # reconcile() brings the index back in line with the table
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_follow_ups(session: Session) -> None:
+    for key in (_PENDING_ADD_KEY, _PENDING_REMOVE_KEY, _PENDING_CANCELLED_CLAIMS_KEY):
+        session.info.pop(key, None)
+
+
+def _upsert(db: Session, values: dict, policy: str):
+    """INSERT ... ON CONFLICT (claim_id) DO UPDATE, merging call_after/reason per policy."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    stmt = insert(ScheduledCall.__table__).values(**values)
+    existing = ScheduledCall.__table__.c
+    if policy == "latest":
+        take_new = stmt.excluded.call_after > existing.call_after
+    else:
+        take_new = stmt.excluded.call_after < existing.call_after
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["claim_id"],
+        set_={
+            "call_after": case((take_new, stmt.excluded.call_after), else_=existing.call_after),
+            "reason": case((take_new, stmt.excluded.reason), else_=existing.reason),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(existing.id)
+    return db.execute(stmt).scalar_one()
+
+
+def schedule_follow_up(
+    db: Session,
+    claim_id: int,
+    call_after: datetime,
+    reason: Optional[str] = None,
+    policy: Optional[str] = None,
+) -> ScheduledCall:
+    """
+    Schedule a follow-up call for a claim, merging into its pending follow-up if there is one
+    (policy: "earliest" | "latest"; default FOLLOW_UP_MERGE_POLICY). Atomic under concurrency.
+    Caller should commit; the Redis index is updated on commit.
+    """
+    policy = (policy or get_settings().FOLLOW_UP_MERGE_POLICY).lower()
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Unknown follow-up merge policy: {policy}")
+    if call_after.tzinfo is None:
+        call_after = call_after.replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    scheduled_id = _upsert(
+        db,
+        {"claim_id": claim_id, "call_after": call_after, "reason": reason, "created_at": now, "updated_at": now},
+        policy,
+    )
+    scheduled = db.query(ScheduledCall).populate_existing().filter(ScheduledCall.id == scheduled_id).one()
+    db.info.setdefault(_PENDING_ADD_KEY, {})[scheduled.id] = scheduled.call_after
+    return scheduled
+
+
+def cancel_follow_ups(db: Session, claim_id: int) -> int:
+    """
+    Cancel everything queued for a claim: its pending follow-up row, its delay-queue entry and
+    its place in the priority call queue. Caller should commit. Returns rows deleted.
+    """
+    ids = [i for (i,) in db.query(ScheduledCall.id).filter(ScheduledCall.claim_id == claim_id)]
+    if ids:
+        db.query(ScheduledCall).filter(ScheduledCall.id.in_(ids)).delete(synchronize_session="fetch")
+        db.info.setdefault(_PENDING_REMOVE_KEY, set()).update(ids)
+        pending_add = db.info.get(_PENDING_ADD_KEY) or {}
+        for i in ids:
+            pending_add.pop(i, None)
+    db.info.setdefault(_PENDING_CANCELLED_CLAIMS_KEY, set()).add(claim_id)
+    return len(ids)
@@ -1,26 +1,26 @@
 """
-MCP client that spawns the email MCP server and calls send_email.
+MCP client for the email MCP server's send_email tool.
 Used by email_service when USE_MCP_EMAIL=true.
+
+The server (python -m app.mcp_email_server) is started once per process and kept running: a
+background thread with its own event loop owns the stdio session, every send reuses it (concurrent
+callers share it), and the server is restarted with backoff when it exits or stops answering.
+A send is only retried when its request never reached the server; after a timeout or a break
+mid-request the server may already have sent the email, so it is reported as failed instead.
 """
 
 import asyncio
+import atexit
 import os
 import sys
-from pathlib import Path
+import threading
+from typing import Any, Optional
 
 from ..core.config import get_settings
+from .circuit_breaker import jittered_backoff
 
 
-async def _send_email_via_mcp(
-    to_emails: list[str],
-    subject: str,
-    body_html: str,
-    body_text: str | None,
-) -> bool:
-    """Call the MCP email server's send_email tool. Returns True if sent successfully."""
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-
+def _server_env() -> dict[str, str]:
     settings = get_settings()
     env = os.environ.copy()
     env["SMTP_HOST"] = settings.SMTP_HOST or ""
@@ -30,33 +30,190 @@ async def _send_email_via_mcp(
     env["SMTP_USE_TLS"] = "true" if settings.SMTP_USE_TLS else "false"
     env["MAIL_FROM_EMAIL"] = settings.MAIL_FROM_EMAIL or ""
     env["MAIL_FROM_NAME"] = settings.MAIL_FROM_NAME or "BillingPulse"
+    env["SMTP_POOL_SIZE"] = str(settings.SMTP_POOL_SIZE)
+    env["SMTP_POOL_MAX_IDLE"] = str(settings.SMTP_POOL_MAX_IDLE)
+    env["SMTP_MAX_MESSAGES_PER_CONNECTION"] = str(settings.SMTP_MAX_MESSAGES_PER_CONNECTION)
+    env["SMTP_TIMEOUT"] = str(settings.SMTP_TIMEOUT)
+    return env
 
-    # Run the MCP server as a subprocess (same Python, app package)
-    server_params = StdioServerParameters(
-        command=sys.executable,
-        args=["-m", "app.mcp_email_server"],
-        env=env,
-    )
+
+def _unsent_errors() -> tuple:
+    """Errors from writing the request to a closed/broken stdio stream: the server never saw it."""
     try:
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as session:
-                await session.initialize()
-                result = await session.call_tool(
-                    "send_email",
-                    arguments={
-                        "receiver": to_emails,
-                        "subject": subject,
-                        "body": body_html,
-                        "body_text": body_text,
-                    },
-                )
-                if result.isError or not result.content:
-                    return False
+        import anyio
+    except ImportError:
+        return ()
+    return (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+
+class MCPEmailSession:
+    """A supervised, long-lived MCP email server and client session."""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.last_error = ""
+        self.stats = {"starts": 0, "restarts": 0, "sent": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        self._session: Any = None
+        self._closing = False
+        self._ready: Optional[asyncio.Event] = None  # session initialized
+        self._restart: Optional[asyncio.Event] = None  # tear the server down (and start a new one unless closing)
+        self._loop = asyncio.new_event_loop()
+        self._loop_ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mcp-email", daemon=True)
+        self._thread.start()
+        self._loop_ready.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._supervise())
+
+    async def _supervise(self) -> None:
+        self._ready = asyncio.Event()
+        self._restart = asyncio.Event()
+        self._loop_ready.set()
+        try:
+            from mcp import ClientSession, StdioServerParameters
+            from mcp.client.stdio import stdio_client
+        except ImportError as e:
+            self.last_error = f"ImportError: {e}"
+            return
+        failures = 0
+        while not self._closing:
+            server_params = StdioServerParameters(
+                command=sys.executable,
+                args=["-m", "app.mcp_email_server"],
+                env=_server_env(),
+            )
+            try:
+                async with stdio_client(server_params) as (read_stream, write_stream):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await asyncio.wait_for(session.initialize(), self.timeout)
+                        self._session = session
+                        self._ready.set()
+                        self._count("starts")
+                        failures = 0
+                        await self._restart.wait()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                failures += 1
+            finally:
+                self._session = None
+                self._ready.clear()
+                self._restart.clear()
+            if failures and not self._closing:
+                await asyncio.sleep(jittered_backoff(failures - 1, 0.5, 30.0))
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += n
+
+    def _replace(self, session: Any) -> None:
+        if session is self._session:  # broken pipe, server exited or hung: replace it
+            self._ready.clear()
+            self._restart.set()
+            self._count("restarts")
+
+    async def _send(self, arguments: dict) -> bool:
+        for _ in range(2):  # second try on a restarted server, only if the first request was never written
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                self.last_error = self.last_error or "MCP email server did not start"
+                return False
+            session = self._session
+            if session is None:
+                continue
+            try:
+                result = await asyncio.wait_for(session.call_tool("send_email", arguments=arguments), self.timeout)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._replace(session)
+                if isinstance(e, _unsent_errors()):
+                    continue
+                return False  # timed out or broke after the request was sent: it may have gone out
+            if result.isError or not result.content:
                 text = getattr(result.content[0], "text", "") if result.content else ""
-                return text.strip().lower().startswith("email sent")
-    except Exception:
+                self.last_error = text or "send_email failed"
+                return False
+            text = getattr(result.content[0], "text", "")
+            return text.strip().lower().startswith("email sent")
         return False
 
+    def send_email(
+        self,
+        to_emails: list[str],
+        subject: str,
+        body_html: str,
+        body_text: Optional[str] = None,
+    ) -> bool:
+        """Blocking send through the shared session (safe to call from any thread except the session's own)."""
+        if not self._thread.is_alive():
+            return False
+        arguments = {"receiver": to_emails, "subject": subject, "body": body_html, "body_text": body_text}
+        try:
+            ok = asyncio.run_coroutine_threadsafe(self._send(arguments), self._loop).result()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            ok = False
+        self._count("sent" if ok else "failed")
+        return ok
+
+    def close(self) -> None:
+        """Stop the server process and the session thread."""
+        self._closing = True
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._restart.set)
+            self._thread.join(timeout=5)
+
+    def info(self) -> dict:
+        with self._stats_lock:
+            return {"running": self._session is not None, "last_error": self.last_error or None, **self.stats}
+
+
+_session: Optional[MCPEmailSession] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """The session thread doesn't survive fork; a child starts its own server on first send."""
+    global _session, _session_pid
+    _session = None
+    _session_pid = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _close_session() -> None:
+    if _session is not None and _session_pid == os.getpid():
+        _session.close()
+
+
+atexit.register(_close_session)
+
+
+def get_mcp_email_session() -> MCPEmailSession:
+    global _session, _session_pid
+    session = _session
+    if session is not None and _session_pid == os.getpid():
+        return session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = MCPEmailSession(timeout=get_settings().MCP_EMAIL_TIMEOUT)
+            _session_pid = os.getpid()
+        return _session
+
+
+def mcp_email_stats() -> dict:
+    """Server starts/restarts and sends through this process's session ({} if never used)."""
+    session = _session
+    if session is None or _session_pid != os.getpid():
+        return {}
+    return session.info()
+
 
 def send_email_via_mcp(
     to_emails: list[str],
@@ -64,10 +221,8 @@ def send_email_via_mcp(
     body_html: str,
     body_text: str | None = None,
 ) -> bool:
-    """Synchronous wrapper: run the async MCP client and return whether email was sent."""
+    """Call the MCP email server's send_email tool. Returns True if sent successfully."""
     try:
-        return asyncio.run(
-            _send_email_via_mcp(to_emails, subject, body_html, body_text)
-        )
+        return get_mcp_email_session().send_email(to_emails, subject, body_html, body_text)
     except Exception:
         return False
@@ -0,0 +1,195 @@
+"""
+Notification digests: practices with notification_mode="digest" get one summary email of call
+outcomes per digest_interval_minutes (or as soon as digest_max_items are pending) instead of one
+email per call. Outcomes are queued in call_notifications by the post-call workflow, in its own
+transaction; a Celery Beat sweep sends all due digests as one SMTP batch and then sets
+claimer_notified_at on every claim in a digest that went out.
+"""
+
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import Any, Optional
+
+from sqlalchemy import func
+
+from ..core.config import get_settings
+from .email_service import _get_practice_notification_emails, send_emails
+
+DIGEST = "digest"
+MAX_ITEMS_PER_EMAIL = 500  # a larger backlog goes out over consecutive sweeps
+
+
+def uses_digest(db: Any, practice_id: Optional[int]) -> bool:
+    from ..models import Practice
+
+    if not practice_id:
+        return False
+    practice = db.get(Practice, practice_id)
+    return bool(practice) and getattr(practice, "notification_mode", None) == DIGEST
+
+
+def queue_call_notification(
+    db: Any,
+    claim: Any,
+    payer_name: str,
+    extracted: Optional[dict] = None,
+    call_duration_seconds: Optional[int] = None,
+    call_id: Optional[int] = None,
+) -> bool:
+    """
+    Add the call outcome to the practice's next digest, once per call (INSERT ... ON CONFLICT
+    (call_id) DO NOTHING, so a concurrent or retried run can't queue it twice). Caller commits.
+    """
+    from ..models import CallNotification
+
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    extracted = extracted if isinstance(extracted, dict) else {}
+    denial = ""
+    if extracted.get("denial_reason") or extracted.get("denial_code"):
+        denial = f"{extracted.get('denial_reason') or ''} ({extracted.get('denial_code') or ''})".strip()
+    now = datetime.now(timezone.utc)
+    stmt = insert(CallNotification.__table__).values(
+        practice_id=claim.practice_id,
+        claim_id=claim.id,
+        call_id=call_id or None,
+        claim_number=(getattr(claim, "claim_number", "") or "")[:100],
+        patient_name=(getattr(claim, "patient_name", "") or "")[:255],
+        payer_name=(payer_name or "")[:255],
+        claim_status=(getattr(claim, "status", "") or "")[:50],
+        summary=(extracted.get("summary") or "").strip() or None,
+        next_steps=(extracted.get("next_steps") or "").strip() or None,
+        denial=denial[:500] or None,
+        call_duration_seconds=call_duration_seconds,
+        created_at=now,
+        updated_at=now,
+    )
+    if call_id:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["call_id"])
+    db.execute(stmt)
+    return True
+
+
+def build_digest_content(practice_name: str, items: list) -> tuple[str, str, str]:
+    """(subject, body_html, body_text) for a digest of CallNotification rows."""
+    app_name = get_settings().APP_NAME
+    counts: dict[str, int] = {}
+    for item in items:
+        counts[item.claim_status or "—"] = counts.get(item.claim_status or "—", 0) + 1
+    by_status = ", ".join(f"{n} {status}" for status, n in sorted(counts.items(), key=lambda kv: -kv[1]))
+    subject = f"[{app_name}] {len(items)} call update{'s' if len(items) != 1 else ''}: {by_status}"
+    rows = "\n".join(
+        f"    <tr><td style=\"padding:4px 8px;\">{escape(item.claim_number or '—')}</td>"
+        f"<td style=\"padding:4px 8px;\">{escape(item.patient_name or '—')}</td>"
+        f"<td style=\"padding:4px 8px;\">{escape(item.payer_name or '—')}</td>"
+        f"<td style=\"padding:4px 8px;\">{escape(item.claim_status or '—')}</td>"
+        f"<td style=\"padding:4px 8px;\">{escape(item.summary or '')}"
+        f"{'<br><strong>Next steps:</strong> ' + escape(item.next_steps) if item.next_steps else ''}"
+        f"{'<br><strong>Denial:</strong> ' + escape(item.denial) if item.denial else ''}</td></tr>"
+        for item in items
+    )
+    body_html = f"""
+<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"></head>
+<body style="font-family: sans-serif; line-height: 1.5;">
+  <h2>Claim call updates{f' for {escape(practice_name)}' if practice_name else ''}</h2>
+  <p>{len(items)} automated call{'s' if len(items) != 1 else ''} completed since the last update ({escape(by_status)}).</p>
+  <table style="border-collapse: collapse;">
+    <tr><th style="padding:4px 8px; text-align:left;">Claim #</th><th style="padding:4px 8px; text-align:left;">Patient</th><th style="padding:4px 8px; text-align:left;">Payer</th><th style="padding:4px 8px; text-align:left;">Status</th><th style="padding:4px 8px; text-align:left;">Outcome</th></tr>
+{rows}
+  </table>
+  <p style="color:#666; font-size:0.9em;">This is an automated message from {app_name}.</p>
+</body>
+</html>
+"""
+    body_text = subject + "\n\n" + "\n".join(
+        f"- Claim {item.claim_number or '—'} ({item.payer_name or '—'}): {item.claim_status or '—'}"
+        + (f" – {item.summary}" if item.summary else "")
+        for item in items
+    )
+    return subject, body_html, body_text
+
+
+def due_practice_ids(db: Any, now: Optional[datetime] = None) -> list[int]:
+    """Practices with pending outcomes whose interval has elapsed or whose size threshold is reached."""
+    from ..models import CallNotification, Practice
+
+    now = now or datetime.now(timezone.utc)
+    pending = (
+        db.query(
+            CallNotification.practice_id,
+            func.count(CallNotification.id),
+            func.min(CallNotification.created_at),
+            Practice.notification_mode,
+            Practice.digest_interval_minutes,
+            Practice.digest_max_items,
+        )
+        .join(Practice, Practice.id == CallNotification.practice_id)
+        .filter(CallNotification.sent_at.is_(None))
+        .group_by(
+            CallNotification.practice_id,
+            Practice.notification_mode,
+            Practice.digest_interval_minutes,
+            Practice.digest_max_items,
+        )
+        .all()
+    )
+    due = []
+    for practice_id, count, oldest, mode, interval, max_items in pending:
+        if oldest is not None and oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)  # SQLite returns naive datetimes
+        if (
+            mode != DIGEST  # switched back to per-call emails: flush what was queued
+            or count >= (max_items or 1)
+            or oldest is None
+            or oldest <= now - timedelta(minutes=interval or 0)
+        ):
+            due.append(practice_id)
+    return due
+
+
+def send_due_digests(db: Any) -> dict:
+    """
+    Send every due digest as one SMTP batch. Pending rows are locked (FOR UPDATE SKIP LOCKED) so
+    overlapping sweeps never send the same outcome twice. Rows whose email failed stay pending for
+    the next sweep. Commits.
+    """
+    from ..models import CallNotification, Claim, Practice
+
+    now = datetime.now(timezone.utc)
+    digests: list[tuple[list, tuple[list[str], str, str, str]]] = []
+    for practice_id in due_practice_ids(db, now):
+        to_emails = _get_practice_notification_emails(db, practice_id)
+        if not to_emails:
+            continue  # stays queued until the practice has a recipient
+        items = (
+            db.query(CallNotification)
+            .filter(CallNotification.practice_id == practice_id, CallNotification.sent_at.is_(None))
+            .order_by(CallNotification.id)
+            .limit(MAX_ITEMS_PER_EMAIL)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not items:
+            continue
+        practice = db.get(Practice, practice_id)
+        subject, body_html, body_text = build_digest_content(getattr(practice, "name", "") or "", items)
+        digests.append((items, (to_emails, subject, body_html, body_text)))
+    if not digests:
+        db.commit()
+        return {"digests": 0, "sent": 0, "items": 0}
+
+    results = send_emails([message for _, message in digests])
+    sent_items = [item for (items, _), ok in zip(digests, results) if ok for item in items]
+    for item in sent_items:
+        item.sent_at = now
+    claim_ids = {item.claim_id for item in sent_items}
+    if claim_ids:
+        db.query(Claim).filter(Claim.id.in_(claim_ids)).update(
+            {Claim.claimer_notified_at: now}, synchronize_session=False
+        )
+    db.commit()
+    return {"digests": len(digests), "sent": sum(1 for ok in results if ok), "items": len(sent_items)}
@@ -0,0 +1,329 @@
+"""
+File-based RAG ingestion. An uploaded CSV / JSONL / plain-text file is saved to disk and read back
+as a stream by a background job: rows are collected into batches of RAG_INGEST_BATCH_SIZE and
+upserted through rag_service (idempotent, embedding cache), long policy text is split into
+overlapping chunks, and progress is committed on the RagIngestJob row after every batch. The local
+index files are rewritten every RAG_INDEX_FLUSH_BATCHES batches rather than after each one.
+
+The upload is deleted once the job is done. After a failure it is kept so the job can be retried,
+until cleanup_uploads removes it (RAG_UPLOAD_RETENTION_HOURS). RAG_UPLOAD_DIR must be shared by the
+API and the Celery workers: a worker that can't see the file fails the job saying so.
+"""
+
+import csv
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from ..core.config import get_settings
+from .rag_service import chroma_persist_dir, deferred_ingest, ingest_denial_codes, ingest_payer_policies, payer_key
+
+KINDS = ("denial_codes", "payer_policies")
+_EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl", "txt": "text", "md": "text"}
+MAX_ERRORS = 20  # row errors kept on the job
+_TEXT_BUFFER_CHUNKS = 8  # plain-text documents are chunked ~8 chunks at a time
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """csv | jsonl | text from the file extension; None if unsupported."""
+    ext = (filename or "").rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    return _EXTENSIONS.get(ext)
+
+
+def upload_dir() -> Path:
+    configured = get_settings().RAG_UPLOAD_DIR
+    return Path(configured) if configured else chroma_persist_dir() / "ingest_uploads"
+
+
+def new_upload_path(file_format: str) -> Path:
+    directory = upload_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{uuid.uuid4().hex}.{file_format}"
+
+
+def _break_point(text: str, start: int, end: int) -> int:
+    """Last paragraph / line / sentence / word boundary in the second half of text[start:end]."""
+    floor = start + (end - start) // 2
+    for sep in ("\n\n", "\n", ". ", " "):
+        idx = text.rfind(sep, floor, end)
+        if idx != -1:
+            return idx + len(sep)
+    return end
+
+
+def chunk_text(text: str, size: int, overlap: int) -> list[str]:
+    """Split text into pieces of at most `size` characters, cut at natural boundaries; neighbours share ~`overlap`."""
+    text = (text or "").strip()
+    if len(text) <= size:
+        return [text] if text else []
+    overlap = max(0, min(overlap, size // 2 - 1))
+    chunks: list[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            end = _break_point(text, start, end)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = max(end - overlap, start + 1)
+        space = text.find(" ", next_start, end)  # start the overlap on a word
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+class _LineReader:
+    """Decoded lines of a file, read lazily; counts bytes consumed for progress."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[str]:
+        with open(self.path, "rb") as f:
+            for n, raw in enumerate(f):
+                self.bytes_read += len(raw)
+                line = raw.decode("utf-8", errors="replace")
+                yield line.lstrip("\ufeff") if n == 0 else line
+
+
+def _csv_rows(lines: _LineReader) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    reader = csv.DictReader(lines)
+    reader.fieldnames = [(name or "").strip().lower().replace(" ", "_") for name in reader.fieldnames or []]
+    for row in reader:
+        yield reader.line_num, {k: (v or "").strip() for k, v in row.items() if k}, None
+
+
+def _jsonl_rows(lines: _LineReader) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Line {line_no}: invalid JSON ({e.msg})"
+            continue
+        if isinstance(row, dict):
+            yield line_no, row, None
+        else:
+            yield line_no, None, f"Line {line_no}: expected a JSON object"
+
+
+def _text_rows(lines: _LineReader, size: int, overlap: int) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """One row per chunk of a long document; the last chunk is carried over so cuts don't depend on read boundaries."""
+    buffer = ""
+    line_no = 0
+    for line_no, line in enumerate(lines, start=1):
+        buffer += line
+        if len(buffer) >= size * _TEXT_BUFFER_CHUNKS:
+            chunks = chunk_text(buffer, size, overlap)
+            for chunk in chunks[:-1]:
+                yield line_no, {"text": chunk, "_chunked": True}, None
+            buffer = chunks[-1] if chunks else ""
+    for chunk in chunk_text(buffer, size, overlap):
+        yield line_no, {"text": chunk, "_chunked": True}, None
+
+
+def iter_rows(path: Path, file_format: str, lines: Optional[_LineReader] = None) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """(line number, row, error) for each record of an upload, streamed from disk."""
+    lines = lines or _LineReader(path)
+    if file_format == "csv":
+        return _csv_rows(lines)
+    if file_format == "jsonl":
+        return _jsonl_rows(lines)
+    s = get_settings()
+    return _text_rows(lines, s.RAG_CHUNK_SIZE, s.RAG_CHUNK_OVERLAP)
+
+
+def payer_ids_by_key(payer_names: dict[int, str]) -> dict[str, int]:
+    """Normalized payer name -> Payer.id for a practice's payers; names shared by two payers are left out."""
+    ids: dict[str, Optional[int]] = {}
+    for payer_id, name in payer_names.items():
+        key = payer_key(name)
+        if key:
+            ids[key] = None if key in ids else payer_id
+    return {key: payer_id for key, payer_id in ids.items() if payer_id}
+
+
+def _policy_entries(
+    row: dict, job: Any, payer_names: dict[int, str], payer_ids: dict[str, int]
+) -> tuple[list[dict], Optional[str]]:
+    """Chunked policy entries for one row; the job's payer applies to rows without one."""
+    text = row.get("text") or row.get("content") or row.get("policy") or ""
+    if not str(text).strip():
+        return [], "missing text"
+    payer_name = row.get("payer_name") or row.get("payer") or ""
+    # A row naming one of the practice's payers is filed under its id, like one that gives the id
+    payer_id = row.get("payer_id") or payer_ids.get(payer_key(payer_name)) or (None if payer_name else job.payer_id)
+    if payer_id:
+        try:
+            payer_id = int(float(payer_id))
+        except (TypeError, ValueError):
+            return [], f"invalid payer_id {payer_id!r}"
+        if payer_id not in payer_names:
+            return [], f"payer_id {payer_id} not found"
+        payer_name = payer_names[payer_id]
+    payer_name = payer_name or job.payer_name or ""
+    s = get_settings()
+    chunks = [str(text).strip()] if row.get("_chunked") else chunk_text(str(text), s.RAG_CHUNK_SIZE, s.RAG_CHUNK_OVERLAP)
+    return [{"payer_name": payer_name, "payer_id": payer_id or None, "text": chunk} for chunk in chunks], None
+
+
+def _denial_entries(row: dict) -> tuple[list[dict], Optional[str]]:
+    if not (row.get("code") or row.get("denial_code") or row.get("description") or row.get("reason")):
+        return [], "missing code and description"
+    return [row], None
+
+
+def _practice_payer_names(db: Any, practice_id: Optional[int]) -> dict[int, str]:
+    from ..models import Payer
+
+    if not practice_id:
+        return {}
+    return dict(db.query(Payer.id, Payer.name).filter(Payer.practice_id == practice_id).all())
+
+
+def _flush(db: Any, job: Any, batch: list[dict], lines: _LineReader) -> None:
+    if batch:
+        ingest = ingest_payer_policies if job.kind == "payer_policies" else ingest_denial_codes
+        stats = ingest(batch)
+        job.documents += len(batch)
+        job.written += stats.written
+        job.unchanged += stats.unchanged
+        batch.clear()
+    job.bytes_read = lines.bytes_read
+    db.commit()
+
+
+def run_ingest_job(job_id: int) -> dict:
+    """
+    Ingest an uploaded file in batches, committing progress after each. Uses its own session.
+    Re-running a job that was interrupted starts the file over; upserts make that cheap.
+    """
+    from ..database import SessionLocal
+    from ..models import RagIngestJob, RagIngestJobStatus
+
+    db = SessionLocal()
+    try:
+        job = db.query(RagIngestJob).filter(RagIngestJob.id == job_id).first()
+        if not job or job.status not in (RagIngestJobStatus.PENDING, RagIngestJobStatus.RUNNING):
+            return {"status": job.status if job else "missing"}
+        job.status = RagIngestJobStatus.RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        job.bytes_read = job.records = job.documents = job.written = job.unchanged = job.error_count = 0
+        job.errors, job.error, job.finished_at = None, None, None
+        db.commit()
+
+        path = Path(job.file_path)
+        if not path.is_file():
+            job.status = RagIngestJobStatus.FAILED
+            job.error = (
+                f"Upload not found at {path}. RAG_UPLOAD_DIR must be a directory shared by the API and "
+                "the Celery workers, or the upload was removed after RAG_UPLOAD_RETENTION_HOURS."
+            )
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            return {"status": job.status, "error": job.error}
+        s = get_settings()
+        batch_size = max(1, s.RAG_INGEST_BATCH_SIZE)
+        flush_every = max(1, s.RAG_INDEX_FLUSH_BATCHES)
+        payer_names = _practice_payer_names(db, job.practice_id) if job.kind == "payer_policies" else {}
+        payer_ids = payer_ids_by_key(payer_names)
+        lines = _LineReader(path)
+        errors: list[str] = []
+        batch: list[dict] = []
+        batches = 0
+        try:
+            with deferred_ingest() as flush_indexes:
+                for line_no, row, error in iter_rows(path, job.file_format, lines):
+                    job.records += 1
+                    if row is not None:
+                        if job.kind == "payer_policies":
+                            entries, error = _policy_entries(row, job, payer_names, payer_ids)
+                        else:
+                            entries, error = _denial_entries(row)
+                        if error:
+                            error = f"Line {line_no}: {error}"
+                        batch.extend(entries)
+                    if error:
+                        job.error_count += 1
+                        if len(errors) < MAX_ERRORS:
+                            errors.append(error)
+                            job.errors = list(errors)
+                    if len(batch) >= batch_size:
+                        _flush(db, job, batch, lines)
+                        batches += 1
+                        if batches % flush_every == 0:
+                            flush_indexes()
+                _flush(db, job, batch, lines)
+            job.status = RagIngestJobStatus.DONE
+        except Exception as exc:
+            db.rollback()
+            job.status = RagIngestJobStatus.FAILED
+            job.error = f"{type(exc).__name__}: {exc}"[:2000]
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        if job.status == RagIngestJobStatus.DONE:
+            try:
+                path.unlink()
+            except OSError:
+                pass  # cleanup_uploads removes it later
+        return {
+            "status": job.status,
+            "documents": job.documents,
+            "written": job.written,
+            "unchanged": job.unchanged,
+            "errors": job.error_count,
+        }
+    finally:
+        db.close()
+
+
+def cleanup_uploads(retention_hours: Optional[float] = None) -> dict:
+    """
+    Delete uploads older than the retention period, except those of jobs still pending or running
+    and of jobs that failed within the period (they can still be retried). Uses its own session.
+    """
+    from ..database import SessionLocal
+    from ..models import RagIngestJob, RagIngestJobStatus
+
+    hours = get_settings().RAG_UPLOAD_RETENTION_HOURS if retention_hours is None else retention_hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    directory = upload_dir()
+    if not directory.is_dir():
+        return {"deleted": 0}
+    old = {}
+    for path in directory.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff.timestamp():
+                old[str(path)] = path
+        except OSError:
+            continue
+    if not old:
+        return {"deleted": 0}
+    db = SessionLocal()
+    try:
+        keep = {
+            file_path
+            for (file_path,) in db.query(RagIngestJob.file_path).filter(
+                RagIngestJob.file_path.in_(list(old)),
+                (RagIngestJob.status.in_([RagIngestJobStatus.PENDING, RagIngestJobStatus.RUNNING]))
+                | ((RagIngestJob.status == RagIngestJobStatus.FAILED) & (RagIngestJob.finished_at >= cutoff)),
+            )
+        }
+    finally:
+        db.close()
+    deleted = 0
+    for file_path, path in old.items():
+        if file_path in keep:
+            continue
+        try:
+            path.unlink()
+            deleted += 1
+        except OSError:
+            pass
+    return {"deleted": deleted}
@@ -0,0 +1,370 @@
+"""
+Local retrieval for RAG: a BM25 inverted index per collection (pure Python, persisted next to the
+Chroma collections) and an optional CPU-only embedding model (Chroma's bundled all-MiniLM-L6-v2 ONNX
+model). Results from several retrievers are merged with reciprocal-rank fusion.
+Needs no API key or network once the model is downloaded; BM25 needs nothing at all.
+See rag_service for how RAG_BACKEND picks the retrievers.
+
+Index files (BM25 and the denial code index) are rewritten under a lock file shared by every process
+on the host, through a unique temp file. Bulk ingestion defers the rewrite (deferred_index_writes):
+updates are applied in memory and written every few batches, merged with what other processes wrote.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # standard reciprocal-rank fusion constant
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CODE_RE = re.compile(r"\b(co|pr|oa|pi|cr)[\s_-]*([a-z]?\d{1,3})\b")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in is it its of on or that the this to was were will with "
+    "what which who we you your they their our".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words without stopwords; denial codes also as one token ("CO-16" -> co, 16, co16)."""
+    text = (text or "").lower()
+    tokens = [t for t in _WORD_RE.findall(text) if t not in _STOPWORDS]
+    tokens.extend(f"{group}{reason}" for group, reason in _CODE_RE.findall(text))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over {doc_id: {"text", "metadata", "hash"}}; postings are built on load and updated per upsert."""
+
+    def __init__(self, docs: Optional[dict[str, dict]] = None):
+        self.docs: dict[str, dict] = docs or {}
+        self._ids: list[str] = []
+        self._slots: dict[str, int] = {}
+        self._lengths: list[int] = []
+        self._total_length = 0
+        self._postings: dict[str, dict[int, int]] = {}  # term -> {doc slot: term frequency}
+        for doc_id, doc in self.docs.items():
+            self._index(doc_id, doc["text"])
+
+    def _index(self, doc_id: str, text: str) -> None:
+        slot = self._slots.get(doc_id)
+        if slot is None:
+            slot = self._slots[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            self._lengths.append(0)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[slot] = tf
+        self._lengths[slot] = sum(counts.values())
+        self._total_length += self._lengths[slot]
+
+    def _unindex(self, doc_id: str, text: str) -> None:
+        slot = self._slots[doc_id]
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths[slot]
+        self._lengths[slot] = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.docs)
+
+    def upsert(self, items: list[tuple[str, str, dict, str]]) -> tuple[int, int]:
+        """items: (doc_id, text, metadata, content_hash). Returns (written, unchanged)."""
+        written = unchanged = 0
+        for doc_id, text, metadata, content_hash in items:
+            current = self.docs.get(doc_id)
+            if current is not None and current.get("hash") == content_hash:
+                unchanged += 1
+                continue
+            if current is not None:
+                self._unindex(doc_id, current["text"])
+            self.docs[doc_id] = {"text": text, "metadata": metadata, "hash": content_hash}
+            self._index(doc_id, text)
+            written += 1
+        return written, unchanged
+
+    def search(self, query: str, k: int, where: Optional[dict] = None) -> list[str]:
+        """Top-k document texts; `where` keeps documents whose metadata equals each value (case-insensitive)."""
+        terms = set(tokenize(query))
+        if not terms or not self._ids:
+            return []
+        n = len(self._ids)
+        avgdl = self._total_length / n
+        scores: dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[idx] / (avgdl or 1))
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if where:
+            wanted = {key: str(value).strip().lower() for key, value in where.items()}
+            scores = {
+                idx: score for idx, score in scores.items()
+                if all(
+                    str(self.docs[self._ids[idx]]["metadata"].get(key, "")).strip().lower() == value
+                    for key, value in wanted.items()
+                )
+            }
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))  # ties: oldest first
+        return [self.docs[self._ids[idx]]["text"] for idx, _ in best]
+
+    def to_dict(self) -> dict:
+        return {"version": INDEX_VERSION, "docs": self.docs}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        if data.get("version") != INDEX_VERSION:
+            return cls()
+        return cls(data.get("docs") or {})
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock on `path` shared by every process on this host (held on a sidecar .lock file)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)  # LK_LOCK gives up after ~10 s
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_json(path: Path, data: dict) -> None:
+    """Atomic rewrite through a temp file no other writer can collide with. Hold file_lock(path)."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+class _DeferredIndex:
+    """An index file being updated in memory; flush() writes it, re-applying the updates if another process wrote meanwhile."""
+
+    def __init__(self, path: Path, read: Callable[[Path], Any], apply: Callable[[Any, list], tuple[Any, bool]]):
+        self.path = path
+        self._read = read
+        self._apply = apply
+        self.mtime = _mtime(path)
+        self.index = read(path)
+        self.pending: list = []
+
+    def update(self, items: list) -> Any:
+        result, changed = self._apply(self.index, items)
+        if changed:
+            self.pending.extend(items)
+        return result
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        with file_lock(self.path):
+            if _mtime(self.path) != self.mtime:
+                self.index = self._read(self.path)
+                self._apply(self.index, self.pending)
+            write_json(self.path, self.index.to_dict())
+            self.mtime = _mtime(self.path)
+        self.pending = []
+
+
+_deferred: ContextVar[Optional[dict[str, _DeferredIndex]]] = ContextVar("rag_deferred_index_writes", default=None)
+_deferred_lock = threading.Lock()
+
+
+@contextmanager
+def deferred_index_writes() -> Iterator[Callable[[], None]]:
+    """
+    Within the block, index file updates (update_index_file) are applied in memory only. They are
+    written when the yielded flush() is called and when the block ends, so bulk ingestion rewrites
+    each file every few batches instead of on every batch.
+    """
+    pending: dict[str, _DeferredIndex] = {}
+    token = _deferred.set(pending)
+
+    def flush() -> None:
+        for deferred in list(pending.values()):
+            deferred.flush()
+
+    try:
+        yield flush
+    finally:
+        _deferred.reset(token)
+        flush()
+
+
+def update_index_file(
+    path: Path,
+    read: Callable[[Path], Any],
+    apply: Callable[[Any, list], tuple[Any, bool]],
+    items: list,
+) -> Any:
+    """
+    Apply items to the index stored at `path` and return apply's result. read(path) loads the
+    index (an object with to_dict()); apply(index, items) -> (result, changed). Written now under
+    file_lock, or at the next flush inside deferred_index_writes().
+    """
+    pending = _deferred.get()
+    if pending is not None:
+        with _deferred_lock:
+            deferred = pending.get(str(path))
+            if deferred is None:
+                deferred = pending[str(path)] = _DeferredIndex(path, read, apply)
+        return deferred.update(items)
+    with file_lock(path):
+        index = read(path)
+        result, changed = apply(index, items)
+        if changed:
+            write_json(path, index.to_dict())
+    return result
+
+
+_lock = threading.Lock()
+# path -> (mtime, index); reloaded when another process (API ingest) rewrites the file
+_loaded: dict[str, tuple[float, BM25Index]] = {}
+
+
+def _index_path(collection: str) -> Path:
+    from .rag_service import chroma_persist_dir
+    return chroma_persist_dir() / f"bm25_{collection}.json"
+
+
+def _read_index(path: Path) -> BM25Index:
+    try:
+        return BM25Index.from_dict(json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return BM25Index()
+
+
+def get_bm25_index(collection: str) -> BM25Index:
+    path = _index_path(collection)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return BM25Index()
+    cached = _loaded.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        cached = _loaded.get(str(path))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = _read_index(path)
+        _loaded[str(path)] = (mtime, index)
+        return index
+
+
+def _upsert_bm25(index: BM25Index, items: list) -> tuple[tuple[int, int], bool]:
+    written, unchanged = index.upsert(items)
+    return (written, unchanged), written > 0
+
+
+def upsert_bm25_documents(collection: str, docs: list, ids: list[str]) -> tuple[int, int]:
+    """Add/replace LangChain documents (metadata carries content_hash) in the collection's BM25 index."""
+    items = [
+        (doc_id, doc.page_content, dict(doc.metadata), doc.metadata.get("content_hash", ""))
+        for doc_id, doc in dict(zip(ids, docs)).items()
+    ]
+    return update_index_file(_index_path(collection), _read_index, _upsert_bm25, items)
+
+
+def delete_bm25_index(collection: str) -> None:
+    path = _index_path(collection)
+    with _lock, file_lock(path):
+        _loaded.pop(str(path), None)
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def bm25_search(collection: str, query: str, k: int, where: Optional[dict] = None) -> list[str]:
+    return get_bm25_index(collection).search(query, k, where)
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int) -> list[str]:
+    """Merge ranked lists of texts: score = sum of 1 / (RRF_K + rank) over the lists a text appears in."""
+    rankings = [r for r in rankings if r]
+    if len(rankings) == 1:
+        return rankings[0][:k]
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, text in enumerate(ranking, start=1):
+            scores[text] = scores.get(text, 0.0) + 1.0 / (RRF_K + rank)
+    return [text for text, _ in sorted(scores.items(), key=lambda item: -item[1])[:k]]
+
+
+def local_embeddings() -> Any:
+    """CPU-only sentence embeddings (all-MiniLM-L6-v2 via onnxruntime, shipped with chromadb); None if unavailable."""
+    try:
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        from langchain_core.embeddings import Embeddings
+    except ImportError:
+        return None
+
+    class LocalMiniLMEmbeddings(Embeddings):
+        def __init__(self):
+            self._fn = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            return [[float(x) for x in vector] for vector in self._fn(texts)]
+
+        def embed_query(self, text: str) -> list[float]:
+            return self.embed_documents([text])[0]
+
+    try:
+        return LocalMiniLMEmbeddings()
+    except Exception:
+        return None
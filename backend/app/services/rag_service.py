@@ -1,13 +1,42 @@
 """
 RAG service for denial codes and payer policies.
-Uses Chroma + OpenAI embeddings for semantic search.
-Optional: app runs without langchain_community; RAG is no-op if not installed.
+Retrievers are picked by RAG_BACKEND and merged with reciprocal-rank fusion (rag_local):
+- openai: Chroma + OpenAI embeddings (semantic search; needs OPENAI_API_KEY and the network)
+- local: BM25 index, plus Chroma with a CPU-only local embedding model when RAG_LOCAL_EMBEDDINGS is set
+- hybrid: BM25 + OpenAI embeddings (+ local embeddings when enabled)
+Ingestion always feeds every available index, so the backend can be switched without re-ingesting.
+Optional: app runs without langchain_community; vector retrievers are skipped if not installed.
+Each collection is opened once per process and shared across threads, together with one embeddings
+client (warmed up at startup), so a query costs about as much as the similarity search itself.
+
+Ingestion is idempotent: documents get deterministic ids (denial code + payer, or a content hash) and
+are upserted; entries whose text hasn't changed are skipped. Document embeddings are cached on disk by
+text hash (CacheBackedEmbeddings), so re-ingesting a list only pays for new or edited entries.
 """
 
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Optional, Any
+from typing import Callable, Iterator, NamedTuple, Optional, Any
 
 from ..core.config import get_settings
+from ..core.metrics import incr_counter
+from ..core.redis_client import get_redis
+from .rag_local import (
+    bm25_search,
+    deferred_index_writes,
+    delete_bm25_index,
+    get_bm25_index,
+    local_embeddings,
+    reciprocal_rank_fusion,
+    upsert_bm25_documents,
+)
 
 # Lazy imports so app starts when langchain_community/chromadb not installed
 def _import_chroma() -> Any:
@@ -24,13 +53,35 @@ def _import_document() -> Any:
     except ImportError:
         return None
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def _with_embedding_cache(emb: Any) -> Any:
+    """Cache document embeddings on disk keyed by text hash; the plain client if langchain isn't installed."""
+    try:
+        from langchain.embeddings import CacheBackedEmbeddings
+        from langchain.storage import LocalFileStore
+    except ImportError:
+        return emb
+    s = get_settings()
+    cache_dir = Path(s.RAG_EMBEDDING_CACHE_DIR) if s.RAG_EMBEDDING_CACHE_DIR else chroma_persist_dir() / "embedding_cache"
+    return CacheBackedEmbeddings.from_bytes_store(
+        emb,
+        LocalFileStore(str(cache_dir)),
+        namespace=EMBEDDING_MODEL,  # vectors from another model never match
+        batch_size=s.RAG_EMBED_BATCH_SIZE,
+    )
+
+
 def _get_embeddings_inner():
     try:
         from langchain_openai import OpenAIEmbeddings
         s = get_settings()
         if not s.OPENAI_API_KEY:
             return None
-        return OpenAIEmbeddings(api_key=s.OPENAI_API_KEY, model="text-embedding-3-small")
+        # chunk_size: texts per embeddings request
+        emb = OpenAIEmbeddings(api_key=s.OPENAI_API_KEY, model=EMBEDDING_MODEL, chunk_size=s.RAG_EMBED_BATCH_SIZE)
+        return _with_embedding_cache(emb)
     except ImportError:
         return None
 
@@ -38,133 +89,549 @@ def _get_embeddings_inner():
 DEFAULT_CHROMA_DIR = Path(__file__).resolve().parent.parent.parent / "chroma_data"
 DENIAL_CODES_COLLECTION = "denial_codes"
 PAYER_POLICIES_COLLECTION = "payer_policies"
+LOCAL_SUFFIX = "_local"
+BACKENDS = ("openai", "local", "hybrid")
+# Payer policies live in one partition (collection / BM25 index) per payer: payer_policies___id<Payer.id>,
+# or payer_policies__<payer key> for policies that name a payer without an id
+_PARTITION_SEP = "__"
+GENERAL_PARTITION = "_general"  # policies without a payer; slug keys never start with "_"
+_PAYER_ID_PARTITION = "_id"
+QUERY_CACHE_METRIC = "rag_query_cache"
+_QUERY_CACHE_PREFIX = "rag_query:"
+
+
+def payer_key(payer_name: Optional[str]) -> str:
+    """Normalized payer key ("UnitedHealthcare, Inc." -> "unitedhealthcare-inc"); "" when there is no payer."""
+    slug = re.sub(r"[^a-z0-9]+", "-", (payer_name or "").lower()).strip("-")
+    return slug[:40].strip("-")
+
+
+def _partition_key(payer_name: Optional[str], payer_id: Optional[int]) -> str:
+    if payer_id:
+        return f"{_PAYER_ID_PARTITION}{int(payer_id)}"
+    return payer_key(payer_name)
+
+
+def policy_partition(payer_name: Optional[str] = None, payer_id: Optional[int] = None) -> str:
+    """
+    Partition for a payer's policies: keyed by Payer.id, so two practices' "Aetna" never share one
+    and renaming a payer keeps its policies; by normalized name only when there is no id.
+    """
+    return f"{PAYER_POLICIES_COLLECTION}{_PARTITION_SEP}{_partition_key(payer_name, payer_id) or GENERAL_PARTITION}"
+
+
+_lock = threading.RLock()  # _get_store takes it, then _get_embeddings
+_embeddings: Any = None
+_local_embeddings: Any = None
+_stores: dict[str, Any] = {}
+_pid: Optional[int] = None
+
+
+def _reset_after_fork() -> None:
+    """Forget the parent's clients in a forked child (Celery prefork); they are reopened on first use."""
+    global _embeddings, _local_embeddings, _pid
+    _embeddings = None
+    _local_embeddings = None
+    _stores.clear()
+    _pid = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def _get_embeddings():
-    return _get_embeddings_inner()
+    """The process-wide embeddings client (None without an API key or langchain_openai)."""
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                _embeddings = _get_embeddings_inner()
+    return _embeddings
 
 
-def _chroma_persist_dir() -> Path:
-    # Allow override via env; Chroma uses CHROMA_PERSIST_DIR or similar in some setups
-    return DEFAULT_CHROMA_DIR
+def chroma_persist_dir() -> Path:
+    """Where the Chroma collections and the local indexes live (RAG_PERSIST_DIR, default backend/chroma_data)."""
+    configured = get_settings().RAG_PERSIST_DIR
+    return Path(configured) if configured else DEFAULT_CHROMA_DIR
 
 
-def get_denial_codes_store():
-    """Get or create Chroma vector store for denial codes. Returns None if RAG deps not installed."""
-    Chroma = _import_chroma()
-    if not Chroma:
-        return None
-    emb = _get_embeddings()
-    if not emb:
-        return None
-    persist_dir = str(_chroma_persist_dir() / DENIAL_CODES_COLLECTION)
-    return Chroma(
-        collection_name=DENIAL_CODES_COLLECTION,
-        embedding_function=emb,
-        persist_directory=persist_dir,
-    )
+def _get_store(collection_name: str, local: bool = False):
+    """
+    Open a Chroma collection once per process; later calls (from any thread) reuse it.
+    local=True: the "<name>_local" collection embedded with the CPU-only local model.
+    """
+    global _pid
+    key = f"{collection_name}{LOCAL_SUFFIX}" if local else collection_name
+    # Payer partitions share one Chroma directory (one client), as separate collections
+    base = PAYER_POLICIES_COLLECTION if collection_name.startswith(PAYER_POLICIES_COLLECTION + _PARTITION_SEP) else collection_name
+    persist_name = f"{base}{LOCAL_SUFFIX}" if local else base
+    store = _stores.get(key)
+    if store is not None and _pid == os.getpid():
+        return store
+    with _lock:
+        if _pid != os.getpid():
+            _stores.clear()
+            _pid = os.getpid()
+        store = _stores.get(key)
+        if store is not None:
+            return store
+        Chroma = _import_chroma()
+        if not Chroma:
+            return None
+        emb = _get_local_embeddings() if local else _get_embeddings()
+        if not emb:
+            return None
+        store = Chroma(
+            collection_name=key,
+            embedding_function=emb,
+            persist_directory=str(chroma_persist_dir() / persist_name),
+        )
+        _stores[key] = store
+        return store
 
 
-def get_payer_policies_store():
-    """Get or create Chroma vector store for payer policies. Returns None if RAG deps not installed."""
-    Chroma = _import_chroma()
-    if not Chroma:
-        return None
-    emb = _get_embeddings()
-    if not emb:
+def _get_local_embeddings():
+    global _local_embeddings
+    if _local_embeddings is None:
+        with _lock:
+            if _local_embeddings is None:
+                _local_embeddings = local_embeddings()
+    return _local_embeddings
+
+
+def get_local_dense_store(collection_name: str):
+    """Locally embedded copy of a collection; None unless RAG_LOCAL_EMBEDDINGS is set and the model loads."""
+    if not get_settings().RAG_LOCAL_EMBEDDINGS:
         return None
-    persist_dir = str(_chroma_persist_dir() / PAYER_POLICIES_COLLECTION)
-    return Chroma(
-        collection_name=PAYER_POLICIES_COLLECTION,
-        embedding_function=emb,
-        persist_directory=persist_dir,
-    )
+    return _get_store(collection_name, local=True)
 
 
-def add_denial_codes(entries: list[dict]) -> int:
+def get_denial_codes_store():
+    """Chroma vector store for denial codes (shared per process). Returns None if RAG deps not installed."""
+    return _get_store(DENIAL_CODES_COLLECTION)
+
+
+def get_payer_policies_store(payer_name: Optional[str] = None, payer_id: Optional[int] = None):
+    """Chroma vector store for one payer's policies (general policies without a payer). None if RAG deps not installed."""
+    return _get_store(policy_partition(payer_name, payer_id))
+
+
+def warm_up_rag() -> bool:
+    """
+    Open both collections and the embeddings client ahead of the first query (app / worker startup).
+    Returns True if RAG is available. Never raises.
     """
-    Ingest denial code entries into the vector store.
+    try:
+        from .denial_code_index import get_denial_code_index
+
+        ready = bool(get_denial_code_index())
+        stores = [get_denial_codes_store(), get_payer_policies_store()]
+        if get_settings().RAG_BACKEND != "openai":
+            for collection in (DENIAL_CODES_COLLECTION, policy_partition()):
+                ready = bool(get_bm25_index(collection)) or ready
+                stores.append(get_local_dense_store(collection))
+        for store in stores:
+            if store is None:
+                continue
+            store._collection.count()  # loads the persisted collection from disk
+            ready = True
+        return ready
+    except Exception:
+        return False
+
+
+def reset_rag_stores() -> None:
+    """Drop the cached clients (e.g. after the Chroma directory was replaced); reopened on next use."""
+    with _lock:
+        _reset_after_fork()
+
+
+class IngestStats(NamedTuple):
+    written: int  # new or changed documents upserted
+    unchanged: int  # same id and text as what is stored; skipped
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _normalize_code(code: str) -> str:
+    return re.sub(r"[\s_]+", "-", (code or "").strip().upper())
+
+
+def denial_code_doc_id(code: str, payer: str, text: str) -> str:
+    """Stable id: one document per (code, payer); entries without a code are keyed by content."""
+    code = _normalize_code(code)
+    if code:
+        return f"denial:{code}:{(payer or '').strip().lower()}"
+    return f"denial:sha:{_content_hash(text)[:32]}"
+
+
+def payer_policy_doc_id(payer_name: str, text: str, payer_id: Optional[int] = None) -> str:
+    return f"policy:{_partition_key(payer_name, payer_id)}:{_content_hash(text)[:32]}"
+
+
+def _upsert_documents(store: Any, docs: list, ids: list[str]) -> IngestStats:
+    """Upsert docs by id in batches, skipping those whose stored content_hash matches."""
+    by_id = dict(zip(ids, docs))  # duplicate ids within one request: last entry wins
+    batch_size = max(1, get_settings().RAG_EMBED_BATCH_SIZE)
+    pending = list(by_id)
+    written = unchanged = 0
+    for start in range(0, len(pending), batch_size):
+        batch_ids = pending[start:start + batch_size]
+        existing = store.get(ids=batch_ids, include=["metadatas"])
+        stored_hashes = {
+            doc_id: (meta or {}).get("content_hash")
+            for doc_id, meta in zip(existing.get("ids") or [], existing.get("metadatas") or [])
+        }
+        changed_ids = [
+            doc_id for doc_id in batch_ids
+            if stored_hashes.get(doc_id) != by_id[doc_id].metadata["content_hash"]
+        ]
+        unchanged += len(batch_ids) - len(changed_ids)
+        if changed_ids:
+            # Chroma add with explicit ids is an upsert; only these texts are embedded
+            store.add_documents([by_id[doc_id] for doc_id in changed_ids], ids=changed_ids)
+            written += len(changed_ids)
+    return IngestStats(written, unchanged)
+
+
+def _openai_store(collection_name: str):
+    if collection_name == DENIAL_CODES_COLLECTION:
+        return get_denial_codes_store()
+    return _get_store(collection_name)  # a payer policy partition
+
+
+def _ingest(collection_name: str, docs: list, ids: list[str]) -> IngestStats:
+    """
+    Write docs to every index: BM25 always, the local and OpenAI vector stores when available.
+    Stats come from the OpenAI store when there is one (the others follow the same ids/hashes).
+    """
+    bm25_stats = stats = IngestStats(*upsert_bm25_documents(collection_name, docs, ids))
+    local_store = get_local_dense_store(collection_name)
+    if local_store is not None:
+        _upsert_documents(local_store, docs, ids)
+    store = _openai_store(collection_name)
+    if store is not None:
+        stats = _upsert_documents(store, docs, ids)
+    if stats.written or bm25_stats.written:
+        invalidate_query_cache(collection_name)
+        written_collections = _deferred_collections.get()
+        if written_collections is not None:
+            written_collections.add(collection_name)
+    return stats
+
+
+_deferred_collections: ContextVar[Optional[set[str]]] = ContextVar("rag_deferred_collections", default=None)
+
+
+@contextmanager
+def deferred_ingest() -> Iterator[Callable[[], None]]:
+    """
+    For bulk ingestion: the BM25 and denial code index files are rewritten when the yielded
+    flush() is called and when the block ends, not after every batch (rag_local.deferred_index_writes).
+    Query caches of the collections written are dropped again after each rewrite.
+    """
+    written_collections: set[str] = set()
+    token = _deferred_collections.set(written_collections)
+
+    def invalidate() -> None:
+        for collection_name in sorted(written_collections):
+            invalidate_query_cache(collection_name)
+        written_collections.clear()
+
+    try:
+        with deferred_index_writes() as flush_indexes:
+
+            def flush() -> None:
+                flush_indexes()
+                invalidate()
+
+            yield flush
+    finally:
+        _deferred_collections.reset(token)
+        invalidate()
+
+
+def ingest_denial_codes(entries: list[dict]) -> IngestStats:
+    """
+    Upsert denial code entries into the vector store (one document per code + payer).
     Each entry can have: code, description, remedy (optional), payer (optional).
-    Returns number of documents added.
+    Entries with a code also go into the exact-match index, which works without embeddings.
     """
-    store = get_denial_codes_store()
-    if not store:
-        return 0
+    from .denial_code_index import update_denial_code_index
+
+    update_denial_code_index(entries)
     Document = _import_document()
     if not Document:
-        return 0
-    docs = []
-    for i, e in enumerate(entries):
-        code = e.get("code") or e.get("denial_code") or ""
+        return IngestStats(0, 0)
+    docs, ids = [], []
+    for e in entries:
+        code = _normalize_code(e.get("code") or e.get("denial_code") or "")
         desc = e.get("description") or e.get("reason") or ""
         remedy = e.get("remedy") or ""
         payer = e.get("payer") or ""
         text = f"Code: {code}. Description: {desc}. Remedy: {remedy}. Payer: {payer}".strip()
-        meta = {"code": code, "source": "denial_codes"}
+        meta = {"code": code, "payer": payer, "source": "denial_codes", "content_hash": _content_hash(text)}
         docs.append(Document(page_content=text, metadata=meta))
+        ids.append(denial_code_doc_id(code, payer, text))
     if not docs:
-        return 0
-    store.add_documents(docs)
-    return len(docs)
+        return IngestStats(0, 0)
+    return _ingest(DENIAL_CODES_COLLECTION, docs, ids)
 
 
-def add_payer_policies(entries: list[dict]) -> int:
+def ingest_payer_policies(entries: list[dict]) -> IngestStats:
     """
-    Ingest payer policy text into the vector store.
-    Each entry: payer_name (optional), text (required), source (optional).
-    Returns number of documents added.
+    Upsert payer policy text into the payer's partition (keyed by payer + content hash).
+    Each entry: payer_name (optional), payer_id (optional, Payer.id; picks the partition when set),
+    text (required), source (optional).
     """
-    store = get_payer_policies_store()
-    if not store:
-        return 0
     Document = _import_document()
     if not Document:
-        return 0
-    docs = []
+        return IngestStats(0, 0)
+    partitions: dict[str, tuple[list, list]] = {}
     for e in entries:
         text = e.get("text") or (e.get("content") or "")
         if not text.strip():
             continue
         payer = e.get("payer_name") or e.get("payer") or ""
-        meta = {"payer_name": payer, "source": "payer_policies"}
+        meta = {
+            "payer_name": payer,
+            "payer_key": payer_key(payer),
+            "source": "payer_policies",
+            "content_hash": _content_hash(text),
+        }
+        payer_id = int(e["payer_id"]) if e.get("payer_id") else None
+        if payer_id:
+            meta["payer_id"] = payer_id
+        docs, ids = partitions.setdefault(policy_partition(payer, payer_id), ([], []))
         docs.append(Document(page_content=text, metadata=meta))
-    if not docs:
-        return 0
-    store.add_documents(docs)
-    return len(docs)
+        ids.append(payer_policy_doc_id(payer, text, payer_id))
+    written = unchanged = 0
+    for partition, (docs, ids) in partitions.items():
+        stats = _ingest(partition, docs, ids)
+        written += stats.written
+        unchanged += stats.unchanged
+    return IngestStats(written, unchanged)
 
 
-def query_denial_codes(query: str, k: int = 5) -> list[str]:
-    """Return top-k relevant denial code snippets for the query (code or free text)."""
-    store = get_denial_codes_store()
-    if not store or not query.strip():
+def add_denial_codes(entries: list[dict]) -> int:
+    """Ingest denial code entries. Returns number of documents written (unchanged ones are skipped)."""
+    return ingest_denial_codes(entries).written
+
+
+def add_payer_policies(entries: list[dict]) -> int:
+    """Ingest payer policy text. Returns number of documents written (unchanged ones are skipped)."""
+    return ingest_payer_policies(entries).written
+
+
+def _vector_search(store: Any, query: str, k: int) -> list[str]:
+    try:
+        return [d.page_content for d in store.similarity_search(query, k=k)]
+    except Exception:
         return []
+
+
+async def _avector_search(store: Any, query: str, k: int) -> list[str]:
     try:
-        docs = store.similarity_search(query.strip(), k=k)
-        return [d.page_content for d in docs]
+        return [d.page_content for d in await store.asimilarity_search(query, k=k)]
     except Exception:
         return []
 
 
-def query_payer_policies(query: str, payer_name: Optional[str] = None, k: int = 5) -> list[str]:
-    """Return top-k relevant payer policy snippets. Optionally filter by payer_name in metadata."""
-    store = get_payer_policies_store()
-    if not store or not query.strip():
+def _retrievers(collection_name: str) -> tuple[bool, list[tuple[Any, bool]]]:
+    """(use BM25, [(vector store, is local)]) for RAG_BACKEND."""
+    backend = get_settings().RAG_BACKEND
+    use_bm25 = backend in ("local", "hybrid")
+    stores: list[tuple[Any, bool]] = []
+    if backend in ("local", "hybrid"):
+        local_store = get_local_dense_store(collection_name)
+        if local_store is not None:
+            stores.append((local_store, True))
+    if backend != "local":
+        store = _openai_store(collection_name)
+        if store is not None:
+            stores.append((store, False))
+    return use_bm25, stores
+
+
+def _bm25(collection_name: str, query: str, k: int) -> list[str]:
+    try:
+        return bm25_search(collection_name, query, k)
+    except Exception:
         return []
+
+
+def _search(collection_name: str, query: str, k: int) -> list[str]:
+    use_bm25, stores = _retrievers(collection_name)
+    depth = k * 2 if use_bm25 else k
+    rankings = [_bm25(collection_name, query, depth)] if use_bm25 else []
+    rankings.extend(_vector_search(store, query, depth) for store, _ in stores)
+    return reciprocal_rank_fusion(rankings, k)
+
+
+async def _asearch(collection_name: str, query: str, k: int) -> list[str]:
+    """Async _search: remote searches are awaited, the local embedding model runs in a worker thread."""
+    use_bm25, stores = _retrievers(collection_name)
+    depth = k * 2 if use_bm25 else k
+    rankings = [_bm25(collection_name, query, depth)] if use_bm25 else []
+    rankings.extend(await asyncio.gather(*(
+        asyncio.to_thread(_vector_search, store, query, depth) if local else _avector_search(store, query, depth)
+        for store, local in stores
+    )))
+    return reciprocal_rank_fusion(rankings, k)
+
+
+def _query_cache_key(collection_name: str, query: str, k: int) -> str:
+    digest = hashlib.sha256(f"{get_settings().RAG_BACKEND}\0{k}\0{query}".encode("utf-8")).hexdigest()
+    return f"{_QUERY_CACHE_PREFIX}{collection_name}:{digest}"
+
+
+def _cache_get(key: str) -> Optional[list[str]]:
+    if get_settings().RAG_QUERY_CACHE_TTL <= 0:
+        return None
+    try:
+        raw = get_redis().get(key)
+    except Exception:
+        raw = None
+    incr_counter(QUERY_CACHE_METRIC, "hit" if raw else "miss")
+    return json.loads(raw) if raw else None
+
+
+def _cache_put(key: str, results: list[str]) -> None:
+    ttl = get_settings().RAG_QUERY_CACHE_TTL
+    if ttl <= 0 or not results:  # empty results may be an outage; don't pin them
+        return
+    try:
+        get_redis().set(key, json.dumps(results), ex=ttl)
+    except Exception:
+        pass
+
+
+def invalidate_query_cache(collection_name: str) -> None:
+    """Drop cached results for a collection / payer partition after its documents change."""
     try:
-        if payer_name and payer_name.strip():
-            # Filter by metadata after search (Chroma supports where)
-            docs = store.similarity_search(
-                query.strip(),
-                k=k * 2,
-                filter={"payer_name": payer_name.strip()},
-            )
-        else:
-            docs = store.similarity_search(query.strip(), k=k)
-        return [d.page_content for d in docs[:k]]
+        r = get_redis()
+        keys = list(r.scan_iter(match=f"{_QUERY_CACHE_PREFIX}{collection_name}:*", count=500))
+        for start in range(0, len(keys), 500):
+            r.delete(*keys[start:start + 500])
     except Exception:
-        try:
-            docs = store.similarity_search(query.strip(), k=k)
-            return [d.page_content for d in docs]
-        except Exception:
-            return []
+        pass  # entries expire with RAG_QUERY_CACHE_TTL
+
+
+def _cached_search(collection_name: str, query: str, k: int) -> list[str]:
+    key = _query_cache_key(collection_name, query, k)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    results = _search(collection_name, query, k)
+    _cache_put(key, results)
+    return results
+
+
+async def _acached_search(collection_name: str, query: str, k: int) -> list[str]:
+    """Async _cached_search; the Redis client is blocking, so cache reads and writes run in a worker thread."""
+    key = _query_cache_key(collection_name, query, k)
+    cached = await asyncio.to_thread(_cache_get, key)
+    if cached is not None:
+        return cached
+    results = await _asearch(collection_name, query, k)
+    await asyncio.to_thread(_cache_put, key, results)
+    return results
+
+
+def _policy_partitions(payer_name: Optional[str], payer_id: Optional[int] = None) -> list[str]:
+    """
+    The payer's own partitions (by id, then by name for policies filed without the id), then
+    policies that apply to every payer.
+    """
+    partitions = [policy_partition(payer_name, payer_id)]
+    if payer_id and payer_key(payer_name):
+        partitions.append(policy_partition(payer_name))
+    if _partition_key(payer_name, payer_id):
+        partitions.append(policy_partition())
+    return partitions
+
+
+def query_denial_codes(query: str, k: int = 5) -> list[str]:
+    """Return top-k relevant denial code snippets for the query (code or free text)."""
+    query = (query or "").strip()
+    return _cached_search(DENIAL_CODES_COLLECTION, query, k) if query else []
+
+
+def query_payer_policies(
+    query: str,
+    payer_name: Optional[str] = None,
+    k: int = 5,
+    payer_id: Optional[int] = None,
+) -> list[str]:
+    """
+    Return top-k relevant payer policy snippets: the payer's partition first (by payer_id when
+    given, else by name), topped up from general policies. Other payers' policies are never searched.
+    """
+    query = (query or "").strip()
+    results: list[str] = []
+    for partition in _policy_partitions(payer_name, payer_id) if query else []:
+        results.extend(_cached_search(partition, query, k - len(results)))
+        if len(results) >= k:
+            break
+    return results[:k]
+
+
+async def aquery_denial_codes(query: str, k: int = 5) -> list[str]:
+    """Async query_denial_codes (for the async post-call workflow)."""
+    query = (query or "").strip()
+    return await _acached_search(DENIAL_CODES_COLLECTION, query, k) if query else []
+
+
+async def aquery_payer_policies(
+    query: str,
+    payer_name: Optional[str] = None,
+    k: int = 5,
+    payer_id: Optional[int] = None,
+) -> list[str]:
+    """Async query_payer_policies (for the async post-call workflow)."""
+    query = (query or "").strip()
+    results: list[str] = []
+    for partition in _policy_partitions(payer_name, payer_id) if query else []:
+        results.extend(await _acached_search(partition, query, k - len(results)))
+        if len(results) >= k:
+            break
+    return results[:k]
+
+
+def _legacy_policy_entry(text: str, meta: Optional[dict], payer_ids: dict[str, int]) -> dict:
+    meta = meta or {}
+    payer_name = meta.get("payer_name") or ""
+    payer_id = meta.get("payer_id") or payer_ids.get(payer_key(payer_name))
+    return {"payer_name": payer_name, "payer_id": payer_id, "text": text}
+
+
+def repartition_legacy_payer_policies(
+    drop_legacy: bool = False, payer_ids: Optional[dict[str, int]] = None
+) -> IngestStats:
+    """
+    Move policies from the single pre-partitioning collection (and its BM25 index) into per-payer
+    partitions. payer_ids maps normalized payer names to Payer.id, so policies stored with only a
+    name are filed under the payer's id; names not in it keep a name partition. Embeddings come from
+    the on-disk cache, so texts already embedded aren't paid for again.
+    """
+    payer_ids = payer_ids or {}
+    entries: dict[str, dict] = {}
+    legacy_store = _get_store(PAYER_POLICIES_COLLECTION)
+    if legacy_store is not None:
+        data = legacy_store.get(include=["documents", "metadatas"])
+        for text, meta in zip(data.get("documents") or [], data.get("metadatas") or []):
+            entries[text] = _legacy_policy_entry(text, meta, payer_ids)
+    legacy_bm25 = get_bm25_index(PAYER_POLICIES_COLLECTION)
+    for doc in legacy_bm25.docs.values():
+        entries.setdefault(doc["text"], _legacy_policy_entry(doc["text"], doc["metadata"], payer_ids))
+    stats = ingest_payer_policies(list(entries.values()))
+    if drop_legacy:
+        if legacy_store is not None:
+            legacy_store.delete_collection()
+            with _lock:
+                _stores.pop(PAYER_POLICIES_COLLECTION, None)
+        delete_bm25_index(PAYER_POLICIES_COLLECTION)
+    return stats
@@ -0,0 +1,227 @@
+"""
+Pooled SMTP connections for outgoing mail.
+A connection is opened, upgraded with STARTTLS and authenticated once, then reused for many
+messages. It is replaced when it has been idle longer than SMTP_POOL_MAX_IDLE, has sent
+SMTP_MAX_MESSAGES_PER_CONNECTION messages, or breaks mid-send (the message is retried once on a
+fresh connection). One pool per process (dropped after fork, like the Redis pool).
+"""
+
+import atexit
+import os
+import smtplib
+import threading
+import time
+from typing import Any, Optional
+
+from ..core.config import get_settings
+
+# The server rejected this message; the connection itself is fine, so don't reconnect or retry
+_MESSAGE_REJECTED = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def _close(smtp: Any) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        try:
+            smtp.close()
+        except Exception:
+            pass
+
+
+class _Connection:
+    __slots__ = ("smtp", "last_used", "sent")
+
+    def __init__(self, smtp: Any):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+
+class SMTPPool:
+    """At most `size` authenticated connections; idle ones are kept for reuse (most recently used first)."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        size: int = 2,
+        max_idle: float = 60.0,
+        max_messages: int = 100,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.max_idle = max_idle
+        self.max_messages = max(1, max_messages)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._lock = threading.Lock()
+        self._idle: list[_Connection] = []
+        self.last_error = ""
+        self.stats = {"connects": 0, "reused": 0, "reconnects": 0, "sent": 0, "failed": 0}
+
+    def _connect(self) -> _Connection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            _close(smtp)
+            raise
+        with self._lock:
+            self.stats["connects"] += 1
+        return _Connection(smtp)
+
+    def _checkout(self) -> _Connection:
+        now = time.monotonic()
+        stale: list[_Connection] = []
+        reused: Optional[_Connection] = None
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if now - conn.last_used <= self.max_idle:
+                    self.stats["reused"] += 1
+                    reused = conn
+                    break
+                stale.append(conn)  # the server has likely dropped it already
+        for conn in stale:  # QUIT can take up to the timeout; not while holding the lock
+            _close(conn.smtp)
+        return reused or self._connect()
+
+    def _checkin(self, conn: _Connection) -> None:
+        if conn.sent >= self.max_messages:
+            _close(conn.smtp)
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def send_many(self, messages: list[tuple[str, list[str], str]]) -> list[bool]:
+        """
+        Send (from_addr, to_addrs, message) tuples over one pooled connection, in order.
+        Returns one bool per message. If the server can't be reached, the rest of the batch fails fast.
+        """
+        results: list[bool] = []
+        with self._slots:
+            conn: Optional[_Connection] = None
+            try:
+                for i, (from_addr, to_addrs, message) in enumerate(messages):
+                    ok = False
+                    for attempt in range(2):
+                        if conn is not None and conn.sent >= self.max_messages:
+                            _close(conn.smtp)
+                            conn = None
+                        try:
+                            if conn is None:
+                                conn = self._checkout()
+                        except Exception as e:
+                            self.last_error = f"{type(e).__name__}: {e}"
+                            break  # can't connect
+                        try:
+                            conn.smtp.sendmail(from_addr, to_addrs, message)
+                            conn.sent += 1
+                            ok = True
+                            break
+                        except _MESSAGE_REJECTED as e:
+                            self.last_error = f"{type(e).__name__}: {e}"
+                            break
+                        except Exception as e:
+                            self.last_error = f"{type(e).__name__}: {e}"
+                            _close(conn.smtp)  # broken (dropped while idle, timeout); retry on a new one
+                            conn = None
+                            if not attempt:
+                                with self._lock:
+                                    self.stats["reconnects"] += 1
+                    results.append(ok)
+                    with self._lock:
+                        self.stats["sent" if ok else "failed"] += 1
+                    if not ok and conn is None:
+                        results.extend([False] * (len(messages) - i - 1))
+                        with self._lock:
+                            self.stats["failed"] += len(messages) - i - 1
+                        break
+            finally:
+                if conn is not None:
+                    self._checkin(conn)
+        return results
+
+    def send(self, from_addr: str, to_addrs: list[str], message: str) -> bool:
+        return self.send_many([(from_addr, to_addrs, message)])[0]
+
+    def close(self) -> None:
+        """QUIT every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close(conn.smtp)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"host": self.host, "idle": len(self._idle), **self.stats}
+
+
+_pool: Optional[SMTPPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """Forget the parent's connections in a forked child without closing them (the parent still owns the sockets)."""
+    global _pool, _pool_pid
+    _pool = None
+    _pool_pid = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _close_pool() -> None:
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close()
+
+
+atexit.register(_close_pool)
+
+
+def get_smtp_pool() -> SMTPPool:
+    """The process-wide pool for the configured SMTP server."""
+    global _pool, _pool_pid
+    pool = _pool
+    if pool is not None and _pool_pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            s = get_settings()
+            _pool = SMTPPool(
+                s.SMTP_HOST,
+                s.SMTP_PORT,
+                user=s.SMTP_USER,
+                password=s.SMTP_PASSWORD,
+                use_tls=s.SMTP_USE_TLS,
+                size=s.SMTP_POOL_SIZE,
+                max_idle=s.SMTP_POOL_MAX_IDLE,
+                max_messages=s.SMTP_MAX_MESSAGES_PER_CONNECTION,
+                timeout=s.SMTP_TIMEOUT,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def smtp_stats() -> dict:
+    """Connections opened vs reused and messages sent/failed in this process."""
+    pool = _pool
+    if pool is None or _pool_pid != os.getpid():
+        return {}
+    return pool.info()
@@ -0,0 +1,159 @@
+"""
+Local SMTP stand-in for development, benchmarks and tests. It accepts every message and keeps it
+in memory; there is no TLS and any AUTH succeeds. Point the app at it with
+SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_USE_TLS=false.
+  cd backend && python -m app.services.smtp_sink [--port 1025]
+In code:
+  with SMTPSink() as sink:  # random free port: sink.port
+      ...
+      sink.messages  # [{"from", "to", "data"}]
+"""
+
+import argparse
+import socketserver
+import threading
+from typing import Optional
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, *lines: str) -> None:
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode("utf-8"))
+
+    def _readline(self) -> Optional[str]:
+        raw = self.rfile.readline(65536)
+        return raw.decode("utf-8", errors="replace").rstrip("\r\n") if raw else None
+
+    def _read_data(self) -> str:
+        lines = []
+        while True:
+            line = self._readline()
+            if line is None or line == ".":
+                break
+            lines.append(line[1:] if line.startswith("..") else line)  # undo dot-stuffing
+        return "\r\n".join(lines)
+
+    def handle(self) -> None:
+        sink: "SMTPSink" = self.server.sink  # type: ignore[attr-defined]
+        sink._count("connections")
+        self._reply("220 localhost SMTP sink ready")
+        mail_from, rcpt_to = "", []
+        while True:
+            line = self._readline()
+            if line is None:
+                return
+            verb, _, arg = line.partition(" ")
+            verb = verb.upper()
+            if verb == "EHLO":
+                self._reply("250-localhost", "250-AUTH PLAIN LOGIN", "250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "AUTH":
+                if arg.upper().startswith("LOGIN"):
+                    self._reply("334 VXNlcm5hbWU6")
+                    self._readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self._readline()
+                elif arg.upper() == "PLAIN":
+                    self._reply("334 ")
+                    self._readline()
+                sink._count("logins")
+                self._reply("235 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = arg.partition(":")[2].strip().strip("<>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(arg.partition(":")[2].strip().strip("<>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                sink._store({"from": mail_from, "to": list(rcpt_to), "data": self._read_data()})
+                mail_from, rcpt_to = "", []
+                self._reply("250 OK")
+            elif verb == "RSET":
+                mail_from, rcpt_to = "", []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif verb == "STARTTLS":
+                self._reply("454 TLS not available")
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """In-process SMTP server on a background thread; records messages, connections and logins."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.messages: list[dict] = []
+        self.connections = 0
+        self.logins = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.sink = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _store(self, message: dict) -> None:
+        with self._lock:
+            self.messages.append(message)
+
+    def start(self) -> "SMTPSink":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SMTPSink":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local SMTP sink: accepts and prints every message.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    sink = SMTPSink(args.host, args.port)
+    print(f"SMTP sink on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    seen = 0
+    try:
+        sink.start()
+        while True:
+            sink._thread.join(1.0)
+            for message in sink.messages[seen:]:
+                subject = next((l[9:] for l in message["data"].splitlines() if l.startswith("Subject: ")), "")
+                print(f"{message['from']} -> {', '.join(message['to'])}: {subject}")
+            seen = len(sink.messages)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""
+Micro-batching for high-volume call status-update webhooks.
+Updates are buffered in-process for STATUS_BATCH_WINDOW seconds, then one transaction bulk-inserts
+the raw events into the webhook inbox (already done) and applies them with one set-based UPDATE,
+instead of an insert + lookup + commit per event. The UPDATE only moves a call forward
+(services.call_state ranks), so late or retried updates are no-ops. If that transaction fails the
+events are stored pending and the inbox applies them; a batch lost in a crash only delays the
+status: the end-of-call report still marks the call ended.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Integer, String, case, column, update, values
+
+from ..core.config import get_settings
+from ..database import SessionLocal
+from ..models import Call
+from ..models.webhook_event import WebhookEventStatus
+from .call_state import STATUS_RANK, status_rank
+from .webhook_processor import inbox_row, record_events
+
+
+def apply_status_batch(batch: dict[str, str], events: Optional[list[dict]] = None) -> int:
+    """
+    Apply {external_call_id: status} in one statement:
+    UPDATE calls SET status = v.status FROM (VALUES ...) v WHERE calls.external_id = v.external_id
+    AND rank(calls.status) < v.status_rank. The raw events (inbox rows, status done) are inserted
+    in the same transaction. Returns rows updated.
+    """
+    if not batch:
+        return 0
+    rows = [(external_id, status, status_rank(status)) for external_id, status in batch.items()]
+    incoming = values(
+        column("external_id", String),
+        column("status", String),
+        column("status_rank", Integer),
+        name="incoming",
+    ).data(rows)
+    current_rank = case(STATUS_RANK, value=Call.status, else_=0)
+    stmt = (
+        update(Call)
+        .where(Call.external_id == incoming.c.external_id)
+        .where(current_rank < incoming.c.status_rank)
+        .values(status=incoming.c.status, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db = SessionLocal()
+    try:
+        record_events(db, events or [])
+        result = db.execute(stmt)
+        db.commit()
+        return result.rowcount or 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def store_unapplied(events: list[dict]) -> None:
+    """Store the events of a batch that failed to apply as pending, for the inbox to apply."""
+    pending = [{**event, "status": WebhookEventStatus.PENDING, "processed_at": None} for event in events]
+    db = SessionLocal()
+    try:
+        record_events(db, pending)
+        db.commit()
+    except Exception:
+        db.rollback()  # the end-of-call report still marks the call ended
+    finally:
+        db.close()
+
+
+class StatusUpdateBatcher:
+    """Coalesces status updates per call (highest rank wins) and flushes them in batches."""
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[str, str] = {}
+        self._events: dict[str, dict] = {}  # inbox rows by dedupe key (provider retries collapse)
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def add(self, external_call_id: str, status: str, body: Optional[dict] = None) -> None:
+        current = self._pending.get(external_call_id)
+        if current is None or status_rank(status) > status_rank(current):
+            self._pending[external_call_id] = status
+        row = inbox_row(body, status=WebhookEventStatus.DONE) if body is not None else None
+        if row is not None:
+            self._events.setdefault(row["dedupe_key"], row)
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        events, self._events = list(self._events.values()), {}
+        try:
+            await asyncio.to_thread(apply_status_batch, batch, events)
+        except Exception:
+            await asyncio.to_thread(store_unapplied, events)
+
+    async def close(self) -> None:
+        """Flush what's buffered (app shutdown)."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+
+
+_batcher: Optional[StatusUpdateBatcher] = None
+
+
+def get_status_batcher() -> StatusUpdateBatcher:
+    global _batcher
+    if _batcher is None:
+        s = get_settings()
+        _batcher = StatusUpdateBatcher(s.STATUS_BATCH_WINDOW, s.STATUS_BATCH_MAX_SIZE)
+    return _batcher
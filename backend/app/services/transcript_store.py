@@ -0,0 +1,181 @@
+"""
+Compressed storage for call transcripts and raw end-of-call artifacts.
+Kept off the calls table so dashboard aggregates and the Calls page poll never read them.
+
+Backends (TRANSCRIPT_STORE):
+- "database": compressed blobs inline in call_artifacts.
+- "filesystem": content-addressed blobs under TRANSCRIPT_STORE_DIR; call_artifacts keeps only sha256 refs.
+Rows record their own backend and codec, so switching backends keeps older rows readable.
+Compression is zstd when the zstandard package is installed, zlib otherwise.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models import CallArtifact
+
+DEFAULT_TRANSCRIPT_DIR = Path(__file__).resolve().parent.parent.parent / "transcript_data"
+
+
+class StoredArtifacts(NamedTuple):
+    transcript: Optional[str]
+    artifact: Optional[dict]
+
+
+def _import_zstd() -> Any:
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def compress(data: bytes) -> tuple[bytes, str]:
+    """Compress with zstd if available (else zlib). Returns (blob, codec)."""
+    zstd = _import_zstd()
+    if zstd:
+        return zstd.ZstdCompressor(level=get_settings().TRANSCRIPT_ZSTD_LEVEL).compress(data), "zstd"
+    return zlib.compress(data, 9), "zlib"
+
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        zstd = _import_zstd()
+        if not zstd:
+            raise RuntimeError("zstandard is required to read zstd-compressed transcripts")
+        return zstd.ZstdDecompressor().decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+class TranscriptStore:
+    """Where compressed blobs go. Subclasses implement _put/_get; metadata always lives in call_artifacts."""
+
+    name = ""
+
+    def _put(self, data: bytes) -> tuple[Optional[bytes], Optional[str], str]:
+        """Store data; returns (inline blob or None, ref or None, codec)."""
+        raise NotImplementedError
+
+    def _get(self, blob: Optional[bytes], ref: Optional[str], codec: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def save(
+        self,
+        db: Session,
+        call_id: int,
+        transcript: Optional[str],
+        artifact: Optional[dict] = None,
+    ) -> None:
+        """Write (or replace) the transcript/artifact for a call. Caller should commit."""
+        row = db.get(CallArtifact, call_id)
+        if row is None:
+            row = CallArtifact(call_id=call_id)
+            db.add(row)
+        row.backend = self.name
+        row.transcript_blob = row.transcript_ref = row.transcript_size = None
+        row.artifact_blob = row.artifact_ref = None
+        codec = None
+        if transcript:
+            data = transcript.encode("utf-8")
+            row.transcript_blob, row.transcript_ref, codec = self._put(data)
+            row.transcript_size = len(data)
+        if artifact:
+            # The transcript is stored on its own; don't keep a second copy inside the artifact
+            raw = {k: v for k, v in artifact.items() if k != "transcript"}
+            if raw:
+                data = json.dumps(raw, separators=(",", ":"), default=str).encode("utf-8")
+                row.artifact_blob, row.artifact_ref, codec = self._put(data)
+        row.codec = codec or "zlib"
+
+    def load(self, row: CallArtifact) -> StoredArtifacts:
+        transcript_bytes = self._get(row.transcript_blob, row.transcript_ref, row.codec)
+        artifact_bytes = self._get(row.artifact_blob, row.artifact_ref, row.codec)
+        return StoredArtifacts(
+            transcript=transcript_bytes.decode("utf-8") if transcript_bytes is not None else None,
+            artifact=json.loads(artifact_bytes) if artifact_bytes is not None else None,
+        )
+
+
+class DatabaseTranscriptStore(TranscriptStore):
+    """Compressed blobs inline in the call_artifacts side table."""
+
+    name = "database"
+
+    def _put(self, data: bytes) -> tuple[Optional[bytes], Optional[str], str]:
+        blob, codec = compress(data)
+        return blob, None, codec
+
+    def _get(self, blob: Optional[bytes], ref: Optional[str], codec: str) -> Optional[bytes]:
+        return decompress(blob, codec) if blob is not None else None
+
+
+class FilesystemTranscriptStore(TranscriptStore):
+    """Content-addressed compressed files: <dir>/<sha[:2]>/<sha[2:4]>/<sha>.<codec>. Identical content is stored once."""
+
+    name = "filesystem"
+
+    def _root(self) -> Path:
+        configured = get_settings().TRANSCRIPT_STORE_DIR
+        return Path(configured) if configured else DEFAULT_TRANSCRIPT_DIR
+
+    def _path(self, ref: str, codec: str) -> Path:
+        return self._root() / ref[:2] / ref[2:4] / f"{ref}.{codec}"
+
+    def _put(self, data: bytes) -> tuple[Optional[bytes], Optional[str], str]:
+        ref = hashlib.sha256(data).hexdigest()
+        blob, codec = compress(data)
+        path = self._path(ref, codec)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)  # atomic; concurrent writers of the same content are harmless
+        return None, ref, codec
+
+    def _get(self, blob: Optional[bytes], ref: Optional[str], codec: str) -> Optional[bytes]:
+        if not ref:
+            return None
+        return decompress(self._path(ref, codec).read_bytes(), codec)
+
+
+_STORES: dict[str, TranscriptStore] = {
+    DatabaseTranscriptStore.name: DatabaseTranscriptStore(),
+    FilesystemTranscriptStore.name: FilesystemTranscriptStore(),
+}
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Store for new writes, from TRANSCRIPT_STORE (database | filesystem)."""
+    name = (get_settings().TRANSCRIPT_STORE or "database").strip().lower()
+    if name not in _STORES:
+        raise ValueError(f"Unknown TRANSCRIPT_STORE: {name}")
+    return _STORES[name]
+
+
+def save_call_artifacts(
+    db: Session,
+    call_id: int,
+    transcript: Optional[str],
+    artifact: Optional[dict] = None,
+) -> None:
+    """Compress and store a call's transcript and raw artifact. Caller should commit."""
+    if not transcript and not artifact:
+        return
+    get_transcript_store().save(db, call_id, transcript, artifact)
+
+
+def load_call_artifacts(db: Session, call_id: int) -> StoredArtifacts:
+    """Load and decompress a call's transcript and raw artifact (only the call detail view needs these)."""
+    row = db.get(CallArtifact, call_id)
+    if row is None:
+        return StoredArtifacts(transcript=None, artifact=None)
+    return _STORES[row.backend].load(row)
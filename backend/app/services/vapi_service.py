@@ -69,6 +69,17 @@ async def create_outbound_call(
         return response.json()
 
 
+def is_provider_error(exc: BaseException) -> bool:
+    """
+    True if the exception means the provider itself is unhealthy (timeouts, connection errors,
+    5xx, 429). Config errors and 4xx rejections of a single request do not count against the breaker.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
 def _normalize_phone(phone: str) -> str:
     """Ensure phone has +1 for US numbers if missing."""
     phone = phone.strip().replace(" ", "").replace("-", "")
@@ -0,0 +1,311 @@
+"""
+Webhook inbox: provider events are stored raw and acknowledged immediately; a Celery consumer
+applies them later. Events for the same call are applied one at a time, in arrival order
+(per-call Redis lock + id order), so the post-call workflow's LLM/RAG/SMTP latency never reaches
+the webhook response and never races another event for the same call.
+
+Provider retries are dropped at ingestion (unique dedupe key), call status only moves forward
+(services.call_state), and the post-call workflow runs at most once per call (post_call_processed_at).
+"""
+
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.redis_client import get_redis
+from ..models import Call, Claim, WebhookEvent
+from ..models.webhook_event import WebhookEventStatus
+from .call_state import PROVIDER_STATUS_MAP, advance_status
+from .transcript_store import save_call_artifacts
+
+HANDLED_EVENT_TYPES = ("status-update", "end-of-call-report")
+
+_LOCK_PREFIX = "webhook:call_lock:"
+
+# Delete the lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+class CallLockBusy(Exception):
+    """Another worker is applying events for this call."""
+
+
+class CallNotFound(Exception):
+    """The event arrived before our Call row was committed (or is for a call we don't know)."""
+
+
+def call_id_from_message(msg: dict) -> Optional[str]:
+    call_obj = msg.get("call") or {}
+    external_id = call_obj.get("id") or call_obj.get("callId")
+    if isinstance(external_id, dict):
+        external_id = external_id.get("id")
+    return str(external_id) if external_id else None
+
+
+def event_dedupe_key(body: dict, provider: str = "vapi", event_id: Optional[str] = None) -> str:
+    """Provider event id when there is one, else a hash of the canonical body (retries resend the same body)."""
+    msg = body.get("message") or body
+    event_id = event_id or msg.get("id") or msg.get("eventId") or body.get("id")
+    if event_id:
+        source = f"{provider}:id:{event_id}"
+    else:
+        source = f"{provider}:body:" + json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _insert_ignoring_duplicates(db: Session, values: dict | list[dict]) -> Any:
+    """INSERT ... ON CONFLICT (dedupe_key) DO NOTHING statement for one row or many."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(WebhookEvent.__table__).values(values).on_conflict_do_nothing(index_elements=["dedupe_key"])
+
+
+def inbox_row(
+    body: dict,
+    provider: str = "vapi",
+    event_id: Optional[str] = None,
+    status: str = WebhookEventStatus.PENDING,
+) -> Optional[dict]:
+    """Column values for storing a raw webhook body; None for events we don't process (unhandled type or no call id)."""
+    msg = body.get("message") or body
+    msg_type = msg.get("type", "")
+    external_id = call_id_from_message(msg)
+    if msg_type not in HANDLED_EVENT_TYPES or not external_id:
+        return None
+    now = datetime.now(timezone.utc)
+    return {
+        "provider": provider,
+        "event_type": msg_type,
+        "external_call_id": external_id,
+        "dedupe_key": event_dedupe_key(body, provider, event_id),
+        "payload": body,
+        "status": status,
+        "attempts": 0,
+        "processed_at": now if status == WebhookEventStatus.DONE else None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def record_event(
+    db: Session,
+    body: dict,
+    provider: str = "vapi",
+    event_id: Optional[str] = None,
+) -> Optional[WebhookEvent]:
+    """
+    Store a raw webhook body in the inbox. Returns None for events we don't process
+    (unhandled type or no call id) and for duplicates of an event already stored. Caller should commit.
+    """
+    row = inbox_row(body, provider, event_id)
+    if row is None:
+        return None
+    stmt = _insert_ignoring_duplicates(db, row).returning(WebhookEvent.__table__.c.id)
+    new_id = db.execute(stmt).scalar_one_or_none()
+    return db.get(WebhookEvent, new_id) if new_id is not None else None
+
+
+def record_events(db: Session, rows: list[dict]) -> None:
+    """Store many inbox_row()s in one INSERT; rows already stored (same dedupe key) are skipped. Caller should commit."""
+    if rows:
+        db.execute(_insert_ignoring_duplicates(db, rows))
+
+
+def _map_ended_reason(reason: str) -> str:
+    """Map Vapi endedReason to our CallOutcome."""
+    reason = (reason or "").lower()
+    if "hangup" in reason or "completed" in reason:
+        return "resolved"
+    if "no-answer" in reason or "no_answer" in reason or "busy" in reason:
+        return "no_answer"
+    if "failed" in reason or "error" in reason:
+        return "failed"
+    return "resolved"
+
+
+def _apply_status_update(db: Session, call_record: Call, msg: dict) -> None:
+    # Stale transitions (e.g. in-progress delivered after ended) are ignored
+    advance_status(call_record, PROVIDER_STATUS_MAP.get(msg.get("status", "")))
+
+
+def _apply_end_of_call_report(db: Session, call_record: Call, msg: dict) -> bool:
+    """Write the report's call state. Returns True if the post-call workflow still has to run."""
+    advance_status(call_record, "ended")
+    if call_record.post_call_processed_at is not None:
+        return False  # report already handled (provider retry with a different body)
+
+    artifact = msg.get("artifact") or {}
+    transcript = artifact.get("transcript", "")
+    ended_reason = msg.get("endedReason", "unknown")
+
+    save_call_artifacts(db, call_record.id, transcript or None, artifact)
+    call_record.outcome = _map_ended_reason(ended_reason)
+
+    # Try to get duration from call object
+    call_obj = msg.get("call") or {}
+    duration = call_obj.get("duration") or call_obj.get("durationSeconds")
+    if duration is not None:
+        call_record.duration_seconds = int(duration)
+    return True
+
+
+def run_post_call(db: Session, event: WebhookEvent) -> bool:
+    """
+    Run the post-call workflow for an end-of-call report whose call state is already committed.
+    No row lock is held while the LLM/RAG/SMTP steps run (the per-call Redis lock keeps other
+    workers off the call); post_call_processed_at is claimed with a conditional UPDATE at the end,
+    so the workflow's writes commit at most once. Returns False if another run got there first
+    (the caller should roll back). Caller should commit.
+    """
+    from ..workflows import run_post_call_workflow
+
+    msg = event.payload.get("message") or event.payload
+    call_record = db.query(Call).filter(Call.external_id == event.external_call_id).first()
+    if not call_record:
+        raise CallNotFound(event.external_call_id)
+    if call_record.post_call_processed_at is not None:
+        return False
+
+    artifact = msg.get("artifact") or {}
+    # Post-call workflow: extract → apply to claim → optionally schedule follow-up
+    claim = db.get(Claim, call_record.claim_id)
+    payer = claim.payer if claim else None
+    run_post_call_workflow(
+        db=db,
+        call_record=call_record,
+        transcript=artifact.get("transcript", "") or "",
+        ended_reason=msg.get("endedReason", "unknown"),
+        denial_code=claim.denial_code if claim else None,
+        payer_name=payer.name if payer else None,
+        payer_id=payer.id if payer else None,
+    )
+    claimed = (
+        db.query(Call)
+        .filter(Call.id == call_record.id, Call.post_call_processed_at.is_(None))
+        .update({Call.post_call_processed_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    )
+    return bool(claimed)
+
+
+_HANDLERS = {
+    "status-update": _apply_status_update,
+    "end-of-call-report": _apply_end_of_call_report,
+}
+
+
+def apply_event(db: Session, event: WebhookEvent) -> bool:
+    """
+    Apply one stored event to the call's state. Caller should commit, which releases the row
+    lock, and then call run_post_call if this returns True.
+    """
+    msg = event.payload.get("message") or event.payload
+    # Row lock: nothing else updates this call until our transaction ends
+    call_record = (
+        db.query(Call)
+        .filter(Call.external_id == event.external_call_id)
+        .with_for_update()
+        .first()
+    )
+    if not call_record:
+        raise CallNotFound(event.external_call_id)
+    return bool(_HANDLERS[event.event_type](db, call_record, msg))
+
+
+def _mark_failed_attempt(db: Session, event_id: int, exc: Exception) -> bool:
+    """Record a failed attempt in its own transaction. Returns True if the event should be retried."""
+    s = get_settings()
+    event = db.get(WebhookEvent, event_id)
+    if event is None:
+        return False
+    event.attempts = (event.attempts or 0) + 1
+    event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    created_at = event.created_at or datetime.now(timezone.utc)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if isinstance(exc, CallNotFound):
+        # Give the dialer time to commit the Call row; after that the event isn't ours
+        if datetime.now(timezone.utc) - created_at > timedelta(seconds=s.WEBHOOK_ORPHAN_GRACE):
+            event.status = WebhookEventStatus.IGNORED
+            event.processed_at = datetime.now(timezone.utc)
+    elif event.attempts >= s.WEBHOOK_MAX_ATTEMPTS:
+        event.status = WebhookEventStatus.FAILED
+        event.processed_at = datetime.now(timezone.utc)
+    db.commit()
+    return event.status == WebhookEventStatus.PENDING
+
+
+def drain_call_events(db: Session, external_call_id: str) -> dict:
+    """
+    Apply every pending event for a call, oldest first, each in its own transaction (an
+    end-of-call report commits its call state first and runs the post-call workflow in a second one).
+    Stops at the first event that should be retried (so later events never jump ahead of it)
+    and raises its error; the caller retries with backoff. Raises CallLockBusy if another
+    worker holds the call.
+    """
+    s = get_settings()
+    r = get_redis()
+    lock_key = f"{_LOCK_PREFIX}{external_call_id}"
+    token = uuid.uuid4().hex
+    if not r.set(lock_key, token, nx=True, ex=s.WEBHOOK_LOCK_TIMEOUT):
+        raise CallLockBusy(external_call_id)
+    applied = 0
+    try:
+        while True:
+            event = (
+                db.query(WebhookEvent)
+                .filter(
+                    WebhookEvent.external_call_id == external_call_id,
+                    WebhookEvent.status == WebhookEventStatus.PENDING,
+                )
+                .order_by(WebhookEvent.id)
+                .first()
+            )
+            if event is None:
+                break
+            event_id = event.id
+            try:
+                if apply_event(db, event):
+                    db.commit()  # call state is in; the workflow runs without the row lock
+                    if not run_post_call(db, event):
+                        db.rollback()
+                event.status = WebhookEventStatus.DONE
+                event.processed_at = datetime.now(timezone.utc)
+                event.last_error = None
+                db.commit()
+                applied += 1
+            except Exception as exc:
+                db.rollback()
+                if _mark_failed_attempt(db, event_id, exc):
+                    raise
+    finally:
+        try:
+            r.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception:
+            pass  # lock expires on its own
+    return {"applied": applied}
+
+
+def stale_pending_call_ids(db: Session, older_than_seconds: float, limit: int = 500) -> list[str]:
+    """Calls with pending events nobody has touched for a while (lost task, broker outage)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_seconds)
+    rows = (
+        db.query(WebhookEvent.external_call_id)
+        .filter(
+            WebhookEvent.status == WebhookEventStatus.PENDING,
+            WebhookEvent.updated_at < cutoff,
+        )
+        .distinct()
+        .limit(limit)
+        .all()
+    )
+    return [external_id for (external_id,) in rows if external_id]
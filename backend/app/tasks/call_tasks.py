@@ -1,15 +1,23 @@
 """Celery tasks for call queue and scheduled calls."""
 
 import asyncio
+import time
 from datetime import datetime, timezone
 
 from app.celery_app import celery_app
+from celery.exceptions import Retry
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import get_settings
+from app.core.redis_client import get_redis, pipeline
 from app.models import Claim, Payer, Call, ScheduledCall
-from app.services.vapi_service import create_outbound_call
+from app.models.claim import ClaimStatus
+from app.services.vapi_service import create_outbound_call, is_provider_error
+from app.services import call_priority
+from app.services.call_priority import cancelled_since, enqueue_claims, pop_next
+from app.services import follow_up_queue
+from app.services.circuit_breaker import CircuitOpenError, jittered_backoff, telephony_breaker
 from app.agents.call_context import build_call_system_prompt, build_first_message
 
 settings = get_settings()
@@ -24,10 +32,8 @@ RATE_LIMIT_MAX_CALLS_PER_PAYER = 2
 def _check_rate_limit(payer_id: int) -> bool:
     """Check if we can call this payer (rate limit). Returns True if allowed."""
     try:
-        import redis
-        r = redis.from_url(settings.REDIS_URL)
         key = f"call_rate:payer:{payer_id}"
-        current = r.get(key)
+        current = get_redis().get(key)
         if current is None:
             return True
         if int(current) >= RATE_LIMIT_MAX_CALLS_PER_PAYER:
@@ -40,22 +46,27 @@ def _check_rate_limit(payer_id: int) -> bool:
 def _increment_rate_limit(payer_id: int) -> None:
     """Increment rate limit counter for payer."""
     try:
-        import redis
-        r = redis.from_url(settings.REDIS_URL)
         key = f"call_rate:payer:{payer_id}"
-        pipe = r.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, RATE_LIMIT_WINDOW)
-        pipe.execute()
+        with pipeline() as pipe:
+            pipe.incr(key)
+            pipe.expire(key, RATE_LIMIT_WINDOW)
     except Exception:
         pass
 
 
+def _retry_countdown(retries: int) -> float:
+    """Adaptive retry delay for failed dials: exponential in the retry count, jittered."""
+    return jittered_backoff(retries, settings.CALL_RETRY_BASE_DELAY, settings.CALL_RETRY_MAX_DELAY)
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def initiate_call_for_claim(self, claim_id: int):
+def initiate_call_for_claim(self, claim_id: int, queued_at: float | None = None):
     """
     Initiate an outbound call for a claim. Runs in Celery worker.
-    Retries on failure with exponential backoff.
+    Retries on failure with exponential backoff. While the telephony circuit breaker is open
+    the task is re-enqueued for when it may close, without consuming a retry.
+    Skips the call if the claim was resolved, or its queued calls cancelled, since it was
+    dispatched at `queued_at` (the task may have waited in the broker or in retries).
     """
     db = Session()
     try:
@@ -66,6 +77,10 @@ def initiate_call_for_claim(self, claim_id: int):
         # Skip if already in progress
         if claim.status == "in_progress":
             return {"status": "skipped", "message": "Claim already in progress"}
+        if claim.status == ClaimStatus.RESOLVED:
+            return {"status": "skipped", "message": "Claim already resolved"}
+        if cancelled_since(claim.id, queued_at):
+            return {"status": "skipped", "message": "Follow-up cancelled"}
 
         payer = db.get(Payer, claim.payer_id)
         if not payer or not payer.phone:
@@ -75,27 +90,46 @@ def initiate_call_for_claim(self, claim_id: int):
         if not _check_rate_limit(payer.id):
             raise self.retry(countdown=120)  # Retry in 2 min when rate limited
 
-        claim_context = {
-            "system_prompt": build_call_system_prompt(claim, payer),
-            "first_message": build_first_message(claim, payer),
-        }
+        # Hold the queue while the provider is unhealthy instead of burning retries
+        try:
+            probe = telephony_breaker.before_call()
+        except CircuitOpenError as e:
+            initiate_call_for_claim.apply_async((claim_id, queued_at), countdown=e.retry_after)
+            return {"status": "deferred", "message": str(e), "retry_after": round(e.retry_after)}
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        recorded = False
         try:
-            result = loop.run_until_complete(
-                create_outbound_call(
-                    customer_phone=payer.phone,
-                    claim_context=claim_context,
-                    metadata={
-                        "claim_id": str(claim.id),
-                        "claim_number": claim.claim_number,
-                        "practice_id": str(claim.practice_id),
-                    },
+            claim_context = {
+                "system_prompt": build_call_system_prompt(claim, payer),
+                "first_message": build_first_message(claim, payer),
+            }
+
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                result = loop.run_until_complete(
+                    create_outbound_call(
+                        customer_phone=payer.phone,
+                        claim_context=claim_context,
+                        metadata={
+                            "claim_id": str(claim.id),
+                            "claim_number": claim.claim_number,
+                            "practice_id": str(claim.practice_id),
+                        },
+                    )
                 )
-            )
+            except Exception as exc:
+                if is_provider_error(exc):
+                    telephony_breaker.record_failure(type(exc).__name__)
+                    recorded = True
+                raise
+            finally:
+                loop.close()
+            telephony_breaker.record_success(probe)
+            recorded = True
         finally:
-            loop.close()
+            if not recorded:
+                telephony_breaker.release_probe(probe)  # no verdict on the provider; let the next dial probe
 
         external_id = result.get("id") or result.get("callId") or str(result)
         if isinstance(external_id, dict):
@@ -112,31 +146,125 @@ def initiate_call_for_claim(self, claim_id: int):
         db.commit()
 
         return {"status": "ok", "call_id": call.id, "external_id": str(external_id)}
+    except Retry:
+        raise
     except Exception as exc:
         db.rollback()
-        raise self.retry(exc=exc)
+        raise self.retry(exc=exc, countdown=_retry_countdown(self.request.retries))
     finally:
         db.close()
 
 
 @celery_app.task
-def process_scheduled_calls():
+def dispatch_call_queue():
     """
-    Find scheduled_calls with call_after <= now, enqueue initiate_call_for_claim for each,
-    then delete the scheduled row. Run periodically via Celery Beat (e.g. every minute).
+    Move the highest-priority queued claims to the call workers. Run by Celery Beat every few seconds.
+    Only tops the dial queue (CALL_TASK_QUEUE) up to CALL_DISPATCH_MAX_IN_FLIGHT, so the backlog stays
+    in the priority queue where a newly queued high-value claim can still jump ahead. Claims that
+    can't be published (broker down) go back into the priority queue.
     """
+    try:
+        waiting = get_redis().llen(settings.CALL_TASK_QUEUE)
+    except Exception:
+        return {"dispatched": 0}
+    popped = pop_next(settings.CALL_DISPATCH_MAX_IN_FLIGHT - int(waiting))
+    queued_at = time.time()
+    dispatched: list[int] = []
+    try:
+        for claim_id, _ in popped:
+            initiate_call_for_claim.delay(claim_id, queued_at)
+            dispatched.append(claim_id)
+    finally:
+        call_priority.ack(dispatched)
+        call_priority.requeue(popped[len(dispatched):])
+    return {"dispatched": len(dispatched)}
+
+
+def _claim_due_batch(db, batch_size: int, ids: list[int] | None = None) -> int:
+    """
+    Lock up to batch_size due scheduled_calls (FOR UPDATE SKIP LOCKED), queue their claims in one
+    pipeline, delete the rows and commit. Rows locked by another processor are skipped, so concurrent
+    processors never take the same row; re-queueing a claim is idempotent (sorted-set member = claim id).
+    Returns the number of rows processed.
+    """
+    q = db.query(ScheduledCall).filter(ScheduledCall.call_after <= datetime.now(timezone.utc))
+    if ids is not None:
+        q = q.filter(ScheduledCall.id.in_(ids))
+    batch = q.order_by(ScheduledCall.call_after).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not batch:
+        return 0
+    claims = db.query(Claim).filter(Claim.id.in_({row.claim_id for row in batch})).all()
+    enqueue_claims(db, claims)
+    db.query(ScheduledCall).filter(
+        ScheduledCall.id.in_([row.id for row in batch])
+    ).delete(synchronize_session=False)
+    db.commit()
+    return len(batch)
+
+
+@celery_app.task
+def pump_follow_up_queue():
+    """
+    Move due follow-ups from the Redis delay queue to the call queue. Run by Celery Beat every second.
+    Popped ids whose row is gone (cancelled/already processed) are ignored; ids whose row was moved
+    later are re-indexed with the new time.
+    """
+    try:
+        if follow_up_queue.needs_rebuild():
+            reconcile_follow_up_queue.delay()
+        ids = follow_up_queue.pop_due(settings.SCHEDULED_CALLS_BATCH_SIZE)
+    except Exception:
+        return {"processed": 0}
+    if not ids:
+        return {"processed": 0}
     db = Session()
     try:
-        now = datetime.now(timezone.utc)
-        due = (
-            db.query(ScheduledCall)
-            .filter(ScheduledCall.call_after <= now)
+        processed = _claim_due_batch(db, len(ids), ids=ids)
+        # Rescheduled to a later time since it was indexed: put it back with the current time
+        later = dict(
+            db.query(ScheduledCall.id, ScheduledCall.call_after)
+            .filter(ScheduledCall.id.in_(ids), ScheduledCall.call_after > datetime.now(timezone.utc))
             .all()
         )
-        for row in due:
-            initiate_call_for_claim.delay(row.claim_id)
-            db.delete(row)
-        db.commit()
-        return {"processed": len(due)}
+        follow_up_queue.add(later)
+        return {"processed": processed}
+    except Exception:
+        db.rollback()
+        follow_up_queue.requeue_now(ids)
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task
+def reconcile_follow_up_queue():
+    """Rebuild the Redis delay queue from scheduled_calls (after a Redis restart; also periodically)."""
+    db = Session()
+    try:
+        return follow_up_queue.reconcile(db)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def process_scheduled_calls():
+    """
+    Find scheduled_calls with call_after <= now, add their claims to the priority call queue,
+    then delete the scheduled rows. Full sweep of the table in bounded SKIP LOCKED batches; the
+    delay-queue pump is the normal path, this is for manual catch-up.
+    """
+    batch_size = settings.SCHEDULED_CALLS_BATCH_SIZE
+    processed = 0
+    db = Session()
+    try:
+        for _ in range(settings.SCHEDULED_CALLS_MAX_BATCHES):
+            count = _claim_due_batch(db, batch_size)
+            processed += count
+            if count < batch_size:
+                break
+        return {"processed": processed}
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
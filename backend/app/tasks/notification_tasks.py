@@ -0,0 +1,19 @@
+"""Celery tasks for claimer notification digests."""
+
+from app.celery_app import celery_app
+
+from app.database import SessionLocal as Session
+from app.services.notification_digest import send_due_digests
+
+
+@celery_app.task
+def send_notification_digests():
+    """Send one summary email per practice whose digest is due (interval elapsed or size threshold). Run by Celery Beat."""
+    db = Session()
+    try:
+        return send_due_digests(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
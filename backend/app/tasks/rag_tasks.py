@@ -0,0 +1,26 @@
+"""Celery tasks for RAG ingestion of uploaded files."""
+
+from app.celery_app import celery_app
+
+from app.services.rag_ingest import cleanup_uploads, run_ingest_job
+
+
+@celery_app.task
+def ingest_rag_file(job_id: int):
+    """Stream an uploaded CSV / JSONL / text file into the RAG indexes in batches (progress on the job row)."""
+    return run_ingest_job(job_id)
+
+
+@celery_app.task
+def cleanup_rag_uploads():
+    """Delete uploads no job needs any more (failed ones after RAG_UPLOAD_RETENTION_HOURS). Run by Celery Beat hourly."""
+    return cleanup_uploads()
+
+
+def enqueue_rag_ingest(job_id: int) -> bool:
+    """Queue the job on Celery. False if the broker is unreachable (caller runs it in-process)."""
+    try:
+        ingest_rag_file.delay(job_id)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,54 @@
+"""Celery tasks that drain the webhook inbox."""
+
+from app.celery_app import celery_app
+
+from app.core.config import get_settings
+from app.database import SessionLocal as Session
+from app.services.circuit_breaker import jittered_backoff
+from app.services.webhook_processor import CallLockBusy, drain_call_events, stale_pending_call_ids
+
+settings = get_settings()
+
+
+@celery_app.task(bind=True, max_retries=None)
+def process_call_webhooks(self, external_call_id: str):
+    """
+    Apply pending webhook events for one call, in arrival order. Failed events are retried with
+    jittered backoff; each event gives up on its own after WEBHOOK_MAX_ATTEMPTS.
+    """
+    db = Session()
+    try:
+        return drain_call_events(db, external_call_id)
+    except CallLockBusy:
+        # Another worker is on this call; come back shortly for anything it misses
+        process_call_webhooks.apply_async((external_call_id,), countdown=settings.WEBHOOK_LOCK_RETRY_DELAY)
+        return {"applied": 0, "status": "busy"}
+    except Exception as exc:
+        db.rollback()
+        countdown = jittered_backoff(
+            self.request.retries, settings.WEBHOOK_RETRY_BASE_DELAY, settings.WEBHOOK_RETRY_MAX_DELAY
+        )
+        raise self.retry(exc=exc, countdown=countdown)
+    finally:
+        db.close()
+
+
+def enqueue_call_webhooks(external_call_id: str) -> None:
+    """Schedule processing for a call's inbox. The sweeper covers broker outages."""
+    try:
+        process_call_webhooks.delay(external_call_id)
+    except Exception:
+        pass
+
+
+@celery_app.task
+def sweep_webhook_inbox():
+    """Re-enqueue calls whose pending events have sat untouched (lost task, broker outage). Run by Celery Beat."""
+    db = Session()
+    try:
+        call_ids = stale_pending_call_ids(db, settings.WEBHOOK_SWEEP_AFTER)
+    finally:
+        db.close()
+    for external_call_id in call_ids:
+        process_call_webhooks.delay(external_call_id)
+    return {"enqueued": len(call_ids)}
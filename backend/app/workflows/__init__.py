@@ -3,6 +3,6 @@ Workflows orchestrate multi-step business logic (e.g. post-call processing).
 Built with LangGraph for clear state and conditional steps.
 """
 
-from .post_call_workflow import run_post_call_workflow
+from .post_call_workflow import arun_post_call_workflow, run_post_call_workflow
 
-__all__ = ["run_post_call_workflow"]
+__all__ = ["arun_post_call_workflow", "run_post_call_workflow"]
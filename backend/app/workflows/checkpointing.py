@@ -0,0 +1,218 @@
+"""
+Checkpointing and run history for workflows.
+
+Checkpointer (LangGraph) is chosen from WORKFLOW_CHECKPOINT_URL, defaulting to DATABASE_URL:
+- postgresql://… → AsyncPostgresSaver (langgraph-checkpoint-postgres)
+- sqlite:///path → AsyncSqliteSaver (langgraph-checkpoint-sqlite), for local use
+- "memory" → in-process MemorySaver (resumes only within one worker)
+If the saver for a postgres/sqlite URL can't be imported, an explicit WORKFLOW_CHECKPOINT_URL is an
+error; the DATABASE_URL default falls back to MemorySaver with a RuntimeWarning.
+
+Run history: per-node timings are collected during a run and written to workflow_node_runs in a
+separate session, so they survive a rollback of the workflow's own transaction.
+"""
+
+import time
+import uuid
+import warnings
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from ..core.config import get_settings
+
+_memory_saver: Any = None
+_setup_done: set[str] = set()
+_warned: set[str] = set()
+
+# Node timings for the run in progress: list of dicts (node, status, started_at, duration_ms, error)
+_run_timings: ContextVar[Optional[list]] = ContextVar("workflow_run_timings", default=None)
+
+
+def _checkpoint_url() -> str:
+    s = get_settings()
+    url = (s.WORKFLOW_CHECKPOINT_URL or s.DATABASE_URL or "memory").strip()
+    # psycopg wants a plain libpq URL, not an SQLAlchemy driver URL
+    for prefix in ("postgresql+psycopg2://", "postgresql+psycopg://", "postgres://"):
+        if url.startswith(prefix):
+            url = "postgresql://" + url[len(prefix):]
+    return url
+
+
+def _get_memory_saver() -> Any:
+    global _memory_saver
+    if _memory_saver is None:
+        from langgraph.checkpoint.memory import MemorySaver
+        _memory_saver = MemorySaver()
+    return _memory_saver
+
+
+def _import_postgres_saver() -> Any:
+    try:
+        from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        return AsyncPostgresSaver
+    except ImportError:
+        return None
+
+
+def _import_sqlite_saver() -> Any:
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        return AsyncSqliteSaver
+    except ImportError:
+        return None
+
+
+def _saver_missing(url: str) -> None:
+    """Raise for an explicitly configured checkpointer; warn (once per URL) for the DATABASE_URL default."""
+    postgres = url.startswith("postgresql://")
+    kind = "Postgres" if postgres else "SQLite"
+    package = "langgraph-checkpoint-postgres and psycopg[binary]" if postgres else "langgraph-checkpoint-sqlite"
+    if get_settings().WORKFLOW_CHECKPOINT_URL.strip():
+        raise RuntimeError(f"WORKFLOW_CHECKPOINT_URL is a {kind} URL but its checkpointer can't be imported; install {package}")
+    if url not in _warned:
+        _warned.add(url)
+        warnings.warn(
+            f"{kind} checkpointer can't be imported (install {package}); workflow checkpoints are kept in memory "
+            "and won't survive a worker restart",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator[Any]:
+    """Checkpointer for one workflow run (connections are opened on the caller's event loop)."""
+    url = _checkpoint_url()
+    saver_cls = None
+    conn_string = url
+    if url.startswith("postgresql://"):
+        saver_cls = _import_postgres_saver()
+    elif url.startswith("sqlite"):
+        saver_cls = _import_sqlite_saver()
+        conn_string = url.split("///", 1)[-1] if "///" in url else ":memory:"
+    if saver_cls is None:
+        if url.startswith(("postgresql://", "sqlite")):
+            _saver_missing(url)
+        yield _get_memory_saver()
+        return
+    async with saver_cls.from_conn_string(conn_string) as saver:
+        if url not in _setup_done:
+            await saver.setup()  # creates the checkpoint tables (idempotent)
+            _setup_done.add(url)
+        yield saver
+
+
+def begin_run_timings() -> tuple[list, Any]:
+    """Start collecting node timings for this run; returns (timings, reset token)."""
+    timings: list = []
+    return timings, _run_timings.set(timings)
+
+
+def end_run_timings(token: Any) -> None:
+    _run_timings.reset(token)
+
+
+def record_node(node: str, status: str, started_at: datetime, duration_ms: float, error: Optional[str] = None) -> None:
+    timings = _run_timings.get()
+    if timings is not None:
+        timings.append({
+            "node": node,
+            "status": status,
+            "started_at": started_at,
+            "duration_ms": round(duration_ms, 3),
+            "error": error,
+        })
+
+
+def timed_node(name: str, fn: Callable[..., Awaitable[dict]]) -> Callable[..., Awaitable[dict]]:
+    """Wrap an async node so its wall time (and failure) lands in the run history."""
+
+    @wraps(fn)
+    async def wrapper(state: dict, config: Optional[dict] = None) -> dict:
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            result = await fn(state, config)
+        except Exception as exc:
+            record_node(name, "error", started_at, (time.perf_counter() - started) * 1000, f"{type(exc).__name__}: {exc}")
+            raise
+        status = "skipped" if isinstance(result, dict) and result.pop("_skipped", False) else "ok"
+        record_node(name, status, started_at, (time.perf_counter() - started) * 1000)
+        return result
+
+    return wrapper
+
+
+def save_run_history(workflow: str, thread_id: str, call_id: Optional[int], timings: list) -> Optional[str]:
+    """Persist a run's node timings in their own transaction. Returns the run id. Never raises."""
+    if not timings or not get_settings().WORKFLOW_RUN_HISTORY:
+        return None
+    from ..database import SessionLocal
+    from ..models import WorkflowNodeRun
+
+    run_id = str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        db.add_all([
+            WorkflowNodeRun(
+                workflow=workflow,
+                thread_id=thread_id,
+                run_id=run_id,
+                call_id=call_id or None,
+                node=t["node"],
+                status=t["status"],
+                started_at=t["started_at"],
+                duration_ms=t["duration_ms"],
+                error=(t["error"] or None) and t["error"][:2000],
+            )
+            for t in timings
+        ])
+        db.commit()
+        return run_id
+    except Exception:
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+def node_timing_summary(workflow: str, hours: float = 24) -> dict:
+    """Per-node run count, mean/max duration and error count over the last `hours`. Never raises."""
+    from sqlalchemy import case, func
+
+    from ..database import SessionLocal
+    from ..models import WorkflowNodeRun
+
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                WorkflowNodeRun.node,
+                func.count(WorkflowNodeRun.id),
+                func.avg(WorkflowNodeRun.duration_ms),
+                func.max(WorkflowNodeRun.duration_ms),
+                func.sum(case((WorkflowNodeRun.status == "error", 1), else_=0)),
+                func.sum(case((WorkflowNodeRun.status == "skipped", 1), else_=0)),
+            )
+            .filter(WorkflowNodeRun.workflow == workflow, WorkflowNodeRun.started_at >= since)
+            .group_by(WorkflowNodeRun.node)
+            .all()
+        )
+        return {
+            node: {
+                "runs": runs,
+                "avg_ms": round(float(avg or 0), 1),
+                "max_ms": round(float(max_ms or 0), 1),
+                "errors": int(errors or 0),
+                "skipped": int(skipped or 0),
+            }
+            for node, runs, avg, max_ms, errors, skipped in rows
+        }
+    except Exception:
+        return {}
+    finally:
+        db.close()
@@ -1,12 +1,20 @@
 """
-Post-call workflow: extract outcome → apply to claim → optionally schedule follow-up.
-Implemented as a LangGraph state graph for clarity and future extension.
+Post-call workflow: extract outcome → apply to claim → notify the claimer and, in parallel,
+decide/schedule a follow-up. Implemented as an async LangGraph state graph (ainvoke).
+Nodes that touch the DB session are coroutines so they all run on the event loop thread
+(the session isn't thread-safe); blocking I/O (SMTP) is pushed to worker threads.
+
+Runs are checkpointed per call (thread_id "post_call:<call_id>", see checkpointing.py). The DB
+writes of every node share the caller's transaction, so a retry re-runs them; nodes with external
+cost or side effects (LLM extraction, the claimer email) reuse their checkpointed output instead.
 """
 
+import asyncio
+import hashlib
 import re
 from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
-from typing import Any, Literal, Optional, TypedDict
+from typing import Any, Optional, TypedDict
 
 from langgraph.graph import END, StateGraph
 from sqlalchemy.orm import Session
@@ -16,11 +24,16 @@ _workflow_context: ContextVar[dict] = ContextVar("workflow_context", default={})
 
 from ..agents.outcome_extractor import (
     ExtractedOutcome,
-    extract_outcome_from_transcript,
+    aextract_outcome_from_transcript,
 )
-from ..models import Claim, ScheduledCall
+from ..models import Claim
 from ..services.claim_outcome import apply_extracted_to_claim, apply_ended_reason_to_claim
-from ..services.email_service import send_claim_call_notification
+from ..services.email_service import asend_claim_call_notification
+from ..services.notification_digest import queue_call_notification, uses_digest
+from ..services.follow_up_queue import schedule_follow_up
+from .checkpointing import begin_run_timings, end_run_timings, open_checkpointer, save_run_history, timed_node
+
+WORKFLOW_NAME = "post_call"
 
 
 class PostCallState(TypedDict, total=False):
@@ -32,11 +45,16 @@ class PostCallState(TypedDict, total=False):
     call_id: int
     denial_code: Optional[str]
     payer_name: Optional[str]
+    payer_id: Optional[int]
     extracted: Optional[dict]
     claim_updated: bool
     schedule_after: Optional[datetime]
     schedule_reason: Optional[str]
     claimer_notified: bool
+    claimer_notified_at: Optional[datetime]
+    claimer_notification_queued: bool  # digest practices: outcome queued, claimer_notified_at set when the digest goes out
+    transcript_hash: str
+    extract_done: bool  # extracted is final for this transcript_hash; a retry skips the LLM
     error: Optional[str]
 
 
@@ -48,26 +66,30 @@ FOLLOW_UP_KEYWORDS = re.compile(
 )
 
 
-def _extract_node(state: PostCallState, config: Optional[dict] = None) -> dict:
+async def _extract_node(state: PostCallState, config: Optional[dict] = None) -> dict:
     """Run LLM extraction; write result into state."""
     ctx = _workflow_context.get() or (config or {}).get("configurable", {})
     db: Session = ctx.get("db")
     if not db:
         return {"error": "No db in context"}
+    if state.get("extract_done"):
+        return {"_skipped": True}  # reused from the checkpoint of an earlier attempt
     transcript = (state.get("transcript") or "").strip()
     if not transcript:
-        return {"extracted": None}
-    extracted = extract_outcome_from_transcript(
+        return {"extracted": None, "extract_done": True}
+    extracted = await aextract_outcome_from_transcript(
         transcript,
         denial_code=state.get("denial_code"),
         payer_name=state.get("payer_name"),
+        ended_reason=state.get("ended_reason"),
+        payer_id=state.get("payer_id"),
     )
     if extracted:
-        return {"extracted": extracted.model_dump(), "error": None}
+        return {"extracted": extracted.model_dump(), "extract_done": True, "error": None}
     return {"extracted": None}
 
 
-def _apply_node(state: PostCallState, config: Optional[dict] = None) -> dict:
+async def _apply_node(state: PostCallState, config: Optional[dict] = None) -> dict:
     """Apply extracted outcome to claim and call record."""
     ctx = _workflow_context.get() or (config or {}).get("configurable", {})
     db: Session = ctx.get("db")
@@ -89,8 +111,11 @@ def _apply_node(state: PostCallState, config: Optional[dict] = None) -> dict:
         return {"claim_updated": True}
 
 
-def _notify_claimer_node(state: PostCallState, config: Optional[dict] = None) -> dict:
-    """Email the practice (claimer) with call outcome and set claim.claimer_notified_at."""
+async def _notify_claimer_node(state: PostCallState, config: Optional[dict] = None) -> dict:
+    """
+    Email the practice (claimer) with call outcome and set claim.claimer_notified_at, or, for a
+    practice in digest mode, queue the outcome for its next digest.
+    """
     ctx = _workflow_context.get() or (config or {}).get("configurable", {})
     db: Session = ctx.get("db")
     call_record = ctx.get("call_record")
@@ -102,21 +127,34 @@ def _notify_claimer_node(state: PostCallState, config: Optional[dict] = None) ->
     claim = db.get(Claim, claim_id)
     if not claim or not claim.payer:
         return {"claimer_notified": False}
+    if state.get("claimer_notified"):
+        # Sent by an earlier attempt whose transaction didn't commit: restore the marker, don't email twice
+        claim.claimer_notified_at = state.get("claimer_notified_at") or claim.claimer_notified_at
+        return {"_skipped": True}
     payer_name = getattr(claim.payer, "name", "") or "Payer"
     duration = getattr(call_record, "duration_seconds", None)
-    ok = send_claim_call_notification(
+    if uses_digest(db, claim.practice_id):
+        queued = queue_call_notification(
+            db,
+            claim,
+            payer_name,
+            extracted=state.get("extracted"),
+            call_duration_seconds=duration,
+            call_id=getattr(call_record, "id", None),
+        )
+        return {"claimer_notified": False, "claimer_notification_queued": queued}
+    ok = await asend_claim_call_notification(
         db,
         claim_id=claim_id,
         payer_name=payer_name,
         extracted=state.get("extracted"),
         call_duration_seconds=duration,
     )
-    return {"claimer_notified": ok}
+    return {"claimer_notified": ok, "claimer_notified_at": claim.claimer_notified_at if ok else None}
 
 
-def _decide_follow_up_node(state: PostCallState, config: Optional[dict] = None) -> dict:
-    """Set schedule_after and schedule_reason if follow-up is suggested."""
-    extracted = state.get("extracted")
+def _decide_follow_up(extracted: Optional[dict]) -> dict:
+    """schedule_after and schedule_reason if the outcome suggests a follow-up call, else {}."""
     if not extracted or not isinstance(extracted, dict):
         return {}
     next_steps = (extracted.get("next_steps") or "").strip()
@@ -137,84 +175,142 @@ def _decide_follow_up_node(state: PostCallState, config: Optional[dict] = None)
     return {"schedule_after": schedule_after, "schedule_reason": reason or "Follow-up per call outcome"}
 
 
-def _schedule_node(state: PostCallState, config: Optional[dict] = None) -> dict:
-    """Create ScheduledCall if schedule_after is set."""
+async def _follow_up_node(state: PostCallState, config: Optional[dict] = None) -> dict:
+    """
+    Decide whether a follow-up is suggested and, if so, create the ScheduledCall. One node, so it
+    runs in the same superstep as notify_claimer instead of waiting for the email.
+    """
     ctx = _workflow_context.get() or (config or {}).get("configurable", {})
     db: Session = ctx.get("db")
     if not db:
         return {}
+    decision = _decide_follow_up(state.get("extracted"))
     claim_id = state.get("claim_id")
-    schedule_after = state.get("schedule_after")
-    schedule_reason = state.get("schedule_reason")
-    if not claim_id or not schedule_after:
-        return {}
-    scheduled = ScheduledCall(
-        claim_id=claim_id,
-        call_after=schedule_after,
-        reason=schedule_reason,
-    )
-    db.add(scheduled)
-    return {}
-
-
-def _route_after_decide(state: PostCallState) -> Literal["schedule", "__end__"]:
-    if state.get("schedule_after"):
-        return "schedule"
-    return "__end__"
+    if not claim_id or not decision:
+        return decision
+    schedule_follow_up(db, claim_id, decision["schedule_after"], reason=decision["schedule_reason"])
+    return decision
 
 
 def _build_post_call_graph() -> Any:
-    """Build and compile the post-call workflow graph."""
+    """Build the post-call workflow graph (compiled per run with that run's checkpointer)."""
     graph = StateGraph(PostCallState)
-    graph.add_node("extract", _extract_node)
-    graph.add_node("apply", _apply_node)
-    graph.add_node("notify_claimer", _notify_claimer_node)
-    graph.add_node("decide_follow_up", _decide_follow_up_node)
-    graph.add_node("schedule", _schedule_node)
+    graph.add_node("extract", timed_node("extract", _extract_node))
+    graph.add_node("apply", timed_node("apply", _apply_node))
+    graph.add_node("notify_claimer", timed_node("notify_claimer", _notify_claimer_node))
+    graph.add_node("follow_up", timed_node("follow_up", _follow_up_node))
 
     graph.add_edge("extract", "apply")
+    # Parallel branches in one superstep: scheduling runs while the email is being sent
     graph.add_edge("apply", "notify_claimer")
-    graph.add_edge("notify_claimer", "decide_follow_up")
-    graph.add_conditional_edges("decide_follow_up", _route_after_decide, {"schedule": "schedule", "__end__": END})
-    graph.add_edge("schedule", END)
+    graph.add_edge("apply", "follow_up")
+    graph.add_edge("notify_claimer", END)
+    graph.add_edge("follow_up", END)
 
     graph.set_entry_point("extract")
-    return graph.compile()
+    return graph
 
 
-_compiled_graph = None
+_graph_builder = None
 
 
-def _get_graph() -> Any:
-    global _compiled_graph
-    if _compiled_graph is None:
-        _compiled_graph = _build_post_call_graph()
-    return _compiled_graph
+def _get_graph_builder() -> Any:
+    global _graph_builder
+    if _graph_builder is None:
+        _graph_builder = _build_post_call_graph()
+    return _graph_builder
 
 
-def run_post_call_workflow(
+def _transcript_hash(transcript: str) -> str:
+    return hashlib.sha256((transcript or "").encode("utf-8")).hexdigest()
+
+
+def _carry_over(previous: dict, transcript_hash: str) -> dict:
+    """Outputs of an earlier attempt for the same call that a retry must not pay for or repeat."""
+    carried: dict = {}
+    if previous.get("extract_done") and previous.get("transcript_hash") == transcript_hash:
+        carried["extracted"] = previous.get("extracted")
+        carried["extract_done"] = True
+    if previous.get("claimer_notified"):
+        carried["claimer_notified"] = True
+        carried["claimer_notified_at"] = previous.get("claimer_notified_at")
+    return carried
+
+
+async def arun_post_call_workflow(
     db: Session,
     call_record: Any,
     transcript: str,
     ended_reason: str,
     denial_code: Optional[str] = None,
     payer_name: Optional[str] = None,
+    payer_id: Optional[int] = None,
 ) -> PostCallState:
     """
-    Run the post-call workflow: extract outcome, apply to claim, optionally schedule follow-up.
-    Uses the same db session; caller should commit after.
+    Run the post-call workflow: extract outcome, apply to claim, notify claimer / optionally schedule follow-up.
+    Uses the same db session; caller should commit after. A retry for the same call resumes from the
+    last checkpoint: the extraction and the claimer email are not repeated. Per-node timings are
+    saved to workflow_node_runs and returned as node_timings.
     """
+    call_id = getattr(call_record, "id", 0)
+    thread_id = f"{WORKFLOW_NAME}:{call_id}"
     initial: PostCallState = {
         "transcript": transcript or "",
+        "transcript_hash": _transcript_hash(transcript),
         "ended_reason": ended_reason or "unknown",
         "claim_id": call_record.claim_id,
-        "call_id": getattr(call_record, "id", 0),
+        "call_id": call_id,
         "denial_code": denial_code,
         "payer_name": payer_name,
+        "payer_id": payer_id,
+        # Reset per-attempt outputs (the checkpointed state would otherwise carry them over)
+        "extracted": None,
+        "extract_done": False,
+        "claimer_notified": False,
+        "claimer_notified_at": None,
+        "claimer_notification_queued": False,
+        "schedule_after": None,
+        "schedule_reason": None,
+        "claim_updated": False,
+        "error": None,
     }
+    # db/call_record travel in the ContextVar only, so they are never serialized into checkpoints
     token = _workflow_context.set({"db": db, "call_record": call_record})
+    timings, timings_token = begin_run_timings()
     try:
-        result = _get_graph().invoke(initial, config={"configurable": {"db": db, "call_record": call_record}})
+        async with open_checkpointer() as checkpointer:
+            graph = _get_graph_builder().compile(checkpointer=checkpointer)
+            config = {"configurable": {"thread_id": thread_id}}
+            if call_id:
+                snapshot = await graph.aget_state(config)
+                initial.update(_carry_over(dict(snapshot.values or {}), initial["transcript_hash"]))
+            result = dict(await graph.ainvoke(initial, config=config))
+        result["node_timings"] = list(timings)
         return result
     finally:
+        end_run_timings(timings_token)
         _workflow_context.reset(token)
+        save_run_history(WORKFLOW_NAME, thread_id, call_id, timings)
+
+
+def run_post_call_workflow(
+    db: Session,
+    call_record: Any,
+    transcript: str,
+    ended_reason: str,
+    denial_code: Optional[str] = None,
+    payer_name: Optional[str] = None,
+    payer_id: Optional[int] = None,
+) -> PostCallState:
+    """Sync entry point (Celery workers, scripts): runs arun_post_call_workflow on a fresh event loop."""
+    return asyncio.run(
+        arun_post_call_workflow(
+            db,
+            call_record,
+            transcript,
+            ended_reason,
+            denial_code=denial_code,
+            payer_name=payer_name,
+            payer_id=payer_id,
+        )
+    )
@@ -0,0 +1,544 @@
+"""
+Offline throughput benchmark for the post-call pipeline.
+Drives run_post_call_workflow (as a Celery worker does) or POST /api/webhooks/vapi plus the inbox
+consumer, over a synthetic transcript corpus, with local stand-ins for the LLM (ChatOpenAI), the
+Chroma stores and SMTP, each with a configurable latency. No OpenAI key, Chroma or mail server needed.
+Reports throughput, p50/p95/p99 latency and time per workflow node (workflow_node_runs) for each
+concurrency level.
+  cd backend && python scripts/bench_post_call.py [--mode workflow|webhook|both] [--concurrency 1,4,16]
+      [--calls 200] [--llm-ms 800] [--rag-ms 40] [--smtp-ms 150] [--fast-path] [--json out.json]
+Uses a throwaway SQLite database unless --database-url is given (use a scratch Postgres database for
+production-like numbers; the bench creates its own practice, claims and calls there). Redis is optional:
+without it metrics counters are dropped and the webhook consumer applies events without the per-call lock.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # backend/ for "app"
+
+PAYERS = ("Aetna", "Cigna", "UnitedHealthcare", "Humana", "Blue Cross")
+DENIAL_CODES = ("CO-16", "CO-97", "CO-45", "PR-1", "CO-29")
+
+_IVR_LINES = (
+    "AI: Thank you for calling. Calls may be recorded for quality purposes.",
+    "AI: For claims, press 2. Para español, oprima nueve.",
+    "AI: Please hold. Your call is very important to us.",
+    "AI: Estimated hold time is 6 minutes.",
+)
+_SMALL_TALK = (
+    "User: Can I have the claim number and the patient's date of birth?",
+    "AI: Sure, the claim number is {claim} and the date of birth is 04/12/1961.",
+    "User: Thank you, one moment while I pull that up.",
+    "AI: Okay.",
+    "User: I see the claim here for date of service 03/02.",
+)
+_OUTCOMES = {
+    "paid": (
+        "User: That claim was paid on 03/28 in the amount of ${amount}, check number 88{n:04d}.",
+        "AI: Great, thank you for confirming.",
+    ),
+    "denied": (
+        "User: The claim was denied with code {code}. It needs a corrected claim with the missing information.",
+        "AI: Understood. Can it be resubmitted electronically?",
+        "User: Yes, resubmit with the corrected modifier within 90 days.",
+    ),
+    "pending": (
+        "User: It's still in process, no determination yet. Please call back in 5 days.",
+        "AI: Okay, we'll follow up then. Do you have a reference number?",
+        "User: Reference number is R{n:06d}.",
+    ),
+    "reprocessing": (
+        "User: I've sent the claim back for reprocessing. Allow 30 days and call back if it's not paid.",
+        "AI: Thank you. Can I get a reference number for this call?",
+        "User: Sure, it's R{n:06d}.",
+    ),
+}
+
+
+def make_transcript(rng: random.Random, n: int) -> tuple[str, str, str]:
+    """(transcript, expected status, denial code) for synthetic call n."""
+    status = rng.choice(list(_OUTCOMES))
+    code = rng.choice(DENIAL_CODES)
+    lines = list(rng.sample(_IVR_LINES, rng.randint(1, len(_IVR_LINES))))
+    lines.append("User: Claims department, this is Dana. How can I help?")
+    lines.append("AI: Hi, I'm calling to check the status of a claim.")
+    for _ in range(rng.randint(1, 4)):  # long calls repeat the verification back-and-forth
+        lines.extend(line.format(claim=f"CLM{n:06d}") for line in _SMALL_TALK)
+    amount = f"{rng.randint(80, 2400)}.{rng.randint(0, 99):02d}"
+    lines.extend(line.format(amount=amount, n=n, code=code) for line in _OUTCOMES[status])
+    lines.append("AI: That's all I needed. Thank you, goodbye.")
+    return "\n".join(lines), status, code
+
+
+# --- Stand-ins -----------------------------------------------------------------------------------
+
+
+class StubChatModel:
+    """Deterministic ChatOpenAI replacement: sleeps for the configured latency, answers from keywords."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    @staticmethod
+    def _answer(messages: list) -> SimpleNamespace:
+        prompt = messages[-1].content if messages else ""
+        transcript = prompt.split("---", 2)[1] if prompt.count("---") >= 2 else prompt
+        text = transcript.lower()
+        outcome = {"claim_status": "unknown", "summary": "Could not determine the outcome.", "action_taken": "none"}
+        if "was paid" in text:
+            outcome = {"claim_status": "paid", "summary": "Claim was paid.", "action_taken": "info_gathered",
+                       "amount_paid": "$100.00"}
+        elif "denied" in text:
+            outcome = {"claim_status": "denied", "summary": "Claim denied; corrected claim needed.",
+                       "denial_reason": "Missing information", "denial_code": "CO-16",
+                       "action_taken": "info_gathered", "next_steps": "Resubmit a corrected claim"}
+        elif "reprocessing" in text:
+            outcome = {"claim_status": "reprocessing", "summary": "Sent back for reprocessing.",
+                       "action_taken": "reprocess_requested", "next_steps": "Call back in 30 days if not paid"}
+        elif "in process" in text:
+            outcome = {"claim_status": "pending", "summary": "Claim still in process.",
+                       "action_taken": "info_gathered", "next_steps": "Call back in 5 days"}
+        return SimpleNamespace(content=json.dumps(outcome))
+
+    def invoke(self, messages: list) -> SimpleNamespace:
+        time.sleep(self.latency)
+        return self._answer(messages)
+
+    async def ainvoke(self, messages: list) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        return self._answer(messages)
+
+
+class StubVectorStore:
+    """Chroma replacement returning fixed snippets after the configured latency."""
+
+    def __init__(self, latency: float, kind: str):
+        self.latency = latency
+        self.kind = kind
+
+    def _docs(self, query: str, k: int) -> list:
+        return [
+            SimpleNamespace(page_content=f"{self.kind} reference {i} for: {query[:40]}", metadata={})
+            for i in range(min(k, 3))
+        ]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        time.sleep(self.latency)
+        return self._docs(query, k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        await asyncio.sleep(self.latency)
+        return self._docs(query, k)
+
+
+class StubSMTP:
+    """smtplib.SMTP replacement: one round trip of the configured latency per message."""
+
+    latency = 0.0
+    sent = 0
+    _lock = threading.Lock()
+
+    def __init__(self, host: str = "", port: int = 0, *args, **kwargs):
+        pass
+
+    def __enter__(self) -> "StubSMTP":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def ehlo(self, *args, **kwargs) -> tuple:
+        return 250, b"bench"
+
+    def starttls(self, *args, **kwargs) -> None:
+        pass
+
+    def login(self, *args, **kwargs) -> None:
+        pass
+
+    def sendmail(self, from_addr: str, to_addrs: list, msg: str) -> dict:
+        time.sleep(StubSMTP.latency)
+        with StubSMTP._lock:
+            StubSMTP.sent += 1
+        return {}
+
+    def quit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def install_stubs(llm_ms: float, rag_ms: float, smtp_ms: float) -> None:
+    import smtplib
+
+    from app.agents import outcome_extractor
+    from app.services import rag_service
+
+    llm = StubChatModel(llm_ms / 1000)
+    denial_store = StubVectorStore(rag_ms / 1000, "Denial code")
+    policy_store = StubVectorStore(rag_ms / 1000, "Payer policy")
+    outcome_extractor._get_llm = lambda: llm
+    rag_service.get_denial_codes_store = lambda: denial_store
+    rag_service._openai_store = (
+        lambda collection_name: denial_store if collection_name == rag_service.DENIAL_CODES_COLLECTION else policy_store
+    )
+    StubSMTP.latency = smtp_ms / 1000
+    smtplib.SMTP = StubSMTP
+
+
+# --- Fixtures ------------------------------------------------------------------------------------
+
+
+def seed_calls(corpus: list, prefix: str) -> list[tuple[int, str, str, str]]:
+    """One practice/claim/call per transcript. Returns [(call_id, external_id, transcript, payer_name)]."""
+    from app.database import SessionLocal
+    from app.models import Call, Claim, Payer, Practice
+
+    db = SessionLocal()
+    try:
+        practice = Practice(name=f"Bench practice {prefix}", notification_email="billing@bench.local")
+        db.add(practice)
+        db.flush()
+        payers = [Payer(practice_id=practice.id, name=name, phone="+15550000000") for name in PAYERS]
+        db.add_all(payers)
+        db.flush()
+        rows = []
+        for i, (transcript, _, code) in enumerate(corpus):
+            payer = payers[i % len(payers)]
+            claim = Claim(
+                practice_id=practice.id,
+                payer_id=payer.id,
+                claim_number=f"{prefix}-CLM{i:06d}",
+                denial_code=code if i % 3 == 0 else None,
+            )
+            db.add(claim)
+            db.flush()
+            call = Call(claim_id=claim.id, status="in_progress", external_id=f"{prefix}-{i}")
+            db.add(call)
+            db.flush()
+            rows.append((call.id, call.external_id, transcript, payer.name))
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+
+def end_of_call_body(external_id: str, transcript: str, n: int) -> dict:
+    return {
+        "message": {
+            "type": "end-of-call-report",
+            "id": f"evt-{external_id}",
+            "endedReason": "customer-ended-call",
+            "call": {"id": external_id, "duration": 120 + n % 400},
+            "artifact": {"transcript": transcript},
+        }
+    }
+
+
+# --- Measurements --------------------------------------------------------------------------------
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies_ms: list[float], errors: int, elapsed: float) -> dict:
+    done = len(latencies_ms)
+    return {
+        "requests": done + errors,
+        "errors": errors,
+        "throughput_per_s": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 1),
+        "p95_ms": round(percentile(latencies_ms, 95), 1),
+        "p99_ms": round(percentile(latencies_ms, 99), 1),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def node_breakdown(call_ids: list[int]) -> dict:
+    """Per-node share of workflow time for these calls, from workflow_node_runs."""
+    from app.database import SessionLocal
+    from app.models import WorkflowNodeRun
+
+    durations: dict[str, list[float]] = defaultdict(list)
+    db = SessionLocal()
+    try:
+        for start in range(0, len(call_ids), 500):
+            rows = (
+                db.query(WorkflowNodeRun.node, WorkflowNodeRun.duration_ms)
+                .filter(WorkflowNodeRun.call_id.in_(call_ids[start:start + 500]))
+                .all()
+            )
+            for node, duration in rows:
+                durations[node].append(duration)
+    finally:
+        db.close()
+    total = sum(sum(v) for v in durations.values()) or 1.0
+    return {
+        node: {
+            "runs": len(v),
+            "mean_ms": round(sum(v) / len(v), 1),
+            "p95_ms": round(percentile(v, 95), 1),
+            "share": round(sum(v) / total, 3),
+        }
+        for node, v in sorted(durations.items(), key=lambda item: -sum(item[1]))
+    }
+
+
+def bench_workflow(rows: list, concurrency: int) -> tuple[list[float], int, float]:
+    """Each worker thread runs the workflow like a Celery worker: own session, sync entry point, commit."""
+    from app.database import SessionLocal
+    from app.models import Call, Claim
+    from app.workflows import run_post_call_workflow
+
+    def run_one(row: tuple) -> float:
+        call_id, _, transcript, payer_name = row
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            call = db.get(Call, call_id)
+            claim = db.get(Claim, call.claim_id)
+            run_post_call_workflow(
+                db=db,
+                call_record=call,
+                transcript=transcript,
+                ended_reason="customer-ended-call",
+                denial_code=claim.denial_code,
+                payer_name=payer_name,
+                payer_id=claim.payer_id,
+            )
+            db.commit()
+            return (time.perf_counter() - started) * 1000
+        finally:
+            db.close()
+
+    return _run_pool(run_one, rows, concurrency)
+
+
+def _run_pool(fn, items: list, concurrency: int) -> tuple[list[float], int, float]:
+    latencies: list[float] = []
+    errors = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(fn, item) for item in items]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    return latencies, errors, time.perf_counter() - started
+
+
+def _redis_available() -> bool:
+    try:
+        from app.core.redis_client import get_redis
+        return bool(get_redis().ping())
+    except Exception:
+        return False
+
+
+def _drain_without_lock(external_id: str) -> None:
+    """drain_call_events minus the Redis per-call lock (each bench call has a single event)."""
+    from datetime import datetime, timezone
+
+    from app.database import SessionLocal
+    from app.models import WebhookEvent
+    from app.models.webhook_event import WebhookEventStatus
+    from app.services.webhook_processor import apply_event, run_post_call
+
+    db = SessionLocal()
+    try:
+        events = (
+            db.query(WebhookEvent)
+            .filter(WebhookEvent.external_call_id == external_id, WebhookEvent.status == WebhookEventStatus.PENDING)
+            .order_by(WebhookEvent.id)
+            .all()
+        )
+        for event in events:
+            if apply_event(db, event):
+                db.commit()
+                if not run_post_call(db, event):
+                    db.rollback()
+            event.status = WebhookEventStatus.DONE
+            event.processed_at = datetime.now(timezone.utc)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def bench_webhook(rows: list, concurrency: int) -> tuple[dict, dict]:
+    """POST end-of-call reports through the ASGI app, then drain the inbox with `concurrency` consumers."""
+    import httpx
+
+    from app.main import app
+    from app.tasks import webhook_tasks
+
+    enqueued: list[str] = []
+    webhook_tasks.enqueue_call_webhooks = enqueued.append  # the bench plays the Celery worker below
+
+    async def post_all() -> tuple[list[float], int, float]:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: list[float] = []
+        errors = 0
+
+        async def post(client: httpx.AsyncClient, n: int, row: tuple) -> None:
+            nonlocal errors
+            _, external_id, transcript, _ = row
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/webhooks/vapi", json=end_of_call_body(external_id, transcript, n))
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                else:
+                    errors += 1
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(post(client, n, row) for n, row in enumerate(rows)))
+            return latencies, errors, time.perf_counter() - started
+
+    ingest = summarize(*asyncio.run(post_all()))
+
+    if _redis_available():
+        from app.database import SessionLocal
+        from app.services.webhook_processor import drain_call_events
+
+        def consume(external_id: str) -> float:
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                drain_call_events(db, external_id)
+                return (time.perf_counter() - started) * 1000
+            finally:
+                db.close()
+    else:
+        def consume(external_id: str) -> float:
+            started = time.perf_counter()
+            _drain_without_lock(external_id)
+            return (time.perf_counter() - started) * 1000
+
+    processing = summarize(*_run_pool(consume, list(enqueued), concurrency))
+    return ingest, processing
+
+
+def print_table(title: str, results: dict) -> None:
+    print(f"\n{title}")
+    print(f"{'conc':>5}  {'reqs':>6}  {'err':>4}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}")
+    for level, r in results.items():
+        print(
+            f"{level:>5}  {r['requests']:>6}  {r['errors']:>4}  {r['throughput_per_s']:>8.2f}  "
+            f"{r['p50_ms']:>8.1f}  {r['p95_ms']:>8.1f}  {r['p99_ms']:>8.1f}"
+        )
+
+
+def print_nodes(title: str, nodes: dict) -> None:
+    print(f"  {title}: " + (", ".join(
+        f"{node} {n['mean_ms']:.0f}ms ({n['share']:.0%})" for node, n in nodes.items()
+    ) or "no node timings recorded"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("workflow", "webhook", "both"), default="workflow")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated worker counts")
+    parser.add_argument("--calls", type=int, default=200, help="calls per concurrency level")
+    parser.add_argument("--llm-ms", type=float, default=800.0)
+    parser.add_argument("--rag-ms", type=float, default=40.0)
+    parser.add_argument("--smtp-ms", type=float, default=150.0)
+    parser.add_argument("--fast-path", action="store_true", help="let the local classifier skip the LLM")
+    parser.add_argument("--database-url", default="", help="default: a throwaway SQLite file")
+    parser.add_argument("--checkpoint-url", default="memory", help="WORKFLOW_CHECKPOINT_URL for the runs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", default="", help="also write results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_post_call_")
+    # Settings are read once (lru_cache), so configure the environment before importing the app
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/bench.db?timeout=30",
+        "WORKFLOW_CHECKPOINT_URL": args.checkpoint_url,
+        "WORKFLOW_RUN_HISTORY": "true",
+        "OPENAI_API_KEY": "bench-not-used",
+        "FAST_PATH_ENABLED": "true" if args.fast_path else "false",
+        "FAST_PATH_MODEL_PATH": f"{workdir}/no_model.json",
+        "EXTRACTION_CACHE_TTL": "0",  # every call pays for extraction
+        "RAG_QUERY_CACHE_TTL": "0",  # ...and for retrieval
+        "SMTP_HOST": "smtp.bench.local",
+        "SMTP_USE_TLS": "false",
+        "USE_MCP_EMAIL": "false",
+        "ENCRYPT_SENSITIVE_FIELDS": "false",
+        "DEBUG": "false",
+    })
+
+    from app.database import init_db
+
+    init_db()
+    install_stubs(args.llm_ms, args.rag_ms, args.smtp_ms)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    rng = random.Random(args.seed)
+    corpus = [make_transcript(rng, n) for n in range(args.calls)]
+    mix = defaultdict(int)
+    for _, status, _ in corpus:
+        mix[status] += 1
+    print(
+        f"Corpus: {len(corpus)} calls {dict(mix)}; stubs: LLM {args.llm_ms:.0f}ms, "
+        f"RAG {args.rag_ms:.0f}ms, SMTP {args.smtp_ms:.0f}ms; fast path {'on' if args.fast_path else 'off'}"
+    )
+    if args.mode in ("webhook", "both") and not _redis_available():
+        print("Redis not reachable: webhook consumer runs without the per-call lock.")
+
+    report: dict = {"config": vars(args), "workflow": {}, "webhook_ingest": {}, "webhook_processing": {}, "nodes": {}}
+    run = 0
+    for level in levels:
+        if args.mode in ("workflow", "both"):
+            run += 1
+            rows = seed_calls(corpus, f"wf{run}")
+            report["workflow"][level] = summarize(*bench_workflow(rows, level))
+            report["nodes"][f"workflow@{level}"] = node_breakdown([r[0] for r in rows])
+        if args.mode in ("webhook", "both"):
+            run += 1
+            rows = seed_calls(corpus, f"wh{run}")
+            ingest, processing = bench_webhook(rows, level)
+            report["webhook_ingest"][level] = ingest
+            report["webhook_processing"][level] = processing
+            report["nodes"][f"webhook@{level}"] = node_breakdown([r[0] for r in rows])
+
+    if report["workflow"]:
+        print_table("run_post_call_workflow (per call, including commit)", report["workflow"])
+    if report["webhook_ingest"]:
+        print_table("POST /api/webhooks/vapi (ingest + ack)", report["webhook_ingest"])
+        print_table("Inbox consumer (apply end-of-call report)", report["webhook_processing"])
+    print("\nTime per node (mean, share of workflow time):")
+    for title, nodes in report["nodes"].items():
+        print_nodes(title, nodes)
+    print(f"\nEmails sent through the SMTP stub: {StubSMTP.sent}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+        print(f"Results written to {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Offline evaluation of the fast-path classifier against the LLM's extractions.
+Reports, per confidence threshold, how many calls would skip the LLM, how often the fast path
+agrees with the LLM's claim_status on those calls, and the mean confidence it claimed (a calibrated
+model's agreement is close to its mean confidence). Pick FAST_PATH_MIN_CONFIDENCE from this table.
+  cd backend && python scripts/eval_fast_path.py [--limit 5000] [--holdout 0.2]
+With --holdout, the model is retrained (and recalibrated) on the rest of the calls so the held-out
+ones are unseen.
+"""
+import argparse
+import random
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # backend/ for "app"
+from train_fast_path import load_labeled_calls
+
+THRESHOLDS = (0.7, 0.8, 0.9, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--holdout", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.core.config import get_settings
+    from app.database import SessionLocal
+    from app.agents import fast_path_classifier as fp
+
+    db = SessionLocal()
+    try:
+        calls = list(load_labeled_calls(db, args.limit))
+    finally:
+        db.close()
+    if not calls:
+        print("No LLM-labeled calls with transcripts found.")
+        return 1
+
+    if args.holdout > 0:
+        random.Random(args.seed).shuffle(calls)
+        cut = int(len(calls) * (1 - args.holdout))
+        train, calls = calls[:cut], calls[cut:]
+        raw = fp.fit_model([(t, label) for _, t, label in train])
+        model_path = fp.save_model(raw, fp.DEFAULT_MODEL_PATH.with_suffix(".eval.json"))
+        get_settings().FAST_PATH_MODEL_PATH = str(model_path)
+        print(f"Holdout: trained on {len(train)}, evaluating {len(calls)}")
+
+    results = []  # (llm_status, fast_status or None, confidence, source)
+    for _, transcript, llm_status in calls:
+        fast = fp.classify_fast_path(transcript)
+        if fast is None:
+            results.append((llm_status, None, 0.0, "none"))
+        else:
+            results.append((llm_status, fast.claim_status.lower(), fast.confidence or 0.0, fast.source or ""))
+
+    total = len(results)
+    print(f"Calls evaluated: {total}")
+    print(f"{'threshold':>9}  {'skip LLM':>9}  {'agree':>7}  {'mean conf':>9}")
+    for threshold in THRESHOLDS:
+        routed = [r for r in results if r[1] is not None and r[2] >= threshold]
+        agree = sum(1 for r in routed if r[0] == r[1])
+        coverage = len(routed) / total
+        agreement = agree / len(routed) if routed else 0.0
+        mean_confidence = sum(r[2] for r in routed) / len(routed) if routed else 0.0
+        print(f"{threshold:>9.2f}  {coverage:>8.1%}  {agreement:>6.1%}  {mean_confidence:>8.1%}")
+
+    threshold = get_settings().FAST_PATH_MIN_CONFIDENCE
+    by_source = defaultdict(Counter)
+    for llm_status, fast_status, confidence, source in results:
+        if fast_status is not None and confidence >= threshold:
+            by_source[source]["agree" if llm_status == fast_status else "disagree"] += 1
+    print(f"\nAt FAST_PATH_MIN_CONFIDENCE={threshold}:")
+    for source, counts in sorted(by_source.items()):
+        print(f"  {source:<24} agree {counts['agree']:>5}  disagree {counts['disagree']:>5}")
+    confusion = Counter((r[0], r[1]) for r in results if r[1] is not None and r[2] >= threshold and r[0] != r[1])
+    if confusion:
+        print("\nDisagreements (llm → fast path):")
+        for (llm_status, fast_status), n in confusion.most_common(10):
+            print(f"  {llm_status} → {fast_status}: {n}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
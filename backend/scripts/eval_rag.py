@@ -0,0 +1,149 @@
+"""
+Retrieval quality and latency of the RAG backends on a small built-in evaluation set
+(CARC denial codes and payer policies, with free-text queries phrased the way reps talk).
+Compares BM25 alone, local BM25 + local embeddings, OpenAI embeddings and hybrid (BM25 + OpenAI),
+reporting hit@1, recall@3, MRR@5 and per-query latency.
+  cd backend && python scripts/eval_rag.py [--local-embeddings] [--k 5]
+OpenAI rows need OPENAI_API_KEY; --local-embeddings downloads the ONNX model on first use.
+Indexes are built in a temporary directory; chroma_data is not touched.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # backend/ for "app"
+
+DENIAL_CODES = [
+    {"code": "CO-4", "description": "The procedure code is inconsistent with the modifier used, or a required modifier is missing.", "remedy": "Correct the modifier and resubmit."},
+    {"code": "CO-16", "description": "Claim/service lacks information or has submission/billing error(s) needed for adjudication.", "remedy": "Add the missing information and submit a corrected claim."},
+    {"code": "CO-18", "description": "Exact duplicate claim/service.", "remedy": "Do not resubmit; check the status of the original claim."},
+    {"code": "CO-22", "description": "This care may be covered by another payer per coordination of benefits.", "remedy": "Bill the primary insurance first, then submit with the primary EOB."},
+    {"code": "CO-27", "description": "Expenses incurred after coverage terminated.", "remedy": "Verify eligibility for the date of service and bill the correct plan or the patient."},
+    {"code": "CO-29", "description": "The time limit for filing has expired.", "remedy": "Submit proof of timely filing with an appeal."},
+    {"code": "CO-45", "description": "Charge exceeds fee schedule/maximum allowable or contracted/legislated fee arrangement.", "remedy": "Write off the contractual adjustment."},
+    {"code": "CO-50", "description": "These are non-covered services because this is not deemed a medical necessity by the payer.", "remedy": "Appeal with medical records supporting necessity."},
+    {"code": "CO-96", "description": "Non-covered charge(s). The service is excluded under the patient's plan.", "remedy": "Bill the patient if an advance beneficiary notice was signed."},
+    {"code": "CO-97", "description": "The benefit for this service is included in the payment/allowance for another service already adjudicated (bundled).", "remedy": "Check NCCI edits; appeal with modifier 59 if the service was distinct."},
+    {"code": "CO-197", "description": "Precertification/authorization/notification absent.", "remedy": "Request retro authorization or appeal with the authorization number."},
+    {"code": "PR-1", "description": "Deductible amount.", "remedy": "Bill the patient for the deductible."},
+    {"code": "PR-2", "description": "Coinsurance amount.", "remedy": "Bill the patient for the coinsurance."},
+    {"code": "PR-3", "description": "Co-payment amount.", "remedy": "Collect the copay from the patient."},
+]
+
+PAYER_POLICIES = [
+    {"payer_name": "Aetna", "text": "Aetna timely filing: initial claims must be received within 120 days of the date of service for participating providers."},
+    {"payer_name": "Aetna", "text": "Aetna appeals: submit a level 1 provider appeal within 180 days of the initial claim decision, with the EOB and supporting records."},
+    {"payer_name": "Cigna", "text": "Cigna corrected claims: resubmit with frequency code 7 and the original claim number; do not send a new claim."},
+    {"payer_name": "Cigna", "text": "Cigna reconsideration requests can be made by phone for claims denied for missing information."},
+    {"payer_name": "UnitedHealthcare", "text": "UnitedHealthcare requires prior authorization for advanced imaging such as MRI and CT scans."},
+    {"payer_name": "UnitedHealthcare", "text": "UnitedHealthcare claim status and reprocessing requests go through the provider portal; allow 30 days for reprocessing."},
+    {"payer_name": "Humana", "text": "Humana coordination of benefits: when Humana is secondary, attach the primary payer's remittance advice."},
+    {"payer_name": "Humana", "text": "Humana timely filing limit is one year from the date of service for Medicare Advantage claims."},
+]
+
+# (query, payer filter or None, substring identifying the relevant document)
+DENIAL_QUERIES = [
+    ("they said the claim is missing information and we need to send a corrected claim", None, "Code: CO-16."),
+    ("the patient hasn't met their deductible yet", None, "Code: PR-1."),
+    ("it was denied because it was filed too late, past the filing limit", None, "Code: CO-29."),
+    ("rep says this is a duplicate of a claim already on file", None, "Code: CO-18."),
+    ("the other insurance is primary, bill them first", None, "Code: CO-22."),
+    ("the modifier on the procedure code is wrong", None, "Code: CO-4."),
+    ("service was bundled into another procedure that was already paid", None, "Code: CO-97."),
+    ("no prior authorization was on file for the service", None, "Code: CO-197."),
+    ("payer says the service was not medically necessary", None, "Code: CO-50."),
+    ("coverage had terminated before the date of service", None, "Code: CO-27."),
+    ("amount over the contracted fee schedule was adjusted", None, "Code: CO-45."),
+    ("the remaining balance is the patient's coinsurance", None, "Code: PR-2."),
+    ("CO-97", None, "Code: CO-97."),
+    ("PR 3 copay", None, "Code: PR-3."),
+]
+POLICY_QUERIES = [
+    ("how long do we have to file the claim", "Aetna", "within 120 days"),
+    ("how do we appeal the denial", "Aetna", "level 1 provider appeal"),
+    ("how do we send a corrected claim", "Cigna", "frequency code 7"),
+    ("can we ask for a reconsideration over the phone", "Cigna", "by phone"),
+    ("does the MRI need an authorization", "UnitedHealthcare", "advanced imaging"),
+    ("how long does reprocessing take", "UnitedHealthcare", "allow 30 days"),
+    ("they are secondary, what do we attach", "Humana", "remittance advice"),
+    ("what is the filing deadline", "Humana", "one year"),
+]
+
+
+def evaluate(search, queries: list, k: int) -> dict:
+    hits1 = hits3 = 0
+    rr = 0.0
+    latencies = []
+    for query, payer, expected in queries:
+        started = time.perf_counter()
+        results = search(query, payer, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        rank = next((i for i, text in enumerate(results, start=1) if expected in text), None)
+        hits1 += rank == 1
+        hits3 += rank is not None and rank <= 3
+        rr += 1.0 / rank if rank else 0.0
+    n = len(queries)
+    latencies.sort()
+    return {
+        "hit@1": hits1 / n,
+        "recall@3": hits3 / n,
+        "mrr": rr / n,
+        "mean_ms": sum(latencies) / n,
+        "p95_ms": latencies[min(n - 1, int(0.95 * n))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--local-embeddings", action="store_true", help="also evaluate the CPU-only local model")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["RAG_PERSIST_DIR"] = tempfile.mkdtemp(prefix="eval_rag_")
+    os.environ["RAG_EMBEDDING_CACHE_DIR"] = str(Path(os.environ["RAG_PERSIST_DIR"]) / "embedding_cache")
+    os.environ["RAG_LOCAL_EMBEDDINGS"] = "true" if args.local_embeddings else "false"
+
+    from app.core.config import get_settings
+    from app.services import rag_service
+
+    settings = get_settings()
+    stats = (rag_service.ingest_denial_codes(DENIAL_CODES), rag_service.ingest_payer_policies(PAYER_POLICIES))
+    print(f"Indexed {sum(s.written for s in stats)} documents in {os.environ['RAG_PERSIST_DIR']}")
+
+    configs = [("bm25", "local", False)]
+    if args.local_embeddings:
+        if rag_service.get_local_dense_store(rag_service.DENIAL_CODES_COLLECTION) is None:
+            print("Local embedding model unavailable (needs chromadb with onnxruntime); skipping local rows.")
+        else:
+            configs.append(("bm25+local", "local", True))
+    if settings.OPENAI_API_KEY:
+        configs.append(("openai", "openai", False))
+        configs.append(("bm25+openai", "hybrid", False))
+    else:
+        print("OPENAI_API_KEY not set; skipping OpenAI rows.")
+
+    def denial_search(query, payer, k):
+        return rag_service.query_denial_codes(query, k=k)
+
+    def policy_search(query, payer, k):
+        return rag_service.query_payer_policies(query, payer_name=payer, k=k)
+
+    print(f"\n{'backend':<12} {'set':<9} {'hit@1':>6} {'rec@3':>6} {'MRR':>6} {'mean ms':>8} {'p95 ms':>8}")
+    for name, backend, local in configs:
+        settings.RAG_BACKEND = backend
+        settings.RAG_LOCAL_EMBEDDINGS = local
+        for label, search, queries in (("denial", denial_search, DENIAL_QUERIES), ("policy", policy_search, POLICY_QUERIES)):
+            search(queries[0][0], queries[0][1], args.k)  # warm up (model load, collection open)
+            r = evaluate(search, queries, args.k)
+            print(
+                f"{name:<12} {label:<9} {r['hit@1']:>6.2f} {r['recall@3']:>6.2f} {r['mrr']:>6.2f} "
+                f"{r['mean_ms']:>8.2f} {r['p95_ms']:>8.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
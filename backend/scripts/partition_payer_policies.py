@@ -0,0 +1,37 @@
+"""
+Move payer policies ingested before per-payer partitioning (one payer_policies collection filtered
+by payer_name) into one partition per payer. A payer name that matches exactly one payer in the
+database is filed under that payer's id; names shared by payers of several practices, or matching
+none, keep a partition per name. Safe to re-run: documents already in place are skipped.
+  cd backend && python scripts/partition_payer_policies.py [--drop-legacy]
+--drop-legacy deletes the old collection and its BM25 index afterwards.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # backend/ for "app"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drop-legacy", action="store_true", help="delete the unpartitioned collection when done")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.models import Payer
+    from app.services.rag_ingest import payer_ids_by_key
+    from app.services.rag_service import repartition_legacy_payer_policies
+
+    db = SessionLocal()
+    try:
+        payer_names = dict(db.query(Payer.id, Payer.name).all())
+    finally:
+        db.close()
+    stats = repartition_legacy_payer_policies(drop_legacy=args.drop_legacy, payer_ids=payer_ids_by_key(payer_names))
+    print(f"Partitioned payer policies: {stats.written} written, {stats.unchanged} already in place")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Train the fast-path outcome model from past LLM extractions (Call.extracted_data + stored transcripts).
+A share of the calls (--calibration) is held out of training to fit the model's confidence scaling.
+  cd backend && python scripts/train_fast_path.py [--limit 50000] [--calibration 0.2] [--out fast_path_model.json]
+"""
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # backend/ for "app"
+
+
+def load_labeled_calls(db, limit: int):
+    """(call_id, transcript, claim_status) for calls the LLM extracted (not the fast path's own outputs)."""
+    from app.models import Call
+    from app.services.transcript_store import load_call_artifacts
+
+    rows = (
+        db.query(Call.id, Call.extracted_data)
+        .filter(Call.extracted_data.isnot(None))
+        .order_by(Call.id.desc())
+        .limit(limit)
+        .all()
+    )
+    for call_id, extracted in rows:
+        if not isinstance(extracted, dict) or not extracted.get("claim_status"):
+            continue
+        if (extracted.get("source") or "llm") != "llm":
+            continue
+        transcript = load_call_artifacts(db, call_id).transcript
+        if transcript:
+            yield call_id, transcript, extracted["claim_status"].lower()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=50000)
+    parser.add_argument("--out", default=None, help="model path (default FAST_PATH_MODEL_PATH)")
+    parser.add_argument("--min-count", type=int, default=2)
+    parser.add_argument("--calibration", type=float, default=0.2, help="share of calls held out to calibrate confidence")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.agents.fast_path_classifier import fit_model, save_model
+
+    db = SessionLocal()
+    try:
+        samples = [(t, label) for _, t, label in load_labeled_calls(db, args.limit)]
+    finally:
+        db.close()
+    if not samples:
+        print("No LLM-labeled calls with transcripts found.")
+        return 1
+    try:
+        model = fit_model(samples, calibration=args.calibration, min_count=args.min_count)
+    except ValueError as e:
+        print(f"Not enough calls to calibrate: {e}")
+        return 1
+    path = save_model(model, args.out)
+    labels = Counter(label for _, label in samples)
+    print(
+        f"Trained on {len(samples) - model['calibration_samples']} calls ({dict(labels)}), "
+        f"calibrated on {model['calibration_samples']} (temperature {model['temperature']}), "
+        f"vocab {model['vocab_size']} → {path}"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
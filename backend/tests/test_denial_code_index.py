@@ -0,0 +1,51 @@
+import pytest
+
+from app.services.denial_code_index import DenialCodeIndex, normalize_code, parse_codes
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("CO-16", "CO-16"),
+        ("co16", "CO-16"),
+        ("CO 016", "CO-16"),
+        ("16", "16"),
+        ("A1", "A1"),
+        ("N-290", "N290"),
+        ("MA-01", "MA1"),
+        ("m15", "M15"),
+        ("denied", None),
+        ("", None),
+    ],
+)
+def test_normalize_code(raw, expected):
+    assert normalize_code(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("N-290", ["N290"]),
+        ("MA-01", ["MA1"]),
+        ("N 290", ["N290"]),
+        ("CO-16 / N290", ["CO-16", "N290"]),
+        ("co16, MA130, CO-16", ["CO-16", "MA130"]),
+        ("16", ["16"]),
+        (" A1 ", ["A1"]),
+        ("CO-16 denied on 03/12/2024, amount 125", ["CO-16"]),
+        ("Denied 03/12/2024, amount 125", []),
+        ("", []),
+    ],
+)
+def test_parse_codes(text, expected):
+    assert parse_codes(text) == expected
+
+
+def test_index_lookup_ignores_dates_and_amounts():
+    index = DenialCodeIndex()
+    index.add([
+        {"code": "CO-16", "description": "Missing information", "remedy": "Resubmit"},
+        {"code": "3", "description": "Co-payment amount", "remedy": "Bill patient"},
+    ])
+    found = [e["description"] for code in parse_codes("CO-16 denied on 03/12/2024, amount 125") for e in index.lookup(code)]
+    assert found == ["Missing information"]
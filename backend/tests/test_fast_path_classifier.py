@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.agents.fast_path_classifier import _classify_rules
+from app.core.config import get_settings
+
+
+@pytest.mark.parametrize(
+    "transcript",
+    [
+        "AI: Hi, I'm calling to check whether claim 12345 was paid.\nUser: Let me look that up. It's still in process.",
+        "AI: Can you confirm if the claim has been paid?\nUser: Let me check for you, we are waiting on medical records.",
+        "User: Has the claim been paid? Let me see, please hold for me while I look that up for you.",
+    ],
+)
+def test_paid_rule_ignores_questions_and_assistant_turns(transcript):
+    assert _classify_rules(transcript, "customer-ended-call") is None
+
+
+def test_paid_rule_needs_check_number_to_skip_llm():
+    threshold = get_settings().FAST_PATH_MIN_CONFIDENCE
+    base = "AI: Hi, calling about claim 12345 for the patient today.\nUser: Yes, the claim was paid on March 3rd"
+    without_check = _classify_rules(base + ".", "customer-ended-call")
+    assert without_check.claim_status == "paid" and without_check.confidence < threshold
+    with_check = _classify_rules(base + ", check number 88812345 for $120.00.", "customer-ended-call")
+    assert with_check.confidence >= threshold and with_check.amount_paid == "$120.00"
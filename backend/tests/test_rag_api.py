@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import rag
+from app.core.dependencies import get_current_user
+from app.database import get_db
+from app.services import rag_service
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = {}
+
+    def fake_ingest(name):
+        def ingest(entries):
+            calls[name] = entries
+            return rag_service.IngestStats(written=len(entries), unchanged=0)
+        return ingest
+
+    monkeypatch.setattr(rag_service, "ingest_denial_codes", fake_ingest("denial_codes"))
+    monkeypatch.setattr(rag_service, "ingest_payer_policies", fake_ingest("payer_policies"))
+    app = FastAPI()
+    app.include_router(rag.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, practice_id=None)
+    app.dependency_overrides[get_db] = lambda: None
+    test_client = TestClient(app)
+    test_client.calls = calls
+    return test_client
+
+
+def test_ingest_denial_codes_route(client):
+    response = client.post("/rag/denial-codes", json={"entries": [{"code": "CO-16", "description": "Missing info"}]})
+    assert response.status_code == 200
+    assert response.json()["added"] == 1
+    assert client.calls["denial_codes"][0]["code"] == "CO-16"
+
+
+def test_ingest_payer_policies_route(client):
+    response = client.post("/rag/payer-policies", json={"entries": [{"payer_name": "Aetna", "text": "Timely filing is 120 days."}]})
+    assert response.status_code == 200
+    assert response.json()["added"] == 1
+    assert client.calls["payer_policies"] == [{"payer_name": "Aetna", "payer_id": None, "text": "Timely filing is 120 days."}]
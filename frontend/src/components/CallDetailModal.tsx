@@ -1,3 +1,5 @@
+import { useState, useEffect } from 'react'
+import { calls } from '../lib/api'
 import type { Call } from '../lib/api'
 
 interface CallDetailModalProps {
@@ -6,6 +8,29 @@ interface CallDetailModalProps {
 }
 
 export default function CallDetailModal({ call, onClose }: CallDetailModalProps) {
+  // Transcript is loaded on demand; the list endpoint does not include it
+  const [transcript, setTranscript] = useState<string | null>(null)
+  const [loadingTranscript, setLoadingTranscript] = useState(false)
+
+  useEffect(() => {
+    setTranscript(null)
+    if (!call) return
+    let cancelled = false
+    setLoadingTranscript(true)
+    calls
+      .get(call.id)
+      .then((detail) => {
+        if (!cancelled) setTranscript(detail.transcript)
+      })
+      .catch(() => {})
+      .finally(() => {
+        if (!cancelled) setLoadingTranscript(false)
+      })
+    return () => {
+      cancelled = true
+    }
+  }, [call?.id])
+
   if (!call) return null
 
   return (
@@ -72,11 +97,13 @@ export default function CallDetailModal({ call, onClose }: CallDetailModalProps)
             </div>
           )}
 
-          {call.transcript && (
+          {loadingTranscript && <p className="text-sm text-slate-500">Loading transcript...</p>}
+
+          {transcript && (
             <div>
               <p className="text-xs font-medium text-slate-500 mb-1">Transcript</p>
               <pre className="text-sm text-slate-800 whitespace-pre-wrap bg-slate-50 p-3 rounded-lg max-h-60 overflow-y-auto">
-                {call.transcript}
+                {transcript}
               </pre>
             </div>
           )}
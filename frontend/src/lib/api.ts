@@ -150,7 +150,7 @@ export const calls = {
     const q = sp.toString()
     return api<Call[]>(`/calls${q ? `?${q}` : ''}`)
   },
-  get: (id: number) => api<Call>(`/calls/${id}`),
+  get: (id: number) => api<CallDetail>(`/calls/${id}`),
 }
 
 export interface Call {
@@ -159,7 +159,6 @@ export interface Call {
   status: string
   outcome: string | null
   duration_seconds: number | null
-  transcript: string | null
   external_id: string | null
   extracted_data?: {
     claim_status?: string
@@ -172,6 +171,12 @@ export interface Call {
   created_at?: string
 }
 
+// Transcript is only returned by the call detail endpoint
+export interface CallDetail extends Call {
+  transcript: string | null
+  artifact?: Record<string, unknown> | null
+}
+
 export interface Practice {
   id: number
   name: string
@@ -44,7 +44,6 @@ export default function Calls() {
                   <th className="px-4 py-3 text-left text-sm font-medium text-slate-700">Outcome</th>
                   <th className="px-4 py-3 text-left text-sm font-medium text-slate-700">Duration</th>
                   <th className="px-4 py-3 text-left text-sm font-medium text-slate-700">AI Summary</th>
-                  <th className="px-4 py-3 text-left text-sm font-medium text-slate-700">Transcript</th>
                 </tr>
               </thead>
               <tbody className="divide-y divide-slate-200">
@@ -86,9 +85,6 @@ export default function Calls() {
                     <td className="px-4 py-3 text-sm text-slate-600 max-w-xs">
                       {c.extracted_data?.summary || '-'}
                     </td>
-                    <td className="px-4 py-3 text-sm text-slate-600 max-w-xs truncate">
-                      {c.transcript || '-'}
-                    </td>
                   </tr>
                 ))}
               </tbody>